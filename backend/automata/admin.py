@@ -1,8 +1,13 @@
 from django.contrib import admin
-from .models import AutomataModel
+from .models import AutomataModel, ConversionResult
 
 @admin.register(AutomataModel)
 class AutomataModelAdmin(admin.ModelAdmin):
     list_display = ('name', 'automata_type', 'created_at', 'updated_at')
     search_fields = ('name', 'description')
-    list_filter = ('automata_type', 'created_at')
\ No newline at end of file
+    list_filter = ('automata_type', 'created_at')
+
+@admin.register(ConversionResult)
+class ConversionResultAdmin(admin.ModelAdmin):
+    list_display = ('fingerprint', 'minimized', 'created_at', 'last_used_at')
+    list_filter = ('minimized',)
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""
+Control de admisión: límites de tamaño y coste por petición y concurrencia
+máxima por clase de endpoint.
+
+Las peticiones que no caben se rechazan antes de hacer el trabajo: 413 si
+exceden un límite y 429 si no hay hueco libre para su clase de endpoint.
+Así una petición enorme no ocupa un trabajador ni empeora la latencia del
+resto del tráfico.
+"""
+import threading
+from functools import wraps
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+
+from .config import ADMISSION_LIMITS, ADMISSION_QUEUE_TIMEOUT, CONCURRENCY_LIMITS
+from .formats import is_compact
+from .utils import logger
+
+_semaphores = {}
+_semaphores_lock = threading.Lock()
+
+
+class AdmissionError(Exception):
+    """Petición rechazada por el control de admisión."""
+
+    def __init__(self, reason, status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, **details):
+        super().__init__(reason)
+        self.reason = reason
+        self.status_code = status_code
+        self.details = details
+
+
+def get_limit(name):
+    return getattr(settings, 'AUTOMATA_ADMISSION_LIMITS', {}).get(name, ADMISSION_LIMITS[name])
+
+
+def _check(name, value):
+    limit = get_limit(name)
+    if value > limit:
+        raise AdmissionError(f"Se supera el límite {name}: {value} > {limit}", limit=name, value=value, max=limit)
+
+
+def automata_size(data):
+    """Número de estados y de aristas, en formato normal o compacto."""
+    if not isinstance(data, dict):
+        return 0, 0
+    if is_compact(data):
+        return len(data.get('states', [])), len(data.get('targets', []))
+    return len(data.get('nodes', [])), len(data.get('edges', []))
+
+
+def check_automata_size(data):
+    states, edges = automata_size(data)
+    _check('max_states', states)
+    _check('max_edges', edges)
+    return states, edges
+
+
+def estimate_validation_cost(edges, total_length, automata_type):
+    """Pasos de simulación en el peor caso: un AFND puede recorrer todas sus aristas por símbolo."""
+    return total_length * (1 if automata_type == 'AFD' else max(edges, 1))
+
+
+def estimate_conversion_cost(data):
+    """
+    Cota inferior del trabajo de determinizar: cada estado del AFND se
+    combina con cada símbolo distinto al menos una vez. La cota superior
+    (2^n subconjuntos) no sirve para decidir, así que la explosión se
+    controla durante la construcción con max_dfa_states.
+    """
+    if is_compact(data):
+        return len(data.get('states', [])) * max(len(data.get('symbols', [])), 1)
+    labels = {edge.get('label') for edge in data.get('edges', []) if isinstance(edge, dict)}
+    return len(data.get('nodes', [])) * max(len(labels), 1)
+
+
+def check_validation_request(data):
+    automata_data = data.get('automataData', {})
+    _, edges = check_automata_size(automata_data)
+    if 'inputs' in data:
+        inputs = data.get('inputs') or []
+        _check('max_batch_inputs', len(inputs))
+        lengths = [len(i) for i in inputs if isinstance(i, str)]
+    else:
+        value = data.get('input', '')
+        lengths = [len(value) if isinstance(value, str) else 0]
+    for length in lengths:
+        _check('max_input_length', length)
+    _check('max_validation_cost', estimate_validation_cost(edges, sum(lengths), data.get('automataType', 'AFND')))
+
+
+def check_conversion_request(data):
+    check_automata_size(data)
+    _check('max_conversion_cost', estimate_conversion_cost(data))
+
+
+def check_analysis_request(data):
+    # Sin límite de coste: el análisis tiene presupuesto propio y sirve justo para los AFND grandes
+    check_automata_size(data)
+
+
+def check_storage_request(data):
+    if 'nodes' in data or is_compact(data):
+        check_automata_size(data)
+
+
+def _semaphore(endpoint_class):
+    limit = getattr(settings, 'AUTOMATA_CONCURRENCY_LIMITS', {}).get(
+        endpoint_class, CONCURRENCY_LIMITS[endpoint_class]
+    )
+    with _semaphores_lock:
+        semaphore = _semaphores.get((endpoint_class, limit))
+        if semaphore is None:
+            semaphore = _semaphores[(endpoint_class, limit)] = threading.BoundedSemaphore(limit)
+    return semaphore
+
+
+def admission_control(endpoint_class, check=None):
+    """
+    Decorador para vistas DRF (debajo de ``@api_view``). Comprueba el tamaño
+    del cuerpo y, si se da, ``check(request.data)``; después reserva un hueco
+    de ``endpoint_class`` durante la vista.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                _check('max_request_bytes', int(request.META.get('CONTENT_LENGTH') or 0))
+                if check is not None and isinstance(request.data, dict):
+                    check(request.data)
+            except AdmissionError as e:
+                logger.warning(f"Petición rechazada en {view.__name__}: {e.reason}")
+                return Response(dict(error=e.reason, **e.details), status=e.status_code)
+
+            semaphore = _semaphore(endpoint_class)
+            if not semaphore.acquire(timeout=ADMISSION_QUEUE_TIMEOUT):
+                logger.warning(f"Petición rechazada en {view.__name__}: sin hueco para '{endpoint_class}'")
+                return Response({
+                    'error': f"Demasiadas peticiones simultáneas de tipo '{endpoint_class}'",
+                }, status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': '1'})
+            try:
+                response = view(request, *args, **kwargs)
+            except BaseException:
+                semaphore.release()
+                raise
+            if getattr(response, 'streaming', False):
+                # El trabajo sigue mientras se envía la respuesta: el hueco se libera al terminar
+                response.streaming_content = _ReleaseWhenDone(response.streaming_content, semaphore)
+            else:
+                semaphore.release()
+            return response
+        return wrapper
+    return decorator
+
+
+class _ReleaseWhenDone:
+    """
+    Contenido de una respuesta en streaming que libera el hueco al agotarse o
+    al cerrarse la respuesta (Django llama a ``close`` aunque no se haya leído).
+    """
+
+    def __init__(self, content, semaphore):
+        self.content = content
+        self.semaphore = semaphore
+        self.released = False
+
+    def __iter__(self):
+        try:
+            yield from self.content
+        finally:
+            self.close()
+
+    def close(self):
+        if not self.released:
+            self.released = True
+            self.semaphore.release()
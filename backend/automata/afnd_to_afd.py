@@ -1,68 +1,379 @@
-from .automata import Automata, Estado
+from .automata import Automata
+from .compiled import SIN_TRANSICION
+from .config import MINIMIZE_FORWARD_MIN_STATES, MINIMIZE_FORWARD_STATES_PER_NFA_STATE, PARALLEL_MIN_FRONTIER
+from .epsilon import CerradurasEpsilon
+from .symbols import ParticionAlfabeto
 from .validator import Validator
-from typing import Dict, Set, FrozenSet, Tuple
-from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+from collections import deque
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Tabla de movimientos del proceso trabajador (ver _iniciar_trabajador)
+_movimientos_trabajador: List[List[int]] = []
+
+
+def _iniciar_trabajador(movimientos: List[List[int]]) -> None:
+    global _movimientos_trabajador
+    _movimientos_trabajador = movimientos
+
+
+def _expandir(frontera: List[int], movimientos: List[List[int]]) -> List[List[int]]:
+    """Sucesores (máscaras) de cada subconjunto de la frontera para cada clase de símbolos."""
+    return [[CerradurasEpsilon.mover(conjunto, movimiento) for movimiento in movimientos] for conjunto in frontera]
+
+
+def _expandir_en_trabajador(frontera: List[int]) -> List[List[int]]:
+    return _expandir(frontera, _movimientos_trabajador)
+
+
+class LimiteDeEstadosExcedido(ValueError):
+    """La construcción de subconjuntos supera el máximo de estados permitido."""
+
+    def __init__(self, max_estados: int):
+        super().__init__(f"El AFD resultante supera el máximo de {max_estados} estados")
+        self.max_estados = max_estados
+
+
+def _determinizar(movimientos: List[List[int]], inicial: int, finales: int,
+                  max_estados: Optional[int] = None) -> Tuple[List[List[int]], List[bool]]:
+    """
+    Construcción de subconjuntos sobre un autómata sin ε dado como máscaras
+    (movimientos[clase][i] = destinos del estado i). Devuelve la tabla del AFD,
+    con una fila por estado en orden BFS (el 0 es el inicial) y SIN_TRANSICION
+    para el subconjunto vacío, y qué estados son finales.
+    """
+    mover = CerradurasEpsilon.mover
+    indices: Dict[int, int] = {inicial: 0}
+    orden = [inicial]
+    tabla: List[List[int]] = []
+    while len(tabla) < len(orden):
+        conjunto = orden[len(tabla)]
+        fila = []
+        for movimiento in movimientos:
+            destino = mover(conjunto, movimiento)
+            if not destino:
+                fila.append(SIN_TRANSICION)
+                continue
+            j = indices.get(destino)
+            if j is None:
+                if max_estados is not None and len(orden) >= max_estados:
+                    raise LimiteDeEstadosExcedido(max_estados)
+                j = indices[destino] = len(orden)
+                orden.append(destino)
+            fila.append(j)
+        tabla.append(fila)
+    return tabla, [bool(conjunto & finales) for conjunto in orden]
+
+
+def _invertir(tabla: List[List[int]], num_clases: int) -> List[List[int]]:
+    """Movimientos (máscaras por clase y estado) del autómata inverso de un AFD en tabla."""
+    inversa = [[0] * len(tabla) for _ in range(num_clases)]
+    for origen, fila in enumerate(tabla):
+        for clase, destino in enumerate(fila):
+            if destino != SIN_TRANSICION:
+                inversa[clase][destino] |= 1 << origen
+    return inversa
+
+
+def _hopcroft(tabla: List[List[int]], finales: List[bool], num_clases: int) -> List[int]:
+    """
+    Bloque de cada estado en el AFD mínimo (algoritmo de Hopcroft). Las
+    transiciones que faltan van a un sumidero implícito, el estado
+    ``len(tabla)`` de la lista devuelta; los estados desde los que no se llega
+    a un final acaban en su bloque.
+    """
+    sumidero = len(tabla)
+    inversa = [[[] for _ in range(sumidero + 1)] for _ in range(num_clases)]
+    for origen, fila in enumerate(tabla):
+        for clase, destino in enumerate(fila):
+            inversa[clase][sumidero if destino == SIN_TRANSICION else destino].append(origen)
+    for clase in range(num_clases):
+        inversa[clase][sumidero].append(sumidero)
+
+    aceptan = {q for q in range(sumidero) if finales[q]}
+    rechazan = {q for q in range(sumidero) if not finales[q]} | {sumidero}
+    bloques = [b for b in (rechazan, aceptan) if b]
+    bloque_de = [0] * (sumidero + 1)
+    for q in aceptan:
+        bloque_de[q] = 1
+    # Basta con refinar respecto al menor de los dos bloques iniciales
+    menor = min(range(len(bloques)), key=lambda b: len(bloques[b]))
+    pendientes = [(menor, clase) for clase in range(num_clases)]
+    en_espera = set(pendientes)
+
+    while pendientes:
+        separador, clase = pendientes.pop()
+        en_espera.discard((separador, clase))
+        # En un AFD cada estado tiene un solo sucesor por clase: no hay repetidos
+        predecesores: Dict[int, List[int]] = {}
+        for destino in bloques[separador]:
+            for origen in inversa[clase][destino]:
+                predecesores.setdefault(bloque_de[origen], []).append(origen)
+
+        for bloque, dentro in predecesores.items():
+            if len(dentro) == len(bloques[bloque]):
+                continue
+            # El bloque nuevo se queda con la parte menor
+            parte = set(dentro) if 2 * len(dentro) <= len(bloques[bloque]) else bloques[bloque] - set(dentro)
+            bloques[bloque] -= parte
+            nuevo = len(bloques)
+            bloques.append(parte)
+            for q in parte:
+                bloque_de[q] = nuevo
+            for c in range(num_clases):
+                if (nuevo, c) not in en_espera:
+                    en_espera.add((nuevo, c))
+                    pendientes.append((nuevo, c))
+
+    return bloque_de
+
+
+def _cociente(tabla: List[List[int]], finales: List[bool], bloque_de: List[int]) -> Tuple[List[List[int]], List[bool]]:
+    """
+    AFD cociente por los bloques de ``_hopcroft``, sin el bloque del sumidero y
+    con los estados renumerados en orden BFS desde el inicial (el estado 0),
+    que es el orden de ``_determinizar``.
+    """
+    sumidero = bloque_de[len(tabla)]
+    if bloque_de[0] == sumidero:
+        return [], []
+    representante = {}
+    for q in range(len(tabla)):
+        representante.setdefault(bloque_de[q], q)
+
+    numero = {bloque_de[0]: 0}
+    orden = [bloque_de[0]]
+    cociente: List[List[int]] = []
+    while len(cociente) < len(orden):
+        fila = []
+        for destino in tabla[representante[orden[len(cociente)]]]:
+            bloque = bloque_de[destino] if destino != SIN_TRANSICION else sumidero
+            if bloque == sumidero:
+                fila.append(SIN_TRANSICION)
+                continue
+            if bloque not in numero:
+                numero[bloque] = len(orden)
+                orden.append(bloque)
+            fila.append(numero[bloque])
+        cociente.append(fila)
+    return cociente, [finales[representante[bloque]] for bloque in orden]
+
 
 class AFND_to_AFD:
     def __init__(self):
         self.afnd = Automata(tipo='AFND')
-        self._cache_cerradura: Dict[FrozenSet[Estado], Set[Estado]] = {}
-        self._cache_transiciones: Dict[Tuple[FrozenSet[Estado], str], Set[Estado]] = {}
+        # Algoritmo que usó la última llamada a convertir_minimo
+        self.estrategia_usada: Optional[str] = None
+
+    def convertir(self, max_estados: Optional[int] = None) -> Automata:
+        """
+        Construcción de subconjuntos. Con ``max_estados`` se lanza
+        LimiteDeEstadosExcedido en cuanto el AFD supera ese número de estados.
+        """
+        afd = Automata(tipo='AFD')
+        for evento in self.convertir_eventos(max_estados):
+            if evento[0] == 'estado':
+                afd.agregar_estado(evento[1], evento[2])
+            else:
+                for etiqueta, destino in evento[2]:
+                    afd.agregar_transicion(evento[1], etiqueta, destino)
+        return afd
 
-    def convertir(self) -> Automata:
+    def convertir_eventos(self, max_estados: Optional[int] = None) -> Iterator[tuple]:
+        """
+        La construcción de ``convertir`` como generador, para consumir el AFD
+        a medida que se descubre. Produce, en orden BFS:
+        - ('estado', nombre, es_final) al descubrir un estado
+        - ('aristas', origen, [(etiqueta, destino), ...]) al terminar de expandirlo
+        Un estado siempre se anuncia antes que las aristas que llegan a él.
+        """
         if not self.afnd.validar_estructura():
             raise ValueError("El AFND no es válido")
 
-        afd = Automata(tipo='AFD')
-        estados_procesados: Dict[str, FrozenSet[Estado]] = {}
-        estados_por_procesar = [self._obtener_estado_inicial()]
-        contador = 0
+        # Se expande por clases de caracteres equivalentes, no por etiquetas;
+        # los subconjuntos son máscaras de bits (ver _tabla_movimientos)
+        particion = self.afnd.particion()
+        cerraduras, movimientos = self._tabla_movimientos(particion)
+        estado_inicial = cerraduras.cerrar((self.afnd.estado_inicial,))
+        nombres: Dict[int, str] = {estado_inicial: "q0"}
+        yield ('estado', "q0", bool(estado_inicial & cerraduras.finales))
+        estados_por_procesar = deque([estado_inicial])
 
         while estados_por_procesar:
-            conjunto_actual = estados_por_procesar.pop(0)
-            nombre_estado = self._obtener_nombre_estado(conjunto_actual, estados_procesados)
+            conjunto_actual = estados_por_procesar.popleft()
+            destinos = {}
+
+            for clase, movimiento in enumerate(movimientos):
+                nuevos_estados = CerradurasEpsilon.mover(conjunto_actual, movimiento)
+                if not nuevos_estados:
+                    continue
+
+                # Los estados se nombran al descubrirlos, en orden BFS
+                if nuevos_estados not in nombres:
+                    if max_estados is not None and len(nombres) >= max_estados:
+                        raise LimiteDeEstadosExcedido(max_estados)
+                    nombres[nuevos_estados] = f"q{len(nombres)}"
+                    yield ('estado', nombres[nuevos_estados], bool(nuevos_estados & cerraduras.finales))
+                    estados_por_procesar.append(nuevos_estados)
+                destinos[clase] = nombres[nuevos_estados]
+
+            yield ('aristas', nombres[conjunto_actual], Automata._aristas_clases(destinos, particion))
+
+    def convertir_paralelo(self, procesos: Optional[int] = None,
+                           frontera_minima: int = PARALLEL_MIN_FRONTIER,
+                           max_estados: Optional[int] = None) -> Automata:
+        """
+        Igual que ``convertir``, pero reparte la expansión de la frontera entre
+        procesos. Los subconjuntos se codifican como máscaras de bits (un bit por
+        estado del AFND) y el proceso principal mantiene la tabla que evita
+        duplicados. La frontera se procesa por niveles y en orden, así que los
+        estados se numeran igual que en el BFS de ``convertir`` y el resultado
+        es idéntico. Las fronteras con menos de ``frontera_minima`` subconjuntos
+        se expanden en el propio proceso. ``max_estados`` funciona como en ``convertir``.
+        """
+        if not self.afnd.validar_estructura():
+            raise ValueError("El AFND no es válido")
 
-            if nombre_estado not in estados_procesados:
-                es_final = any(e.es_final for e in conjunto_actual)
-                afd.agregar_estado(nombre_estado, es_final)
-                estados_procesados[nombre_estado] = conjunto_actual
+        particion = self.afnd.particion()
+        cerraduras, movimientos = self._tabla_movimientos(particion)
+        finales = cerraduras.finales
 
-                for simbolo in self.afnd.alfabeto:
-                    if simbolo == "ε":
-                        continue
+        inicial = cerraduras.cerrar((self.afnd.estado_inicial,))
+        indices: Dict[int, int] = {inicial: 0}
+        orden = [inicial]
+        transiciones: List[List[int]] = []
+        frontera = [inicial]
+        trabajadores = procesos or os.cpu_count() or 1
+        pool = None
 
-                    nuevos_estados = self._calcular_transicion(conjunto_actual, simbolo)
-                    if nuevos_estados:
-                        nuevo_nombre = self._obtener_nombre_estado(nuevos_estados, estados_procesados)
-                        if nuevo_nombre not in estados_procesados:
-                            estados_por_procesar.append(nuevos_estados)
-                        afd.agregar_transicion(nombre_estado, simbolo, nuevo_nombre)
+        try:
+            while frontera:
+                if len(frontera) < frontera_minima:
+                    resultados = _expandir(frontera, movimientos)
+                else:
+                    if pool is None:
+                        pool = ProcessPoolExecutor(trabajadores, initializer=_iniciar_trabajador,
+                                                   initargs=(movimientos,))
+                    trozo = -(-len(frontera) // (trabajadores * 4))
+                    partes = [frontera[i:i + trozo] for i in range(0, len(frontera), trozo)]
+                    resultados = [r for parte in pool.map(_expandir_en_trabajador, partes) for r in parte]
 
+                nueva_frontera = []
+                for sucesores in resultados:
+                    for destino in sucesores:
+                        if destino and destino not in indices:
+                            if max_estados is not None and len(orden) >= max_estados:
+                                raise LimiteDeEstadosExcedido(max_estados)
+                            indices[destino] = len(orden)
+                            orden.append(destino)
+                            nueva_frontera.append(destino)
+                    transiciones.append(sucesores)
+                frontera = nueva_frontera
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        afd = Automata(tipo='AFD')
+        for i, conjunto in enumerate(orden):
+            afd.agregar_estado(f"q{i}", bool(conjunto & finales))
+        for i, sucesores in enumerate(transiciones):
+            destinos = {clase: f"q{indices[d]}" for clase, d in enumerate(sucesores) if d}
+            afd._agregar_transiciones_clases(f"q{i}", destinos, particion)
         return afd
 
-    def _obtener_estado_inicial(self) -> FrozenSet[Estado]:
-        return frozenset(Validator._cerradura_epsilon({self.afnd.estado_inicial}))
+    def convertir_minimo(self, max_estados: Optional[int] = None, estrategia: str = 'auto') -> Automata:
+        """
+        AFD mínimo del AFND en una sola pasada, sin crear el AFD intermedio como
+        objetos ``Estado``: todo se hace sobre tablas de enteros y solo el
+        resultado se convierte en ``Automata``. Estrategias:
+        - 'hopcroft': construcción de subconjuntos y después Hopcroft
+        - 'brzozowski': invertir, determinizar, invertir y determinizar; el
+          segundo AFD ya es mínimo
+        - 'auto': subconjuntos con un presupuesto de estados proporcional al
+          AFND; si lo supera (el AFD intermedio explota) se pasa a Brzozowski,
+          que suele evitarlo cuando el AFND es casi determinista al revés
+        ``max_estados`` limita cada AFD intermedio, como en ``convertir``. Los
+        estados se llaman Q0, Q1... en orden BFS, así que las tres estrategias
+        dan exactamente el mismo autómata.
+        """
+        if estrategia not in ('auto', 'hopcroft', 'brzozowski'):
+            raise ValueError(f"Estrategia de minimización desconocida: {estrategia}")
+        if not self.afnd.validar_estructura():
+            raise ValueError("El AFND no es válido")
 
-    def _calcular_transicion(self, estados: FrozenSet[Estado], simbolo: str) -> FrozenSet[Estado]:
-        cache_key = (estados, simbolo)
-        if cache_key in self._cache_transiciones:
-            return self._cache_transiciones[cache_key]
+        particion = self.afnd.particion()
+        cerraduras, movimientos = self._tabla_movimientos(particion)
+        inicial = cerraduras.cerrar((self.afnd.estado_inicial,))
 
-        destinos = set()
-        for estado in estados:
-            for destino in estado.transiciones.get(simbolo, []):
-                destinos.update(Validator._cerradura_epsilon({destino}))
+        presupuesto = max(MINIMIZE_FORWARD_MIN_STATES,
+                          MINIMIZE_FORWARD_STATES_PER_NFA_STATE * len(cerraduras.estados))
+        if estrategia == 'auto' and max_estados is not None and max_estados <= presupuesto:
+            estrategia = 'hopcroft'
 
-        resultado = frozenset(destinos)
-        self._cache_transiciones[cache_key] = resultado
-        return resultado
+        if estrategia == 'auto':
+            try:
+                tabla, finales = self._minimo_hopcroft(cerraduras, movimientos, inicial, presupuesto)
+                estrategia = 'hopcroft'
+            except LimiteDeEstadosExcedido:
+                try:
+                    tabla, finales = self._minimo_brzozowski(cerraduras, movimientos, inicial, max_estados)
+                    estrategia = 'brzozowski'
+                except LimiteDeEstadosExcedido:
+                    # Al revés también explota: queda la construcción directa completa
+                    tabla, finales = self._minimo_hopcroft(cerraduras, movimientos, inicial, max_estados)
+                    estrategia = 'hopcroft'
+        elif estrategia == 'brzozowski':
+            tabla, finales = self._minimo_brzozowski(cerraduras, movimientos, inicial, max_estados)
+        else:
+            tabla, finales = self._minimo_hopcroft(cerraduras, movimientos, inicial, max_estados)
+        self.estrategia_usada = estrategia
+
+        afd = Automata(tipo='AFD')
+        if not tabla:
+            # Lenguaje vacío: un único estado no final
+            afd.agregar_estado("Q0", False)
+            return afd
+        for i, es_final in enumerate(finales):
+            afd.agregar_estado(f"Q{i}", es_final)
+        for i, fila in enumerate(tabla):
+            destinos = {clase: f"Q{d}" for clase, d in enumerate(fila) if d != SIN_TRANSICION}
+            afd._agregar_transiciones_clases(f"Q{i}", destinos, particion)
+        return afd
+
+    @staticmethod
+    def _minimo_hopcroft(cerraduras: CerradurasEpsilon, movimientos: List[List[int]], inicial: int,
+                  max_estados: Optional[int]) -> Tuple[List[List[int]], List[bool]]:
+        tabla, finales = _determinizar(movimientos, inicial, cerraduras.finales, max_estados)
+        return _cociente(tabla, finales, _hopcroft(tabla, finales, len(movimientos)))
 
     @staticmethod
-    def _obtener_nombre_estado(conjunto: FrozenSet[Estado], estados_procesados: Dict[str, FrozenSet[Estado]]) -> str:
-        for nombre, conjunto_existente in estados_procesados.items():
-            if conjunto == conjunto_existente:
-                return nombre
-        return f"q{len(estados_procesados)}"
+    def _minimo_brzozowski(cerraduras: CerradurasEpsilon, movimientos: List[List[int]], inicial: int,
+                    max_estados: Optional[int]) -> Tuple[List[List[int]], List[bool]]:
+        # Inverso del AFND sin ε: empieza en los finales y acaba en la cerradura del inicial
+        inverso = [[0] * len(cerraduras.estados) for _ in movimientos]
+        for clase, movimiento in enumerate(movimientos):
+            for origen, destinos in enumerate(movimiento):
+                while destinos:
+                    bit = destinos & -destinos
+                    inverso[clase][bit.bit_length() - 1] |= 1 << origen
+                    destinos ^= bit
+        tabla, finales = _determinizar(inverso, cerraduras.finales, inicial, max_estados)
+
+        # Inverso de ese AFD: empieza en sus finales y acaba en su estado inicial
+        inicial_inverso = sum(1 << i for i, es_final in enumerate(finales) if es_final)
+        if not inicial_inverso:
+            return [], []
+        return _determinizar(_invertir(tabla, len(movimientos)), inicial_inverso, 1, max_estados)
+
+    def _tabla_movimientos(self, particion: ParticionAlfabeto) -> Tuple[CerradurasEpsilon, List[List[int]]]:
+        """
+        Cerraduras ε del AFND y movimientos[clase][i]: cerradura de los destinos
+        del estado i con los caracteres de esa clase. Los subconjuntos se
+        codifican como máscaras de bits en el orden de ``cerraduras.estados``.
+        """
+        cerraduras = self.afnd.cerraduras_epsilon()
+        return cerraduras, [cerraduras.movimientos(etiquetas) for etiquetas in particion.etiquetas_por_clase]
 
     def mostrar_automatas(self):
         print("\n🔹 Autómata Finito No Determinista (AFND):")
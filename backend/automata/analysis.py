@@ -0,0 +1,209 @@
+"""
+Análisis previo a la conversión: métricas estructurales de un AFND y una
+estimación barata del tamaño del AFD, para decidir cómo convertirlo antes de
+gastar CPU en la construcción de subconjuntos.
+
+El tamaño del AFD se estima en tres pasos, todos con un presupuesto de trabajo
+(bits recorridos al mover subconjuntos) fijo:
+
+- se explora la construcción de subconjuntos hasta ``max_explored_states``
+  estados; si termina antes, el tamaño es exacto;
+- si no, se toman muestras con recorridos aleatorios desde el estado inicial
+  y se estima el total por captura y recaptura: qué fracción de las
+  muestras son estados ya explorados;
+- la cota superior es segura: cada estado del AFD salvo el inicial es una
+  unión de movimientos de una misma clase de símbolos.
+
+Modos recomendados: ``inline`` (convert normal), ``stream`` (convert con
+stream: true, que no retiene el AFD) y ``lazy`` (no convertir y validar
+directamente sobre el AFND, que determiniza solo los pasos que recorre).
+"""
+import math
+import random
+import time
+from collections import Counter, deque
+
+from django.conf import settings
+
+from .admission import get_limit
+from .automata import Automata
+from .config import ANALYSIS, EPSILON
+from .epsilon import CerradurasEpsilon, componentes_fuertes
+
+_INTENTOS_POR_PASO = 4
+
+
+def get_analysis_setting(name):
+    return getattr(settings, 'AUTOMATA_ANALYSIS', {}).get(name, ANALYSIS[name])
+
+
+def structural_metrics(automata: Automata):
+    """Estados, aristas, alfabeto, grado de no determinismo y ciclos ε de un autómata."""
+    estados = list(automata.estados.values())
+    particion = automata.particion()
+
+    alcanzables = set()
+    if automata.estado_inicial:
+        alcanzables.add(automata.estado_inicial)
+        pendientes = [automata.estado_inicial]
+        while pendientes:
+            for destinos in pendientes.pop().transiciones.values():
+                for destino in destinos:
+                    if destino not in alcanzables:
+                        alcanzables.add(destino)
+                        pendientes.append(destino)
+
+    # Destinos por (estado, clase de caracteres), antes de las cerraduras ε
+    pares = 0
+    destinos_total = 0
+    maximo = 0
+    no_deterministas = 0
+    for estado in estados:
+        for etiquetas in particion.etiquetas_por_clase:
+            destinos = set()
+            for etiqueta in etiquetas:
+                destinos.update(estado.transiciones.get(etiqueta, ()))
+            if destinos:
+                pares += 1
+                destinos_total += len(destinos)
+                maximo = max(maximo, len(destinos))
+                no_deterministas += len(destinos) > 1
+
+    indice = {estado: i for i, estado in enumerate(estados)}
+    sucesores = [[indice[d] for d in estado.transiciones.get(EPSILON, ())] for estado in estados]
+    ciclos = sum(
+        1 for componente in componentes_fuertes(sucesores)
+        if len(componente) > 1 or componente[0] in sucesores[componente[0]]
+    )
+
+    return {
+        'states': len(estados),
+        'reachableStates': len(alcanzables),
+        'finalStates': sum(1 for estado in estados if estado.es_final),
+        'edges': sum(len(d) for estado in estados for d in estado.transiciones.values()),
+        'epsilonEdges': sum(len(s) for s in sucesores),
+        'alphabet': len(automata.alfabeto - {EPSILON}),
+        'symbolClasses': len(particion.etiquetas_por_clase),
+        'nondeterminism': {
+            'maxTargets': maximo,
+            'meanTargets': round(destinos_total / pares, 3) if pares else 0,
+            'nondeterministicPairs': no_deterministas,
+        },
+        'epsilonCycles': ciclos,
+    }
+
+
+def _upper_bound(movimientos, num_estados):
+    """Cota segura del número de estados del AFD (sin contar el subconjunto vacío)."""
+    cota = 1
+    for movimiento in movimientos:
+        union = 0
+        for mascara in movimiento:
+            union |= mascara
+        distintos = len(set(movimiento) - {0})
+        cota += 2 ** min(union.bit_count(), distintos) - 1
+    return min(cota, 2 ** num_estados - 1)
+
+
+def estimate_dfa_states(movimientos, inicial, num_estados, max_explored_states=None, max_work=None,
+                        sample_walks=None, seed=0):
+    """
+    Estados del AFD de la construcción de subconjuntos sobre ``movimientos``
+    (máscaras por clase y estado, ver CerradurasEpsilon): exactos si caben en
+    el presupuesto y, si no, estimados por muestreo.
+    """
+    if max_explored_states is None:
+        max_explored_states = get_analysis_setting('max_explored_states')
+    if max_work is None:
+        max_work = get_analysis_setting('max_work')
+    if sample_walks is None:
+        sample_walks = get_analysis_setting('sample_walks')
+    mover = CerradurasEpsilon.mover
+    cota = _upper_bound(movimientos, num_estados)
+
+    # Exploración en anchura con presupuesto: mover cuesta un paso por bit
+    vistos = {inicial}
+    cola = deque([inicial])
+    trabajo = 0
+    completa = True
+    while cola and completa:
+        conjunto = cola.popleft()
+        trabajo += conjunto.bit_count() * len(movimientos)
+        if trabajo > max_work // 2:
+            completa = False
+            break
+        for movimiento in movimientos:
+            destino = mover(conjunto, movimiento)
+            if destino and destino not in vistos:
+                if len(vistos) >= max_explored_states:
+                    completa = False
+                    break
+                vistos.add(destino)
+                cola.append(destino)
+
+    resultado = {'explored': len(vistos), 'exact': completa}
+    if completa:
+        resultado.update(estimate=len(vistos), upperBound=len(vistos),
+                         upperBoundLog2=round(math.log2(len(vistos)), 3))
+        return resultado
+
+    # Recorridos aleatorios de longitud entre n y 2n (como mucho max_walk_length),
+    # suficiente para llegar a subconjuntos que dependen de los n últimos símbolos
+    aleatorio = random.Random(seed)
+    longitud = max(1, min(get_analysis_setting('max_walk_length'), 2 * num_estados))
+    muestras = Counter()
+    trabajo = 0
+    for _ in range(sample_walks):
+        conjunto = inicial
+        for _ in range(aleatorio.randint((longitud + 1) // 2, longitud)):
+            for _ in range(_INTENTOS_POR_PASO):
+                trabajo += conjunto.bit_count()
+                siguiente = mover(conjunto, aleatorio.choice(movimientos))
+                if siguiente:
+                    conjunto = siguiente
+                    break
+            else:
+                break
+        muestras[conjunto] += 1
+        if trabajo > max_work // 2:
+            break
+
+    # Captura y recaptura (estimador de Chapman): los explorados están
+    # "marcados" y la fracción de muestras que cae entre ellos estima qué
+    # parte del total son. Las muestras son más profundas que la exploración,
+    # así que tiende a sobrestimar: es una estimación prudente
+    recapturas = sum(veces for conjunto, veces in muestras.items() if conjunto in vistos)
+    tomadas = sum(muestras.values())
+    chapman = (len(vistos) + 1) * (tomadas + 1) / (recapturas + 1) - 1
+    resultado.update(
+        estimate=min(cota, max(len(vistos), round(chapman))),
+        upperBound=cota if cota < 2 ** 53 else None,
+        upperBoundLog2=round(math.log2(cota), 3),
+        samples=tomadas,
+    )
+    return resultado
+
+
+def recommend_mode(estimate):
+    """Modo de ejecución para un AFD de ``estimate`` estados (ver la cabecera del módulo)."""
+    if estimate <= get_analysis_setting('inline_max_states'):
+        return 'inline'
+    if estimate <= get_limit('max_dfa_states'):
+        return 'stream'
+    return 'lazy'
+
+
+def analyze_conversion(automata: Automata):
+    """Métricas, estimación del AFD y modo recomendado para convertir ``automata``."""
+    start = time.perf_counter()
+    if not automata.validar_estructura():
+        raise ValueError("El AFND no es válido")
+    report = structural_metrics(automata)
+
+    cerraduras = automata.cerraduras_epsilon()
+    movimientos = [cerraduras.movimientos(etiquetas) for etiquetas in automata.particion().etiquetas_por_clase]
+    inicial = cerraduras.cerrar((automata.estado_inicial,))
+    report['dfaStates'] = estimate_dfa_states(movimientos, inicial, len(cerraduras.estados))
+    report['recommendedMode'] = recommend_mode(report['dfaStates']['estimate'])
+    report['seconds'] = round(time.perf_counter() - start, 4)
+    return report
@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
 
 class AutomataConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'automata'  # Nombre correcto de la app
\ No newline at end of file
+    name = 'automata'  # Nombre correcto de la app
+
+    def ready(self):
+        from .db import configure_sqlite
+        from .warmup import get_warmup_setting, start_warmup
+        connection_created.connect(configure_sqlite, dispatch_uid='automata_configure_sqlite')
+        # La precarga empieza con la primera petición del proceso
+        if get_warmup_setting('on_startup'):
+            request_started.connect(start_warmup, dispatch_uid='automata_start_warmup')
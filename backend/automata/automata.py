@@ -1,5 +1,14 @@
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from dataclasses import dataclass, field
+from .compiled import AFDCompilado
+from .config import (
+    AFND_STEP_CACHE_MAX, EPSILON, PREFIX_BATCH_MIN_SHARING, PREFIX_BATCH_MIN_SHARING_VECTORIZED,
+)
+from .epsilon import CerradurasEpsilon
+from .prefixes import comparten_prefijos, ordenar_por_prefijos, recorrer_por_prefijos
+from .symbols import ParticionAlfabeto, es_clase, rangos_de, se_solapan
+from .tracing import Traza
+from .utils import logger
 
 @dataclass
 class Estado:
@@ -39,6 +48,14 @@ class Automata:
         self.estados: Dict[str, Estado] = {}
         self.estado_inicial: Optional[Estado] = None
         self.alfabeto: Set[str] = set()
+        # True si alguna etiqueta es una clase de símbolos ('[a-z]')
+        self.usa_clases = False
+        self._particion: Optional[ParticionAlfabeto] = None
+        # Cerraduras ε y movimientos por símbolo de la simulación (ver cerraduras_epsilon)
+        self._cerraduras: Optional[CerradurasEpsilon] = None
+        self._movimientos: Dict[str, List[int]] = {}
+        # Pasos ya calculados de la simulación: (subconjunto, símbolo) -> subconjunto
+        self._pasos: Dict[Tuple[int, str], int] = {}
 
     def agregar_estado(self, nombre: str, es_final: bool = False) -> None:
         if not isinstance(nombre, str):
@@ -49,6 +66,9 @@ class Automata:
 
         nuevo_estado = Estado(nombre, es_final)
         self.estados[nombre] = nuevo_estado
+        self._cerraduras = None
+        self._movimientos = {}
+        self._pasos = {}
 
         # Solo establecer como inicial si es el primer estado y no hay otro inicial
         if not self.estados or self.estado_inicial is None:
@@ -63,11 +83,25 @@ class Automata:
         if origen not in self.estados or destino not in self.estados:
             raise ValueError("Estado origen o destino no existe")
 
-        if self.tipo == 'AFD' and simbolo in self.estados[origen].transiciones:
+        clase = es_clase(simbolo)
+        if clase:
+            rangos_de(simbolo)  # Valida la sintaxis de la clase
+
+        if self.tipo == 'AFD' and (
+            simbolo in self.estados[origen].transiciones
+            or ((clase or self.usa_clases) and self._solapa(self.estados[origen], simbolo))
+        ):
             raise ValueError(f"El AFD ya tiene una transición para el símbolo {simbolo}")
 
         self.estados[origen].agregar_transicion(simbolo, self.estados[destino])
-        self.alfabeto.add(simbolo)
+        self._movimientos = {}
+        self._pasos = {}
+        if simbolo == EPSILON:
+            self._cerraduras = None
+        if simbolo not in self.alfabeto:
+            self.alfabeto.add(simbolo)
+            self.usa_clases = self.usa_clases or clase
+            self._particion = None
         return self
 
     def es_deterministico(self) -> bool:
@@ -75,8 +109,38 @@ class Automata:
             for transiciones in estado.transiciones.values():
                 if len(transiciones) > 1:
                     return False
+            if self.usa_clases:
+                etiquetas = [e for e in estado.transiciones if e != 'ε' or self.tipo == 'AFD']
+                for i, etiqueta in enumerate(etiquetas):
+                    if self._solapa(estado, etiqueta, etiquetas[i + 1:]):
+                        return False
         return True
 
+    def particion(self) -> ParticionAlfabeto:
+        """Partición del alfabeto en clases de caracteres equivalentes (sin ε en un AFND)."""
+        if self._particion is None:
+            etiquetas = self.alfabeto if self.tipo == 'AFD' else self.alfabeto - {'ε'}
+            self._particion = ParticionAlfabeto(etiquetas)
+        return self._particion
+
+    def cerraduras_epsilon(self) -> CerradurasEpsilon:
+        """Cerraduras ε de todos los estados, calculadas una vez y reutilizadas hasta el siguiente cambio."""
+        if self._cerraduras is None:
+            self._cerraduras = CerradurasEpsilon(self.estados.values())
+        return self._cerraduras
+
+    @staticmethod
+    def _solapa(estado: Estado, simbolo: str, etiquetas: Optional[List[str]] = None) -> bool:
+        """Indica si ``simbolo`` comparte caracteres con otra etiqueta del estado."""
+        rangos = rangos_de(simbolo)
+        if rangos is None:
+            return False
+        for etiqueta in estado.transiciones if etiquetas is None else etiquetas:
+            otros = rangos_de(etiqueta) if etiqueta != simbolo else None
+            if otros is not None and se_solapan(rangos, otros):
+                return True
+        return False
+
     def validar_estructura(self) -> bool:
         if not self.estado_inicial:
             return False
@@ -112,25 +176,97 @@ class Automata:
             for estado in self.estados.values()
         }
 
-    def validar_cadena(self, cadena: str) -> bool:
-        """Valida una cadena en el autómata."""
+    def validar_cadena(self, cadena: str, traza: Optional[Traza] = None) -> bool:
+        """
+        Valida una cadena en el autómata.
+        Si se pasa una ``Traza``, registra en ella los estados activos tras cada
+        símbolo; sin traza se usa el recorrido normal, sin coste adicional.
+        """
         if not self.estado_inicial:
-            print("No hay estado inicial definido")
+            logger.warning("Validación sin estado inicial definido")
             return False
 
         if not any(estado.es_final for estado in self.estados.values()):
-            print("No hay estados finales definidos")
+            logger.warning("Validación sin estados finales definidos")
             return False
 
         try:
+            if traza is not None or (self.usa_clases and self.tipo == 'AFD'):
+                return self._validar_cadena_por_conjuntos(cadena, traza)
             if self.tipo == 'AFD':
                 return self._validar_cadena_afd(cadena)
             else:
                 return self._validar_cadena_afnd(cadena)
         except Exception as e:
-            print(f"Error al validar cadena: {e}")
+            logger.error(f"Error al validar cadena: {str(e)}")
             return False
 
+    def compilar(self) -> AFDCompilado:
+        """Compila el AFD a una tabla de transiciones indexada por enteros."""
+        if self.tipo != 'AFD':
+            raise ValueError("Solo se puede compilar un AFD.")
+        return AFDCompilado.desde_automata(self)
+
+    def validar_lote(self, cadenas: List[str], prefijos: Optional[bool] = None) -> List[bool]:
+        """
+        Valida varias cadenas. Con ``prefijos`` se recorren compartiendo los
+        prefijos comunes (ver prefixes.py); sin él, los AFD las procesan todas
+        juntas sobre la tabla compilada y los AFND una a una. Por defecto se
+        decide según la fracción de caracteres en prefijos compartidos.
+        """
+        if not self.estado_inicial or not any(e.es_final for e in self.estados.values()):
+            return [self.validar_cadena(cadena) for cadena in cadenas]
+
+        compilado = self.compilar() if self.tipo == 'AFD' else None
+        orden = comunes = None
+        if prefijos is None:
+            orden, comunes = ordenar_por_prefijos(cadenas)
+            vectorizado = compilado is not None and compilado.vectorizado
+            prefijos = comparten_prefijos(
+                cadenas, comunes,
+                PREFIX_BATCH_MIN_SHARING_VECTORIZED if vectorizado else PREFIX_BATCH_MIN_SHARING
+            )
+
+        if compilado is not None:
+            if prefijos:
+                return compilado.aceptar_por_prefijos(cadenas, orden, comunes)
+            return compilado.aceptar_lote(cadenas)
+        if not prefijos:
+            return [self.validar_cadena(cadena) for cadena in cadenas]
+        cerraduras = self.cerraduras_epsilon()
+        return recorrer_por_prefijos(
+            cadenas, cerraduras.cerrar((self.estado_inicial,)),
+            lambda actuales, simbolo: self._paso_afnd(actuales, simbolo) or None,
+            lambda actuales: bool(actuales & cerraduras.finales),
+            orden, comunes,
+        )
+
+    def contar_cadenas(self, longitud_max: int) -> List[int]:
+        """Cuenta las cadenas aceptadas de cada longitud entre 0 y longitud_max."""
+        return self._compilar_equivalente().contar_por_longitud(longitud_max)
+
+    def contar_cadenas_de_longitud(self, longitud: int) -> int:
+        """Cuenta las cadenas aceptadas de una longitud exacta."""
+        return self._compilar_equivalente().contar_longitud(longitud)
+
+    def enumerar_cadenas(self, longitud_max: Optional[int] = None) -> Iterator[str]:
+        """Genera perezosamente las cadenas aceptadas en orden shortlex."""
+        return self._compilar_equivalente().enumerar_aceptadas(longitud_max)
+
+    def _compilar_equivalente(self, max_estados: Optional[int] = None) -> AFDCompilado:
+        """
+        Compila el autómata, determinizándolo antes si hace falta (con
+        ``max_estados``, hasta ese número de estados: ver AFND_to_AFD.convertir).
+        """
+        if self.tipo == 'AFD' or (self.es_deterministico() and 'ε' not in self.alfabeto):
+            return AFDCompilado.desde_automata(self)
+
+        # Import diferido: afnd_to_afd depende de este módulo
+        from .afnd_to_afd import AFND_to_AFD
+        converter = AFND_to_AFD()
+        converter.afnd = self
+        return converter.convertir(max_estados).compilar()
+
     def _validar_cadena_afd(self, cadena: str) -> bool:
         estado_actual = self.estado_inicial
         
@@ -142,54 +278,140 @@ class Automata:
         return estado_actual.es_final
 
     def _validar_cadena_afnd(self, cadena: str) -> bool:
+        """
+        Simulación por subconjuntos como máscaras de bits, con las cerraduras ε
+        ya aplicadas. Los pasos calculados se memorizan en el autómata.
+        """
+        cerraduras = self.cerraduras_epsilon()
+        pasos = self._pasos
+        actuales = cerraduras.cerrar((self.estado_inicial,))
+
+        for simbolo in cadena:
+            siguientes = pasos.get((actuales, simbolo))
+            actuales = siguientes if siguientes is not None else self._paso_afnd(actuales, simbolo)
+            if not actuales:
+                return False
+
+        return bool(actuales & cerraduras.finales)
+
+    def _paso_afnd(self, actuales: int, simbolo: str) -> int:
+        """Subconjunto (máscara, 0 si vacío) tras leer ``simbolo``; el resultado se memoriza."""
+        siguientes = self._pasos.get((actuales, simbolo))
+        if siguientes is not None:
+            return siguientes
+        movimiento = self._movimientos.get(simbolo)
+        if movimiento is None:
+            if self.usa_clases:
+                etiquetas = self.particion().etiquetas_de(simbolo)
+            else:
+                etiquetas = (simbolo,) if simbolo in self.alfabeto and simbolo != EPSILON else ()
+            if not etiquetas:
+                return 0
+            movimiento = self._movimientos[simbolo] = self.cerraduras_epsilon().movimientos(etiquetas)
+
+        siguientes = CerradurasEpsilon.mover(actuales, movimiento)
+        if len(self._pasos) >= AFND_STEP_CACHE_MAX:
+            self._pasos.clear()
+        self._pasos[(actuales, simbolo)] = siguientes
+        return siguientes
+
+    def _validar_cadena_por_conjuntos(self, cadena: str, traza: Optional[Traza] = None) -> bool:
+        """
+        Recorrido por conjuntos de estados, válido para AFD y AFND. Se usa
+        cuando hay clases de símbolos o cuando se pide una traza.
+        """
+        particion = self.particion() if self.usa_clases else None
+        cerraduras = self.cerraduras_epsilon() if self.tipo == 'AFND' else None
         estados_actuales = {self.estado_inicial}
-        print(f"Estado inicial: {self.estado_inicial.nombre}")
-        
+        if cerraduras is not None:
+            estados_actuales = cerraduras.estados_de(cerraduras.cerrar(estados_actuales))
+        if traza is not None:
+            traza.registrar(None, estados_actuales)
+
         for simbolo in cadena:
-            print(f"Procesando símbolo: {simbolo}")
+            etiquetas = particion.etiquetas_de(simbolo) if particion else (simbolo,)
             nuevos_estados = set()
-            
             for estado in estados_actuales:
-                print(f"Evaluando estado: {estado.nombre}")
-                if simbolo in estado.transiciones:
-                    nuevos_estados.update(estado.transiciones[simbolo])
-                    print(f"Nuevos estados para {simbolo}: {[e.nombre for e in nuevos_estados]}")
-            
+                for etiqueta in etiquetas:
+                    nuevos_estados.update(estado.transiciones.get(etiqueta, ()))
+            if cerraduras is not None:
+                nuevos_estados = cerraduras.estados_de(cerraduras.cerrar(nuevos_estados))
+
+            if traza is not None:
+                traza.registrar(simbolo, nuevos_estados)
             if not nuevos_estados:
-                print(f"No hay transiciones válidas para {simbolo}")
                 return False
-                
+
             estados_actuales = nuevos_estados
-        
-        tiene_final = any(estado.es_final for estado in estados_actuales)
-        print(f"Estados finales alcanzados: {tiene_final}")
-        return tiene_final
+
+        return any(estado.es_final for estado in estados_actuales)
+
+    def _destino_clase(self, estado: Estado, clase: int) -> Optional[Estado]:
+        """Destino de un estado determinista con los caracteres de una clase."""
+        for etiqueta in self.particion().etiquetas_por_clase[clase]:
+            destinos = estado.transiciones.get(etiqueta)
+            if destinos:
+                return destinos[0]
+        return None
+
+    def _agregar_transiciones_clases(self, origen: str, destinos: Dict[int, str],
+                                     particion: ParticionAlfabeto) -> None:
+        """
+        Añade las transiciones de ``origen`` dadas como clase -> destino, con las
+        clases de ``particion`` (ver ``_aristas_clases``).
+        """
+        for etiqueta, destino in self._aristas_clases(destinos, particion):
+            self.agregar_transicion(origen, etiqueta, destino)
+
+    @staticmethod
+    def _aristas_clases(destinos: Dict[int, str], particion: ParticionAlfabeto) -> List[Tuple[str, str]]:
+        """
+        Aristas (etiqueta, destino) para transiciones dadas como clase -> destino.
+        Sin clases de símbolos hay una arista por símbolo; con clases, una por
+        destino con la unión de sus clases.
+        """
+        if not particion.tiene_clases:
+            return [(particion.etiqueta([clase]), destino) for clase, destino in destinos.items()]
+
+        aristas = []
+        por_destino: Dict[str, List[int]] = {}
+        for clase, destino in destinos.items():
+            por_destino.setdefault(destino, []).append(clase)
+        for destino, clases in por_destino.items():
+            caracteres = [c for c in clases if c < particion.num_clases_caracter]
+            if caracteres:
+                aristas.append((particion.etiqueta(caracteres), destino))
+            for clase in clases:
+                if clase >= particion.num_clases_caracter:
+                    aristas.append((particion.etiqueta([clase]), destino))
+        return aristas
     
     def minimizar(self):
         if self.tipo != 'AFD':
             raise ValueError("Solo se puede minimizar un AFD.")
 
         estados = list(self.estados.values())
-        simbolos = set()
-        for estado in estados:
-            simbolos.update(estado.transiciones.keys())
+        # Se trabaja con clases de caracteres equivalentes en lugar de etiquetas
+        particion = self.particion()
+        clases = range(len(particion))
 
         finales = {estado for estado in estados if estado.es_final}
         no_finales = {estado for estado in estados if not estado.es_final}
         particiones = [finales, no_finales] if finales and no_finales else [finales or no_finales]
 
+        # Los destinos no cambian entre refinamientos: se calculan una sola vez
+        destinos_por_estado = {
+            estado: tuple(self._destino_clase(estado, clase) for clase in clases)
+            for estado in estados
+        }
+
         while True:
+            grupo_de = {estado: i for i, grupo in enumerate(particiones) for estado in grupo}
             nuevas_particiones = []
             for grupo in particiones:
                 subgrupos = {}
                 for estado in grupo:
-                    clave = tuple(
-                        next(
-                            (i for i, g in enumerate(particiones) if estado.transiciones.get(simbolo, [None])[0] in g),
-                            -1
-                        )
-                        for simbolo in simbolos
-                    )
+                    clave = tuple(grupo_de.get(destino, -1) for destino in destinos_por_estado[estado])
                     subgrupos.setdefault(clave, set()).add(estado)
                 nuevas_particiones.extend(subgrupos.values())
             if nuevas_particiones == particiones:
@@ -208,14 +430,12 @@ class Automata:
 
         for grupo in particiones:
             representante = next(iter(grupo))
-            for simbolo in simbolos:
-                destino = representante.transiciones.get(simbolo, [None])[0]
+            destinos = {}
+            for clase in clases:
+                destino = self._destino_clase(representante, clase)
                 if destino and destino in estado_mapeo:
-                    nuevo_automata.agregar_transicion(
-                        estado_mapeo[representante], 
-                        simbolo, 
-                        estado_mapeo[destino]
-                    )
+                    destinos[clase] = estado_mapeo[destino]
+            nuevo_automata._agregar_transiciones_clases(estado_mapeo[representante], destinos, particion)
 
         nuevo_automata.estado_inicial = nuevo_automata.estados[estado_mapeo[self.estado_inicial]]
         return nuevo_automata
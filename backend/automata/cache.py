@@ -1,15 +1,32 @@
 """
 Módulo para gestionar caché en la aplicación.
 """
+from collections import OrderedDict
 from functools import lru_cache
 import time
 
+from .compiled_store import compiled_store
+from .config import COMPILED_CACHE_MAX_ENTRIES
+from .minimization import minimizer_cache
+from .result_cache import result_cache
+from .utils import logger
+
+def _key(automata_id):
+    """
+    Los ids llegan como int o como str según la petición: se normalizan a str.
+    No tienen por qué ser de un autómata guardado (el editor envía los suyos).
+    """
+    return str(automata_id)
+
+
 class CacheManager:
     """Gestiona diferentes tipos de caché para la aplicación."""
     
     def __init__(self):
         self.transition_cache = {}
-        self.validation_cache = {}
+        self.compiled_cache = OrderedDict()
+        # Se incrementa al invalidar un autómata (ver set_compiled)
+        self.generations = {}
         self.last_cleanup = time.time()
     
     def get_transition(self, state, symbol):
@@ -22,31 +39,78 @@ class CacheManager:
         key = (state, symbol)
         self.transition_cache[key] = target_states
     
-    def get_validation_result(self, automata_id, input_string):
-        """Obtiene un resultado de validación de la caché."""
-        key = (automata_id, input_string)
-        result, timestamp = self.validation_cache.get(key, (None, 0))
-        
-        # Invalidar si la caché es muy antigua (30 minutos)
-        if time.time() - timestamp > 1800:
+    def get_compiled(self, automata_id, version=None):
+        """
+        Obtiene la tabla compilada (AFDCompilado) de un autómata guardado. Con
+        el almacén de ficheros activo es una AFDMapeado de solo lectura,
+        compartida con los demás procesos. Si se indica ``version`` (la de la
+        fila guardada), no se devuelve una tabla compilada desde otra versión:
+        otro proceso pudo escribirla con una fila que ya cambió.
+        """
+        automata_id = _key(automata_id)
+        if compiled_store.enabled():
+            compiled = compiled_store.get(automata_id)
+        else:
+            compiled = self.compiled_cache.get(automata_id)
+            if compiled is not None:
+                self.compiled_cache.move_to_end(automata_id)
+        if compiled is not None and version is not None and compiled.version_bd != version:
             return None
-        return result
+        return compiled
+    
+    def set_compiled(self, automata_id, compiled, generation=None):
+        """
+        Guarda la tabla compilada de un autómata guardado. Si se indica
+        ``generation`` (de ``get_generation``, leída antes de cargar el
+        autómata), no se guarda si el autómata se invalidó desde entonces.
+        """
+        automata_id = _key(automata_id)
+        if generation is not None and generation != self.get_generation(automata_id):
+            return
+        if compiled_store.enabled():
+            try:
+                compiled_store.put(automata_id, compiled)
+                return
+            except OSError as e:
+                logger.warning(f"No se pudo guardar la tabla compilada de {automata_id}: {str(e)}")
+        self.compiled_cache[automata_id] = compiled
+        self.compiled_cache.move_to_end(automata_id)
+        self._prune_compiled()
+    
+    def _prune_compiled(self):
+        while len(self.compiled_cache) > COMPILED_CACHE_MAX_ENTRIES:
+            self.compiled_cache.popitem(last=False)
     
-    def set_validation_result(self, automata_id, input_string, result):
-        """Guarda un resultado de validación en la caché."""
-        key = (automata_id, input_string)
-        self.validation_cache[key] = (result, time.time())
+    def discard_compiled(self, automata_id):
+        """Descarta la tabla compilada de un autómata, en este proceso y en el almacén."""
+        automata_id = _key(automata_id)
+        self.compiled_cache.pop(automata_id, None)
+        if compiled_store.enabled():
+            compiled_store.discard(automata_id)
+    
+    def get_generation(self, automata_id):
+        return self.generations.get(_key(automata_id), 0)
+    
+    def invalidate_automata(self, automata_id):
+        """Descarta todo lo derivado de un autómata guardado."""
+        automata_id = _key(automata_id)
+        self.generations[automata_id] = self.get_generation(automata_id) + 1
+        self.discard_compiled(automata_id)
+        minimizer_cache.discard(automata_id)
+    
+    def clear(self):
+        """Vacía todas las cachés."""
+        self.transition_cache.clear()
+        self.compiled_cache.clear()
+        compiled_store.forget()
+        minimizer_cache.clear()
+        result_cache.clear()
     
     def cleanup(self, force=False):
         """Limpia entradas antiguas de la caché."""
         if force or (time.time() - self.last_cleanup > 3600):  # Limpiar cada hora
             now = time.time()
-            
-            # Limpiar caché de validación
-            self.validation_cache = {
-                k: v for k, v in self.validation_cache.items()
-                if now - v[1] <= 1800  # Mantener solo entradas de los últimos 30 min
-            }
+            self._prune_compiled()
             
             self.last_cleanup = now
 
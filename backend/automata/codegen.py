@@ -0,0 +1,375 @@
+"""
+Reconocedores generados: código Python especializado para un AFD concreto.
+
+``AFDCompilado.aceptar`` interpreta la tabla: por cada carácter busca la
+columna, indexa la fila y comprueba SIN_TRANSICION. Para los AFD con mucho
+tráfico se genera una función propia de una de estas dos formas:
+
+- ``saltos``: cada estado tiene un diccionario de trozos de hasta K
+  caracteres al estado en que terminan, así que el bucle avanza K caracteres
+  por búsqueda. K es el mayor que cabe en ``max_entries`` entradas. Con clases
+  de símbolos la cadena se traduce antes a columnas con ``str.translate`` (en C);
+- ``rachas``: una rama por estado. Las transiciones del estado a sí mismo se
+  consumen de una vez con una clase de caracteres de ``re`` (``[...]*`` desde
+  la posición actual) y la de salida es una comparación o un diccionario.
+
+En las dos, los estados desde los que no se llega a un final no existen:
+entrar en uno rechaza la cadena en ese momento. Cuál es más rápida depende de
+las cadenas (``rachas`` gana con rachas largas en un mismo estado), así que se
+mide con las primeras validaciones reales y se conserva la mejor.
+
+No se traduce el AFD entero a una expresión regular: la eliminación de
+estados puede dar una expresión exponencial en el número de estados y el
+motor de ``re`` hace vuelta atrás, así que cada expresión se limita a una
+clase de caracteres repetida, que se reconoce en tiempo lineal.
+
+Los reconocedores se guardan por huella de la tabla, de modo que una tabla
+recompilada o proyectada de nuevo (ver compiled_store.py) reutiliza el suyo.
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from .compiled import AFDCompilado
+from .config import CODEGEN
+from .utils import logger
+
+Reconocedor = Callable[[str], bool]
+
+ESTRATEGIAS = ('saltos', 'rachas')
+
+# Longitud máxima de los trozos de ``saltos``
+_MAX_SALTO = 16
+# Las clases con más caracteres se buscan por intervalos en lugar de enumerarse
+_MAX_CARACTERES_ENUMERADOS = 256
+# Caracteres distintos fuera de la tabla de traducción que se memorizan
+_MAX_TRADUCCIONES_MEMORIZADAS = 65536
+# Cadenas aleatorias con las que se comprueba cada reconocedor generado
+_CADENAS_VERIFICACION = 64
+
+
+def get_codegen_setting(name):
+    return getattr(settings, 'AUTOMATA_CODEGEN', {}).get(name, CODEGEN[name])
+
+
+def huella_tabla(compilado: AFDCompilado) -> str:
+    """SHA-256 de lo que determina el lenguaje de la tabla (no los nombres de los estados)."""
+    contenido = json.dumps(
+        [compilado.simbolos, [list(fila) for fila in compilado.tabla], [bool(f) for f in compilado.finales],
+         compilado.inicial],
+        ensure_ascii=False, separators=(',', ':')
+    )
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+class _Traduccion(dict):
+    """
+    Tabla de ``str.translate`` para ``saltos`` con clases de símbolos:
+    código de carácter -> carácter de su columna
+    (``chr(columna)``; ``chr(len(simbolos))`` si ninguna lo acepta). Los
+    caracteres de clases grandes se buscan por intervalos la primera vez.
+    """
+
+    def __init__(self, compilado: AFDCompilado):
+        super().__init__()
+        self.inicios, self.intervalos = compilado._obtener_intervalos()
+        self.ninguna = chr(len(compilado.simbolos))
+        for simbolo, columna in compilado.indice_simbolo.items():
+            self[ord(simbolo)] = chr(columna) if columna >= 0 else self.ninguna
+
+    def __missing__(self, codigo: int) -> str:
+        indice = bisect_right(self.inicios, codigo) - 1
+        traduccion = self.ninguna
+        if indice >= 0 and self.intervalos[indice][1] >= codigo:
+            traduccion = chr(self.intervalos[indice][2])
+        if len(self) < _MAX_TRADUCCIONES_MEMORIZADAS:
+            self[codigo] = traduccion
+        return traduccion
+
+
+def _estados_vivos(compilado: AFDCompilado) -> Tuple[List[int], Dict[int, int]]:
+    """Estados útiles numerados en BFS desde el inicial, y el número de cada uno."""
+    utiles = compilado._estados_utiles()
+    if compilado.inicial not in utiles:
+        return [], {}
+    numero = {compilado.inicial: 0}
+    orden = [compilado.inicial]
+    for estado in orden:
+        for destino in compilado.tabla[estado]:
+            if destino in utiles and destino not in numero:
+                numero[destino] = len(orden)
+                orden.append(destino)
+    return orden, numero
+
+
+def _clase_re(rangos) -> str:
+    """Clase de caracteres de ``re`` que acepta exactamente los rangos."""
+    partes = []
+    for inicio, fin in rangos:
+        partes.append('\\U%08x' % inicio if inicio == fin else '\\U%08x-\\U%08x' % (inicio, fin))
+    return '[' + ''.join(partes) + ']'
+
+
+def _buscar_por_intervalos(intervalos) -> Callable[[int], int]:
+    """Destino de un código de carácter según intervalos (inicio, fin, destino) disjuntos, o -1."""
+    intervalos = sorted(intervalos)
+    inicios = [i[0] for i in intervalos]
+
+    def buscar(codigo: int) -> int:
+        indice = bisect_right(inicios, codigo) - 1
+        if indice >= 0 and intervalos[indice][1] >= codigo:
+            return intervalos[indice][2]
+        return -1
+
+    return buscar
+
+
+def _despacho(estados: List[int], cuerpos: Dict[int, List[str]], sangria: str) -> List[str]:
+    """Árbol de comparaciones sobre ``e`` que lleva al cuerpo de cada estado."""
+    if len(estados) == 1:
+        return [sangria + linea for linea in cuerpos[estados[0]]]
+    medio = len(estados) // 2
+    return ([f'{sangria}if e < {estados[medio]}:']
+            + _despacho(estados[:medio], cuerpos, sangria + '    ')
+            + [f'{sangria}else:']
+            + _despacho(estados[medio:], cuerpos, sangria + '    '))
+
+
+def _fuente_rachas(compilado: AFDCompilado, orden: List[int], numero: Dict[int, int]):
+    entorno = {}
+    cuerpos: Dict[int, List[str]] = {}
+    for e, estado in enumerate(orden):
+        bucle = []
+        salidas: Dict[str, int] = {}
+        intervalos = []
+        for columna, destino in enumerate(compilado.tabla[estado]):
+            if destino not in numero:
+                continue
+            rangos = compilado.rangos[columna]
+            if destino == estado:
+                bucle.extend(rangos)
+            elif compilado.tamanos[columna] <= _MAX_CARACTERES_ENUMERADOS:
+                for inicio, fin in rangos:
+                    for codigo in range(inicio, fin + 1):
+                        salidas[chr(codigo)] = numero[destino]
+            else:
+                intervalos.extend((inicio, fin, numero[destino]) for inicio, fin in rangos)
+
+        cuerpo = []
+        if bucle:
+            entorno[f'_bucle{e}'] = re.compile(_clase_re(sorted(bucle)) + '*').match
+            cuerpo.append(f'i = _bucle{e}(cadena, i).end()')
+        cuerpo.append(f'if i == n: return {bool(compilado.finales[estado])}')
+        if not salidas and not intervalos:
+            cuerpo.append('return False')
+            cuerpos[e] = cuerpo
+            continue
+        if len(salidas) == 1 and not intervalos:
+            (caracter, destino), = salidas.items()
+            cuerpo += [f'if cadena[i] != {caracter!r}: return False', f'e = {destino}']
+        elif not intervalos:
+            entorno[f'_salida{e}'] = salidas.get
+            cuerpo += [f'e = _salida{e}(cadena[i], -1)', 'if e < 0: return False']
+        else:
+            entorno[f'_salida{e}'] = salidas.get
+            entorno[f'_intervalos{e}'] = _buscar_por_intervalos(intervalos)
+            cuerpo += [
+                'c = cadena[i]',
+                f'e = _salida{e}(c, -1)',
+                f'if e < 0: e = _intervalos{e}(ord(c))',
+                'if e < 0: return False',
+            ]
+        cuerpos[e] = cuerpo + ['i += 1']
+
+    lineas = ['def aceptar(cadena):', '    n = len(cadena)', '    i = 0', '    e = 0', '    while True:']
+    lineas += _despacho(list(range(len(orden))), cuerpos, '        ')
+    return '\n'.join(lineas) + '\n', entorno
+
+
+def _fuente_saltos(compilado: AFDCompilado, orden: List[int], numero: Dict[int, int], max_entradas: int):
+    # Sin clases cada carácter es su columna y no hace falta traducir
+    traducir = compilado.tiene_clases
+    salidas = [
+        {(chr(columna) if traducir else compilado.simbolos[columna]): numero[destino]
+         for columna, destino in enumerate(compilado.tabla[estado]) if destino in numero}
+        for estado in orden
+    ]
+    # trozos[e]: trozo de columnas -> estado al que lleva desde e. Se añaden
+    # niveles (trozos una columna más largos) mientras quepan en max_entradas
+    trozos = [dict(s) for s in salidas]
+    nivel = [list(s.items()) for s in salidas]
+    total = sum(len(s) for s in salidas)
+    salto = 1
+    while salto < _MAX_SALTO:
+        tamano = sum(len(salidas[d]) for n in nivel for _, d in n)
+        if not tamano or total + tamano > max_entradas:
+            break
+        nivel = [[(trozo + c, d2) for trozo, d in n for c, d2 in salidas[d].items()] for n in nivel]
+        for e, n in enumerate(nivel):
+            trozos[e].update(n)
+        total += tamano
+        salto += 1
+
+    entorno = {
+        '_filas': [t.get for t in trozos],
+        '_finales': [bool(compilado.finales[estado]) for estado in orden],
+    }
+    lineas = ['def aceptar(cadena):']
+    if traducir:
+        entorno['_traduccion'] = _Traduccion(compilado)
+        lineas.append('    cadena = cadena.translate(_traduccion)')
+    lineas += [
+        '    e = 0',
+        f'    for i in range(0, len(cadena), {salto}):',
+        f'        e = _filas[e](cadena[i:i + {salto}], -1)',
+        '        if e < 0: return False',
+        '    return _finales[e]',
+    ]
+    return '\n'.join(lineas) + '\n', entorno
+
+
+def generar_fuente(compilado: AFDCompilado, estrategia: str = 'saltos',
+                   max_entradas: Optional[int] = None) -> Tuple[str, dict]:
+    """
+    Código fuente de ``aceptar(cadena)`` para la tabla y los objetos
+    (traducción, expresiones, diccionarios y funciones) a los que hace referencia.
+    """
+    if estrategia not in ESTRATEGIAS:
+        raise ValueError(f"Estrategia desconocida: {estrategia}")
+    orden, numero = _estados_vivos(compilado)
+    if not orden:
+        return 'def aceptar(cadena):\n    return False\n', {}
+    if estrategia == 'rachas':
+        return _fuente_rachas(compilado, orden, numero)
+    if max_entradas is None:
+        max_entradas = get_codegen_setting('max_entries')
+    return _fuente_saltos(compilado, orden, numero, max_entradas)
+
+
+def generar_reconocedor(compilado: AFDCompilado, estrategia: str = 'saltos',
+                        max_entradas: Optional[int] = None) -> Reconocedor:
+    """Compila el código generado para la tabla y devuelve la función."""
+    fuente, entorno = generar_fuente(compilado, estrategia, max_entradas)
+    exec(compile(fuente, f'<reconocedor {estrategia}>', 'exec'), entorno)
+    return entorno['aceptar']
+
+
+def _cadenas_verificacion(compilado: AFDCompilado, cantidad: int, semilla: int = 0) -> List[str]:
+    """Cadenas aleatorias con caracteres de la tabla (y alguno fuera de ella)."""
+    aleatorio = random.Random(semilla)
+    intervalos = compilado._obtener_intervalos()[1]
+    cadenas = []
+    for _ in range(cantidad):
+        caracteres = []
+        for _ in range(aleatorio.randrange(2 * len(compilado.tabla) + 2)):
+            if intervalos and aleatorio.random() < 0.95:
+                inicio, fin, _ = aleatorio.choice(intervalos)
+                caracteres.append(chr(aleatorio.randint(inicio, fin)))
+            else:
+                caracteres.append(chr(aleatorio.randrange(0x250)))
+        cadenas.append(''.join(caracteres))
+    return cadenas
+
+
+class _Calibracion:
+    """
+    Alterna las estrategias en las primeras validaciones, mide cuánto tarda
+    cada una y a partir de ahí usa solo la más rápida (``elegido``).
+    """
+
+    def __init__(self, candidatos: Dict[str, Reconocedor], llamadas: int):
+        self.candidatos = list(candidatos.items())
+        self.tiempos = [0.0] * len(self.candidatos)
+        self.restantes = llamadas * len(self.candidatos)
+        self.elegido: Optional[Reconocedor] = None
+        self.estrategia: Optional[str] = None
+
+    def __call__(self, cadena: str) -> bool:
+        if self.elegido is not None:
+            return self.elegido(cadena)
+        indice = self.restantes % len(self.candidatos)
+        inicio = time.perf_counter()
+        resultado = self.candidatos[indice][1](cadena)
+        self.tiempos[indice] += time.perf_counter() - inicio
+        self.restantes -= 1
+        if self.restantes <= 0:
+            mejor = min(range(len(self.candidatos)), key=self.tiempos.__getitem__)
+            self.estrategia, self.elegido = self.candidatos[mejor]
+        return resultado
+
+
+class MatcherCache:
+    """
+    Reconocedores generados por huella de tabla, con expulsión LRU. Se
+    generan solo para las tablas que llegan a ``min_requests`` validaciones
+    en este proceso y no superan ``max_states`` estados.
+    """
+
+    def __init__(self):
+        self._reconocedores: 'OrderedDict[str, _Calibracion]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def enabled(self) -> bool:
+        return bool(get_codegen_setting('enabled'))
+
+    def get(self, compilado: AFDCompilado) -> _Calibracion:
+        """Reconocedor de la tabla, generándolo (y comprobándolo) si no está guardado."""
+        huella = huella_tabla(compilado)
+        with self._lock:
+            reconocedor = self._reconocedores.get(huella)
+            if reconocedor is not None:
+                self._reconocedores.move_to_end(huella)
+                return reconocedor
+
+        candidatos = {estrategia: generar_reconocedor(compilado, estrategia) for estrategia in ESTRATEGIAS}
+        for cadena in _cadenas_verificacion(compilado, _CADENAS_VERIFICACION):
+            esperado = compilado.aceptar(cadena)
+            for estrategia, candidato in candidatos.items():
+                if candidato(cadena) != esperado:
+                    raise ValueError(f"El reconocedor '{estrategia}' difiere de la tabla en {cadena!r}")
+        reconocedor = _Calibracion(candidatos, get_codegen_setting('calibration_requests'))
+
+        with self._lock:
+            reconocedor = self._reconocedores.setdefault(huella, reconocedor)
+            while len(self._reconocedores) > get_codegen_setting('cache_size'):
+                self._reconocedores.popitem(last=False)
+        return reconocedor
+
+    def aceptar(self, compilado: AFDCompilado, cadena: str) -> bool:
+        """
+        Valida con el reconocedor generado si la tabla ya tiene tráfico
+        suficiente, o con ``compilado.aceptar`` mientras tanto.
+        """
+        reconocedor = compilado._reconocedor
+        if reconocedor is None and self.enabled():
+            compilado._usos += 1
+            if compilado._usos >= get_codegen_setting('min_requests'):
+                reconocedor = False
+                if len(compilado.tabla) <= get_codegen_setting('max_states'):
+                    try:
+                        reconocedor = self.get(compilado)
+                    except (ValueError, RecursionError, SyntaxError, MemoryError) as e:
+                        logger.error(f"No se pudo generar el reconocedor: {str(e)}")
+                compilado._reconocedor = reconocedor
+        if not reconocedor:
+            return compilado.aceptar(cadena)
+        if isinstance(reconocedor, _Calibracion):
+            if reconocedor.elegido is not None:
+                compilado._reconocedor = reconocedor.elegido
+            return reconocedor(cadena)
+        return reconocedor(cadena)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reconocedores.clear()
+
+
+matcher_cache = MatcherCache()
@@ -0,0 +1,542 @@
+"""
+Representación compilada (tabular) de autómatas deterministas.
+"""
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional: sin él se usa el recorrido en Python puro
+    np = None
+
+from .prefixes import recorrer_por_prefijos
+from .symbols import rangos_de
+
+# Valor de la tabla para "no hay transición"
+SIN_TRANSICION = -1
+
+# Por debajo de este código de carácter, aceptar_lote traduce con una tabla directa
+_MAX_TRADUCCION_DIRECTA = 0x10000
+
+
+class AFDCompilado:
+    """
+    AFD con estados y símbolos indexados por enteros.
+
+    La tabla de transiciones es una lista de filas (una por estado) con una
+    columna por clase de caracteres equivalentes (un solo carácter si no hay
+    etiquetas con clases); SIN_TRANSICION indica que la cadena se rechaza.
+    Las etiquetas opacas no se compilan: ``Automata.validar_cadena`` nunca
+    puede consumirlas.
+    """
+
+    def __init__(self, nombres: List[str], simbolos: List[str], tabla: List[List[int]],
+                 finales: List[bool], inicial: int):
+        self.nombres = nombres
+        self.simbolos = simbolos
+        self.tabla = tabla
+        self.finales = finales
+        self.inicial = inicial
+        self.indice_estado: Dict[str, int] = {nombre: i for i, nombre in enumerate(nombres)}
+        # Versión de la fila guardada desde la que se compiló (ver
+        # AutomataModel.version), o None si viene de los datos de una petición:
+        # solo en el primer caso se puede derivar de ella lo que se guarda
+        self.version_bd: Optional[int] = None
+        self._preparar_simbolos()
+
+    def _preparar_simbolos(self) -> None:
+        """Estructuras derivadas de ``simbolos`` para traducir caracteres a columnas."""
+        # Carácter -> columna; con clases se completa bajo demanda (-1 = ninguna)
+        self.indice_simbolo: Dict[str, int] = {
+            simbolo: i for i, simbolo in enumerate(self.simbolos) if len(simbolo) == 1
+        }
+        self.rangos = [rangos_de(simbolo) for simbolo in self.simbolos]
+        self.tamanos = [sum(fin - inicio + 1 for inicio, fin in r) for r in self.rangos]
+        self.tiene_clases = any(len(simbolo) > 1 for simbolo in self.simbolos)
+        self._intervalos = None
+        self._arrays = None
+        # Reconocedor generado (ver codegen.py): None hasta decidirlo, False si no se usa
+        self._reconocedor = None
+        self._usos = 0
+        # Huella del lenguaje para la caché de resultados (ver result_cache.py)
+        self._huella_lenguaje = None
+
+    @property
+    def vectorizado(self) -> bool:
+        """Indica si ``aceptar_lote`` usa numpy."""
+        return np is not None
+
+    @classmethod
+    def desde_automata(cls, automata) -> 'AFDCompilado':
+        """Compila un ``Automata`` determinista."""
+        if not automata.estado_inicial:
+            raise ValueError("No hay estado inicial definido")
+        if not automata.es_deterministico():
+            raise ValueError("Solo se puede compilar un AFD.")
+
+        nombres = list(automata.estados)
+        particion = automata.particion()
+        clases = range(particion.num_clases_caracter)
+        simbolos = [particion.etiqueta([clase]) for clase in clases]
+        indice_estado = {nombre: i for i, nombre in enumerate(nombres)}
+
+        tabla = []
+        for estado in automata.estados.values():
+            fila = []
+            for clase in clases:
+                destino = automata._destino_clase(estado, clase)
+                fila.append(indice_estado[destino.nombre] if destino else SIN_TRANSICION)
+            tabla.append(fila)
+
+        finales = [estado.es_final for estado in automata.estados.values()]
+        return cls(nombres, simbolos, tabla, finales, indice_estado[automata.estado_inicial.nombre])
+
+    def aceptar(self, cadena: str) -> bool:
+        """Valida una cadena recorriendo la tabla."""
+        actual = self.inicial
+        tabla = self.tabla
+        indice_simbolo = self.indice_simbolo
+        for simbolo in cadena:
+            columna = indice_simbolo.get(simbolo)
+            if columna is None:
+                columna = self._columna(simbolo)
+            if columna < 0:
+                return False
+            actual = tabla[actual][columna]
+            if actual == SIN_TRANSICION:
+                return False
+        return self.finales[actual]
+
+    def avanzar(self, estado: int, cadena: str) -> Tuple[int, int]:
+        """
+        Recorre ``cadena`` desde ``estado``. Devuelve el estado alcanzado y
+        ``len(cadena)``, o SIN_TRANSICION y la posición del primer carácter sin transición.
+        """
+        tabla = self.tabla
+        indice_simbolo = self.indice_simbolo
+        for posicion, simbolo in enumerate(cadena):
+            columna = indice_simbolo.get(simbolo)
+            if columna is None:
+                columna = self._columna(simbolo)
+            if columna < 0:
+                return SIN_TRANSICION, posicion
+            estado = tabla[estado][columna]
+            if estado == SIN_TRANSICION:
+                return SIN_TRANSICION, posicion
+        return estado, len(cadena)
+
+    def _columna(self, simbolo: str) -> int:
+        """Columna de un carácter que no está en ``indice_simbolo`` (-1 si ninguna lo acepta)."""
+        if not self.tiene_clases:
+            return -1
+        inicios, intervalos = self._obtener_intervalos()
+        codigo = ord(simbolo)
+        indice = bisect_right(inicios, codigo) - 1
+        columna = -1
+        if indice >= 0 and intervalos[indice][1] >= codigo:
+            columna = intervalos[indice][2]
+        self.indice_simbolo[simbolo] = columna
+        return columna
+
+    def _obtener_intervalos(self):
+        """Intervalos (inicio, fin, columna) ordenados por carácter, con sus inicios."""
+        if self._intervalos is None:
+            intervalos = sorted(
+                (inicio, fin, columna)
+                for columna, rangos in enumerate(self.rangos)
+                for inicio, fin in rangos
+            )
+            self._intervalos = ([i[0] for i in intervalos], intervalos)
+        return self._intervalos
+
+    def aceptar_lote(self, cadenas: Sequence[str]) -> List[bool]:
+        """
+        Valida muchas cadenas a la vez.
+
+        Con numpy, las cadenas se codifican en una matriz de enteros rellenada
+        hasta la longitud máxima y todas avanzan juntas una posición por paso.
+        La máscara de longitudes coloca cada carácter en su celda; el relleno
+        usa una columna identidad, de modo que no mueve a las cadenas cortas.
+        """
+        if np is None or not cadenas:
+            return [self.aceptar(cadena) for cadena in cadenas]
+
+        tabla, finales, traduccion = self._obtener_arrays()
+        ancho = len(self.simbolos) + 2
+        relleno = ancho - 1
+
+        longitudes = np.fromiter((len(c) for c in cadenas), dtype=np.int64, count=len(cadenas))
+        largo = int(longitudes.max())
+        actuales = np.full(len(cadenas), self.inicial, dtype=np.int64)
+        if largo == 0:
+            return finales[actuales].tolist()
+
+        # Todos los caracteres concatenados, traducidos a columnas de la tabla
+        puntos = np.frombuffer(''.join(cadenas).encode('utf-32-le'), dtype=np.uint32)
+        if isinstance(traduccion, tuple):
+            inicios, fines, columnas_intervalo = traduccion
+            indices = np.searchsorted(inicios, puntos, side='right') - 1
+            dentro = (indices >= 0) & (puntos <= fines[np.maximum(indices, 0)])
+            columnas = np.where(dentro, columnas_intervalo[np.maximum(indices, 0)], ancho - 2)
+        else:
+            columnas = traduccion[np.minimum(puntos, len(traduccion) - 1)]
+
+        # Una fila contigua por posición (cada paso lee memoria consecutiva);
+        # la máscara se aplica sobre la vista traspuesta, una fila por cadena
+        mascara = np.arange(largo) < longitudes[:, None]
+        matriz = np.full((largo, len(cadenas)), relleno, dtype=np.int32)
+        matriz.T[mascara] = columnas
+
+        sumidero = len(self.nombres)
+        for posicion in range(largo):
+            actuales = tabla[actuales * ancho + matriz[posicion]]
+            if posicion % 64 == 63 and not (actuales != sumidero).any():
+                break
+
+        return finales[actuales].tolist()
+
+    def aceptar_por_prefijos(self, cadenas: Sequence[str], orden: Optional[List[int]] = None,
+                             comunes: Optional[List[int]] = None) -> List[bool]:
+        """Valida muchas cadenas avanzando una vez por prefijo distinto (ver prefixes.py)."""
+        tabla = self.tabla
+        indice_simbolo = self.indice_simbolo
+
+        def paso(actual: int, simbolo: str) -> Optional[int]:
+            columna = indice_simbolo.get(simbolo)
+            if columna is None:
+                columna = self._columna(simbolo)
+            if columna < 0:
+                return None
+            destino = tabla[actual][columna]
+            return None if destino == SIN_TRANSICION else destino
+
+        return recorrer_por_prefijos(cadenas, self.inicial, paso, self.finales.__getitem__, orden, comunes)
+
+    def _obtener_arrays(self):
+        """Construye (una sola vez) las tablas numpy usadas por ``aceptar_lote``."""
+        if self._arrays is None:
+            sumidero = len(self.nombres)
+            otro = len(self.simbolos)
+            # Fila extra para el sumidero, una columna para símbolos desconocidos
+            # y otra (identidad) para el relleno
+            tabla = np.full((sumidero + 1, otro + 2), sumidero, dtype=np.int64)
+            if self.simbolos and sumidero:
+                datos = self._tabla_numpy()
+                tabla[:sumidero, :otro] = np.where(datos == SIN_TRANSICION, sumidero, datos)
+            tabla[:, otro + 1] = np.arange(sumidero + 1)
+            finales = np.array(list(self.finales) + [False], dtype=bool)
+
+            # Código de carácter -> columna: tabla directa (el último elemento
+            # atrapa los desconocidos) o, con rangos muy altos, búsqueda binaria
+            _, intervalos = self._obtener_intervalos()
+            maximo = max((fin for _, fin, _ in intervalos), default=-1)
+            if maximo < _MAX_TRADUCCION_DIRECTA:
+                traduccion = np.full(maximo + 2, otro, dtype=np.int32)
+                for inicio, fin, columna in intervalos:
+                    traduccion[inicio:fin + 1] = columna
+            else:
+                traduccion = tuple(
+                    np.array([i[k] for i in intervalos], dtype=np.int64) for k in range(3)
+                )
+            self._arrays = (tabla.ravel(), finales, traduccion)
+        return self._arrays
+
+    def _tabla_numpy(self):
+        return np.array(self.tabla, dtype=np.int64).reshape(len(self.nombres), len(self.simbolos))
+
+    def contar_por_longitud(self, longitud_max: int) -> List[int]:
+        """
+        Cuenta las cadenas aceptadas de cada longitud entre 0 y ``longitud_max``.
+
+        Programación dinámica sobre la tabla: ``conteos[e]`` es el número de
+        cadenas de la longitud actual que llevan del estado inicial a ``e``.
+        """
+        conteos = [0] * len(self.nombres)
+        conteos[self.inicial] = 1
+        resultado = []
+
+        for longitud in range(longitud_max + 1):
+            resultado.append(sum(c for c, final in zip(conteos, self.finales) if final))
+            if longitud == longitud_max:
+                break
+
+            nuevos = [0] * len(self.nombres)
+            for estado, conteo in enumerate(conteos):
+                if conteo:
+                    for columna, destino in enumerate(self.tabla[estado]):
+                        if destino != SIN_TRANSICION:
+                            nuevos[destino] += conteo * self.tamanos[columna]
+            conteos = nuevos
+
+        return resultado
+
+    def contar_longitud(self, longitud: int) -> int:
+        """
+        Cuenta las cadenas aceptadas de exactamente ``longitud`` símbolos.
+
+        Usa exponenciación de la matriz de adyacencia restringida a los estados
+        útiles, así que el coste es logarítmico en la longitud.
+        """
+        utiles = sorted(self._estados_utiles())
+        if self.inicial not in utiles:
+            return 0
+
+        posicion = {estado: i for i, estado in enumerate(utiles)}
+        tamano = len(utiles)
+        matriz = [[0] * tamano for _ in range(tamano)]
+        for estado in utiles:
+            for columna, destino in enumerate(self.tabla[estado]):
+                if destino in posicion:
+                    matriz[posicion[estado]][posicion[destino]] += self.tamanos[columna]
+
+        vector = [0] * tamano
+        vector[posicion[self.inicial]] = 1
+        while longitud:
+            if longitud & 1:
+                vector = _vector_por_matriz(vector, matriz)
+            longitud >>= 1
+            if longitud:
+                matriz = _matriz_por_matriz(matriz, matriz)
+
+        return sum(vector[posicion[e]] for e in utiles if self.finales[e])
+
+    def enumerar_aceptadas(self, longitud_max: Optional[int] = None) -> Iterator[str]:
+        """
+        Genera las cadenas aceptadas en orden shortlex (por longitud y luego
+        alfabéticamente), de forma perezosa.
+
+        Solo se extienden prefijos desde los que aún se alcanza un estado final
+        con los símbolos restantes, por lo que no se exploran ramas muertas.
+        Sin ``longitud_max`` el generador termina solo si el lenguaje es finito.
+        """
+        if longitud_max is None and not self._lenguaje_infinito():
+            # Un lenguaje finito no contiene cadenas tan largas como su número de estados
+            longitud_max = len(self.nombres) - 1
+
+        # vivos[r][e]: desde e se llega a un estado final en exactamente r pasos
+        vivos = [list(self.finales)]
+        longitud = 0
+        while longitud_max is None or longitud <= longitud_max:
+            if longitud:
+                anteriores = vivos[-1]
+                vivos.append([
+                    any(d != SIN_TRANSICION and anteriores[d] for d in fila)
+                    for fila in self.tabla
+                ])
+            if vivos[longitud][self.inicial]:
+                yield from self._enumerar_longitud(longitud, vivos)
+            longitud += 1
+
+    def _enumerar_longitud(self, longitud: int, vivos: List[List[bool]]) -> Iterator[str]:
+        """Recorre en profundidad, en orden alfabético, las cadenas aceptadas de una longitud."""
+        if not longitud:
+            yield ''
+            return
+
+        # Cada nivel de la pila genera sus hijos bajo demanda (una clase puede ser enorme)
+        pila = [('', self._sucesores(self.inicial, vivos[longitud - 1]))]
+        while pila:
+            prefijo, sucesores = pila[-1]
+            siguiente = next(sucesores, None)
+            if siguiente is None:
+                pila.pop()
+                continue
+
+            caracter, destino = siguiente
+            cadena = prefijo + caracter
+            restante = longitud - len(cadena)
+            if not restante:
+                yield cadena
+            else:
+                pila.append((cadena, self._sucesores(destino, vivos[restante - 1])))
+
+    def _sucesores(self, estado: int, vivos: List[bool]) -> Iterator[Tuple[str, int]]:
+        """Caracteres (en orden) que llevan de ``estado`` a un estado vivo, con su destino."""
+        fila = self.tabla[estado]
+        for inicio, fin, columna in self._obtener_intervalos()[1]:
+            destino = fila[columna]
+            if destino != SIN_TRANSICION and vivos[destino]:
+                for codigo in range(inicio, fin + 1):
+                    yield chr(codigo), destino
+
+    def _estados_utiles(self) -> set:
+        """Estados alcanzables desde el inicial y desde los que se llega a un final."""
+        alcanzables = {self.inicial}
+        pendientes = [self.inicial]
+        inversa: List[List[int]] = [[] for _ in self.nombres]
+        while pendientes:
+            estado = pendientes.pop()
+            for destino in self.tabla[estado]:
+                if destino == SIN_TRANSICION:
+                    continue
+                inversa[destino].append(estado)
+                if destino not in alcanzables:
+                    alcanzables.add(destino)
+                    pendientes.append(destino)
+
+        utiles = {e for e in alcanzables if self.finales[e]}
+        pendientes = list(utiles)
+        while pendientes:
+            estado = pendientes.pop()
+            for origen in inversa[estado]:
+                if origen not in utiles:
+                    utiles.add(origen)
+                    pendientes.append(origen)
+        return utiles
+
+    def _lenguaje_infinito(self) -> bool:
+        """Un lenguaje es infinito si hay un ciclo entre estados útiles."""
+        utiles = self._estados_utiles()
+        # 0 = sin visitar, 1 = en la pila, 2 = terminado
+        color = dict.fromkeys(utiles, 0)
+        for raiz in utiles:
+            if color[raiz]:
+                continue
+            color[raiz] = 1
+            pila = [(raiz, iter(self.tabla[raiz]))]
+            while pila:
+                estado, destinos = pila[-1]
+                for destino in destinos:
+                    if destino not in color:
+                        continue
+                    if color[destino] == 1:
+                        return True
+                    if color[destino] == 0:
+                        color[destino] = 1
+                        pila.append((destino, iter(self.tabla[destino])))
+                        break
+                else:
+                    color[estado] = 2
+                    pila.pop()
+        return False
+
+    def minimizar(self) -> 'AFDCompilado':
+        """
+        AFD mínimo equivalente, sin estados inútiles (el lenguaje vacío queda
+        como un único estado no final). Refinamiento de Moore sobre la tabla:
+        cada ronda separa los estados cuyas filas llevan a bloques distintos.
+        """
+        utiles = sorted(self._estados_utiles())
+        if not utiles:
+            return AFDCompilado(['Q0'], list(self.simbolos), [[SIN_TRANSICION] * len(self.simbolos)], [False], 0)
+
+        bloque = {estado: int(self.finales[estado]) for estado in utiles}
+        numero = len(set(bloque.values()))
+        while True:
+            firmas = {
+                estado: (bloque[estado],) + tuple(bloque.get(d, -1) for d in self.tabla[estado])
+                for estado in utiles
+            }
+            orden: Dict[tuple, int] = {}
+            for estado in utiles:
+                orden.setdefault(firmas[estado], len(orden))
+            bloque = {estado: orden[firmas[estado]] for estado in utiles}
+            if len(orden) == numero:
+                break
+            numero = len(orden)
+
+        tabla: List[List[int]] = [[] for _ in range(numero)]
+        finales = [False] * numero
+        for estado in utiles:
+            b = bloque[estado]
+            if not tabla[b]:
+                tabla[b] = [bloque.get(d, SIN_TRANSICION) for d in self.tabla[estado]]
+                finales[b] = self.finales[estado]
+        nombres = [f"Q{i}" for i in range(numero)]
+        return AFDCompilado(nombres, list(self.simbolos), tabla, finales, bloque[self.inicial])
+
+    # Edición incremental. Los índices existentes nunca cambian: un estado
+    # eliminado queda como una fila sin transiciones y no final.
+
+    def agregar_estado(self, nombre: str, es_final: bool = False) -> int:
+        """Añade un estado sin transiciones y devuelve su índice."""
+        if nombre in self.indice_estado:
+            raise ValueError(f"El estado '{nombre}' ya existe")
+        indice = len(self.nombres)
+        self.nombres.append(nombre)
+        self.indice_estado[nombre] = indice
+        self.tabla.append([SIN_TRANSICION] * len(self.simbolos))
+        self.finales.append(es_final)
+        self.invalidar_arrays()
+        return indice
+
+    def eliminar_estado(self, nombre: str) -> None:
+        """
+        Elimina un estado vaciando su fila. Las transiciones que llegan a él
+        deben eliminarse aparte; mientras tanto se comporta como un estado muerto.
+        """
+        indice = self._indice(nombre)
+        if indice == self.inicial:
+            raise ValueError("No se puede eliminar el estado inicial")
+        del self.indice_estado[nombre]
+        self.tabla[indice] = [SIN_TRANSICION] * len(self.simbolos)
+        self.finales[indice] = False
+        self.invalidar_arrays()
+
+    def cambiar_final(self, nombre: str, es_final: bool) -> None:
+        self.finales[self._indice(nombre)] = es_final
+        self.invalidar_arrays()
+
+    def agregar_transicion(self, origen: str, simbolo: str, destino: str) -> None:
+        """
+        Añade (o reemplaza) una transición; un símbolo nuevo añade una columna.
+        Las clases de símbolos cambian la partición del alfabeto, así que en
+        ese caso hay que recompilar.
+        """
+        if self.tiene_clases or (len(simbolo) != 1 and rangos_de(simbolo) is not None):
+            raise ValueError("Las clases de símbolos requieren recompilar el autómata")
+        if len(simbolo) != 1:
+            return
+        fila = self.tabla[self._indice(origen)]
+        indice_destino = self._indice(destino)
+        columna = self.indice_simbolo.get(simbolo)
+        if columna is None:
+            columna = len(self.simbolos)
+            self.simbolos.append(simbolo)
+            self.indice_simbolo[simbolo] = columna
+            self.rangos.append([(ord(simbolo), ord(simbolo))])
+            self.tamanos.append(1)
+            for otra_fila in self.tabla:
+                otra_fila.append(SIN_TRANSICION)
+        fila[columna] = indice_destino
+        self.invalidar_arrays()
+
+    def eliminar_transicion(self, origen: str, simbolo: str) -> None:
+        if self.tiene_clases:
+            raise ValueError("Las clases de símbolos requieren recompilar el autómata")
+        columna = self.indice_simbolo.get(simbolo)
+        if columna is not None:
+            self.tabla[self._indice(origen)][columna] = SIN_TRANSICION
+            self.invalidar_arrays()
+
+    def _indice(self, nombre: str) -> int:
+        if nombre not in self.indice_estado:
+            raise ValueError(f"El estado '{nombre}' no existe")
+        return self.indice_estado[nombre]
+
+    def invalidar_arrays(self) -> None:
+        """
+        Descarta las tablas numpy, los intervalos, el reconocedor generado y la
+        huella del lenguaje tras modificar la tabla.
+        """
+        self._arrays = None
+        self._intervalos = None
+        self._reconocedor = None
+        self._huella_lenguaje = None
+
+    def __repr__(self):
+        return f"AFDCompilado(estados={len(self.nombres)}, simbolos={len(self.simbolos)})"
+
+
+def _vector_por_matriz(vector: List[int], matriz: List[List[int]]) -> List[int]:
+    resultado = [0] * len(vector)
+    for i, valor in enumerate(vector):
+        if valor:
+            for j, peso in enumerate(matriz[i]):
+                if peso:
+                    resultado[j] += valor * peso
+    return resultado
+
+
+def _matriz_por_matriz(a: List[List[int]], b: List[List[int]]) -> List[List[int]]:
+    return [_vector_por_matriz(fila, b) for fila in a]
@@ -0,0 +1,326 @@
+"""
+Almacén en disco de tablas compiladas (AFDCompilado) proyectadas en memoria.
+
+Cada autómata guardado tiene un fichero binario que los procesos abren con
+mmap y leen sin copiarlo, así que varios trabajadores comparten las mismas
+páginas físicas en lugar de tener cada uno su copia de la tabla. Formato
+(little-endian):
+
+- cabecera: ``_CABECERA`` (magia, versión del formato, opciones (bit 0: hay
+  ``version_bd``), estados, columnas, estado inicial, tamaño de las dos
+  secciones JSON y versión de la fila guardada de la que se compiló)
+- símbolos de cada columna (JSON), rellenado hasta múltiplo de 4 bytes
+- tabla de transiciones: estados × columnas enteros de 32 bits, -1 sin transición
+- mapa de bits de los estados finales
+- nombres de los estados (JSON), solo para la edición y las trazas
+
+Un fichero nunca se modifica: al guardar se escribe uno nuevo y se
+sustituye con ``os.replace``. Los procesos que tenían proyectado el anterior
+siguen leyendo esa versión completa hasta que ven, por su identidad
+(inodo, fecha y tamaño), que el fichero cambió y proyectan el nuevo.
+
+Los ficheros se comparten entre procesos, así que un proceso puede escribir
+la tabla de una fila que otro acaba de cambiar: quien lee compara la versión
+de la cabecera con la de la fila (ver CacheManager.get_compiled).
+"""
+import atexit
+import json
+import mmap
+import os
+import re
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import uuid
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+from django.conf import settings
+
+from .compiled import SIN_TRANSICION, AFDCompilado, np
+from .config import COMPILED_STORE
+from .utils import logger
+
+MAGIA = b'AFDC'
+VERSION_FORMATO = 2
+# magia, versión, opciones, estados, columnas, inicial, bytes de símbolos, bytes de nombres, versión de la fila
+_CABECERA = '<4sHHIIiIIq'
+_TAMANO_CABECERA = struct.calcsize(_CABECERA)
+_CON_VERSION = 1
+_ID_VALIDO = re.compile(r'^[0-9]+$')
+
+
+def get_store_setting(name):
+    return getattr(settings, 'AUTOMATA_COMPILED_STORE', {}).get(name, COMPILED_STORE[name])
+
+
+def _alinear(posicion: int) -> int:
+    return (posicion + 3) & ~3
+
+
+def serializar(compilado: AFDCompilado) -> bytes:
+    """Contenido del fichero binario de una tabla compilada."""
+    simbolos = json.dumps(compilado.simbolos, ensure_ascii=False).encode('utf-8')
+    nombres = json.dumps(list(compilado.nombres), ensure_ascii=False).encode('utf-8')
+    num_estados = len(compilado.nombres)
+
+    tabla = array('i', (destino for fila in compilado.tabla for destino in fila))
+    if sys.byteorder == 'big':
+        tabla.byteswap()
+    finales = bytearray((num_estados + 7) // 8)
+    for i, es_final in enumerate(compilado.finales):
+        if es_final:
+            finales[i >> 3] |= 1 << (i & 7)
+
+    opciones = _CON_VERSION if compilado.version_bd is not None else 0
+    cabecera = struct.pack(_CABECERA, MAGIA, VERSION_FORMATO, opciones, num_estados, len(compilado.simbolos),
+                           compilado.inicial, len(simbolos), len(nombres), compilado.version_bd or 0)
+    relleno = bytes(_alinear(_TAMANO_CABECERA + len(simbolos)) - _TAMANO_CABECERA - len(simbolos))
+    return b''.join([cabecera, simbolos, relleno, tabla.tobytes(), bytes(finales), nombres])
+
+
+class _Filas:
+    """Vista de la tabla plana como lista de filas (sin copiar: cada fila es un memoryview)."""
+
+    def __init__(self, plana, num_estados: int, columnas: int):
+        self.plana = plana
+        self.num_estados = num_estados
+        self.columnas = columnas
+
+    def __len__(self):
+        return self.num_estados
+
+    def __getitem__(self, estado: int):
+        if not 0 <= estado < self.num_estados:
+            raise IndexError(estado)
+        return self.plana[estado * self.columnas:(estado + 1) * self.columnas]
+
+    def __iter__(self) -> Iterator:
+        return (self[estado] for estado in range(self.num_estados))
+
+
+class _Bits:
+    """Mapa de bits de los estados finales con la interfaz de una lista de bool."""
+
+    def __init__(self, datos, num_estados: int):
+        self.datos = datos
+        self.num_estados = num_estados
+
+    def __len__(self):
+        return self.num_estados
+
+    def __getitem__(self, estado: int) -> bool:
+        if not 0 <= estado < self.num_estados:
+            raise IndexError(estado)
+        return bool(self.datos[estado >> 3] >> (estado & 7) & 1)
+
+    def __iter__(self) -> Iterator[bool]:
+        return (self[estado] for estado in range(self.num_estados))
+
+
+class AFDMapeado(AFDCompilado):
+    """
+    AFDCompilado de solo lectura sobre un fichero proyectado en memoria. La
+    tabla y los finales se leen del fichero sin copiarlos; los nombres de los
+    estados se decodifican solo si se piden. Para editarlo, ``copia()``.
+    """
+
+    def __init__(self, ruta: str):
+        with open(ruta, 'rb') as f:
+            estado = os.fstat(f.fileno())
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # Identifica la versión proyectada (ver CompiledStore.get)
+        self.identidad = (estado.st_ino, estado.st_mtime_ns, estado.st_size)
+
+        if len(self._mmap) < _TAMANO_CABECERA:
+            raise ValueError(f"Fichero compilado truncado: {ruta}")
+        (magia, version, opciones, num_estados, columnas, inicial,
+         bytes_simbolos, bytes_nombres, version_bd) = struct.unpack_from(_CABECERA, self._mmap, 0)
+        if magia != MAGIA or version != VERSION_FORMATO:
+            raise ValueError(f"Formato de fichero compilado desconocido: {ruta}")
+        inicio_tabla = _alinear(_TAMANO_CABECERA + bytes_simbolos)
+        inicio_finales = inicio_tabla + 4 * num_estados * columnas
+        inicio_nombres = inicio_finales + (num_estados + 7) // 8
+        if inicio_nombres + bytes_nombres != len(self._mmap) or not 0 <= inicial < num_estados:
+            raise ValueError(f"Fichero compilado corrupto: {ruta}")
+
+        vista = memoryview(self._mmap)
+        if sys.byteorder == 'little':
+            plana = vista[inicio_tabla:inicio_finales].cast('i')
+        else:
+            plana = array('i', vista[inicio_tabla:inicio_finales])
+            plana.byteswap()
+        self._plana = plana
+        self._columnas = columnas
+        self._nombres_json = vista[inicio_nombres:]
+        self._nombres: Optional[List[str]] = None
+        self._indice_estado: Optional[Dict[str, int]] = None
+
+        self.simbolos = json.loads(bytes(vista[_TAMANO_CABECERA:_TAMANO_CABECERA + bytes_simbolos]))
+        self.tabla = _Filas(plana, num_estados, columnas)
+        self.finales = _Bits(vista[inicio_finales:inicio_nombres], num_estados)
+        self.inicial = inicial
+        self.version_bd = version_bd if opciones & _CON_VERSION else None
+        self._preparar_simbolos()
+
+    @property
+    def nombres(self) -> List[str]:
+        if self._nombres is None:
+            self._nombres = json.loads(bytes(self._nombres_json))
+        return self._nombres
+
+    @property
+    def indice_estado(self) -> Dict[str, int]:
+        if self._indice_estado is None:
+            self._indice_estado = {nombre: i for i, nombre in enumerate(self.nombres)}
+        return self._indice_estado
+
+    def aceptar(self, cadena: str) -> bool:
+        """Como ``AFDCompilado.aceptar``, indexando directamente la tabla plana."""
+        actual = self.inicial
+        plana = self._plana
+        columnas = self._columnas
+        indice_simbolo = self.indice_simbolo
+        for simbolo in cadena:
+            columna = indice_simbolo.get(simbolo)
+            if columna is None:
+                columna = self._columna(simbolo)
+            if columna < 0:
+                return False
+            actual = plana[actual * columnas + columna]
+            if actual == SIN_TRANSICION:
+                return False
+        return self.finales[actual]
+
+    def _tabla_numpy(self):
+        return np.frombuffer(self._plana, dtype=np.int32).reshape(len(self.tabla), self._columnas)
+
+    def copia(self) -> AFDCompilado:
+        """AFDCompilado editable con el mismo contenido."""
+        copia = AFDCompilado(list(self.nombres), list(self.simbolos), [list(fila) for fila in self.tabla],
+                             list(self.finales), self.inicial)
+        copia.version_bd = self.version_bd
+        return copia
+
+    def _solo_lectura(self, *args, **kwargs):
+        raise ValueError("La tabla proyectada es de solo lectura: edita una copia()")
+
+    agregar_estado = eliminar_estado = cambiar_final = _solo_lectura
+    agregar_transicion = eliminar_transicion = _solo_lectura
+
+    def __repr__(self):
+        return f"AFDMapeado(estados={len(self.tabla)}, simbolos={len(self.simbolos)})"
+
+
+class CompiledStore:
+    """
+    Ficheros compilados por id de autómata guardado, en el directorio
+    configurado, y la proyección actual de cada uno en este proceso.
+    """
+
+    def __init__(self):
+        self._mapeados: Dict[str, AFDMapeado] = {}
+        self._lock = threading.Lock()
+        # Directorio de esta ejecución si la base de datos no es un fichero (ver directory)
+        self._temporal: Optional[str] = None
+
+    def enabled(self) -> bool:
+        return bool(get_store_setting('enabled'))
+
+    def directory(self) -> str:
+        """
+        Directorio configurado o, por defecto, uno junto a la base de datos:
+        los ids solo identifican un autómata dentro de su base de datos. Si la
+        base de datos no es un fichero (en memoria, como en las pruebas), sus
+        ids se repiten entre ejecuciones: se usa un directorio temporal propio
+        de este proceso, que se borra al terminar.
+        """
+        directorio = get_store_setting('directory')
+        if directorio:
+            return directorio
+        nombre = str(settings.DATABASES['default']['NAME'])
+        if os.path.isabs(nombre):
+            return f'{nombre}-compiled'
+        with self._lock:
+            if self._temporal is None:
+                self._temporal = tempfile.mkdtemp(prefix='automata-compiled-')
+                atexit.register(shutil.rmtree, self._temporal, True)
+        return self._temporal
+
+    def path(self, automata_id) -> Optional[str]:
+        """Ruta del fichero de un autómata, o None si el id no es un entero."""
+        automata_id = str(automata_id)
+        if not _ID_VALIDO.match(automata_id):
+            return None
+        return os.path.join(self.directory(), f'{automata_id}.afd')
+
+    def get(self, automata_id) -> Optional[AFDMapeado]:
+        """La tabla proyectada del autómata, o None si no hay fichero (o es ilegible)."""
+        ruta = self.path(automata_id)
+        if ruta is None:
+            return None
+        clave = str(automata_id)
+        try:
+            estado = os.stat(ruta)
+        except FileNotFoundError:
+            self._mapeados.pop(clave, None)
+            return None
+
+        mapeado = self._mapeados.get(clave)
+        if mapeado is not None and mapeado.identidad == (estado.st_ino, estado.st_mtime_ns, estado.st_size):
+            return mapeado
+        try:
+            mapeado = AFDMapeado(ruta)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"No se pudo proyectar {ruta}: {str(e)}")
+            return None
+        # La proyección anterior se libera cuando nadie la esté usando
+        with self._lock:
+            self._mapeados[clave] = mapeado
+        return mapeado
+
+    def put(self, automata_id, compilado: AFDCompilado) -> Optional[AFDMapeado]:
+        """
+        Escribe la tabla en un fichero temporal y lo sustituye por el actual
+        de forma atómica. Devuelve la nueva proyección.
+        """
+        ruta = self.path(automata_id)
+        if ruta is None:
+            return None
+        directorio = os.path.dirname(ruta)
+        os.makedirs(directorio, exist_ok=True)
+        temporal = os.path.join(directorio, f'.{automata_id}.{uuid.uuid4().hex}.tmp')
+        try:
+            with open(temporal, 'wb') as f:
+                f.write(serializar(compilado))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporal, ruta)
+        except OSError:
+            try:
+                os.remove(temporal)
+            except OSError:
+                pass
+            raise
+        return self.get(automata_id)
+
+    def discard(self, automata_id) -> None:
+        """Elimina el fichero; los demás procesos lo notan en su siguiente ``get``."""
+        ruta = self.path(automata_id)
+        self._mapeados.pop(str(automata_id), None)
+        if ruta is not None:
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+
+    def forget(self) -> None:
+        """Olvida las proyecciones de este proceso (los ficheros se conservan)."""
+        self._mapeados.clear()
+
+
+compiled_store = CompiledStore()
@@ -1,11 +1,164 @@
 """
 Configuración centralizada para la aplicación de autómatas.
 """
+import os
+import tempfile
 
 # Constantes para la aplicación
 DEFAULT_ALPHABET = ['a', 'b']
 EPSILON = 'ε'
 
+# Número máximo de pasos registrados en una traza de ejecución
+TRACE_MAX_STEPS = 1000
+
+# Simulación de AFND: máximo de pasos (subconjunto, símbolo) memorizados por autómata
+AFND_STEP_CACHE_MAX = 4096
+
+# Validación por lotes: se comparten prefijos (ver prefixes.py) si las cadenas
+# comparten al menos esta fracción de sus caracteres. Frente al recorrido
+# vectorizado de los AFD (con numpy) solo compensa con prefijos muy largos
+PREFIX_BATCH_MIN_SHARING = 0.5
+PREFIX_BATCH_MIN_SHARING_VECTORIZED = 0.95
+
+# Conversión paralela: tamaño mínimo de frontera para repartirla entre procesos
+PARALLEL_MIN_FRONTIER = 512
+
+# Tablas compiladas de AFD guardados en memoria del proceso (sin el almacén
+# de ficheros): máximo de autómatas, expulsando los menos usados recientemente
+COMPILED_CACHE_MAX_ENTRIES = 256
+
+# Resultados de conversión guardados: máximo de entradas y cada cuántas
+# inserciones se eliminan las menos usadas recientemente
+CONVERSION_STORE_MAX_ENTRIES = 10000
+CONVERSION_STORE_PRUNE_EVERY = 100
+
+# Conversión con minimización (ver AFND_to_AFD.convertir_minimo): en modo
+# automático, la construcción directa se abandona por la de Brzozowski si el
+# AFD intermedio supera este número de estados por estado del AFND (con un mínimo)
+MINIMIZE_FORWARD_STATES_PER_NFA_STATE = 8
+MINIMIZE_FORWARD_MIN_STATES = 1000
+
+# Conversión en streaming (NDJSON): cada cuántos estados expandidos se envía
+# un registro de progreso y tamaño aproximado de cada trozo de la respuesta
+STREAM_PROGRESS_EVERY = 500
+STREAM_CHUNK_BYTES = 64 * 1024
+
+# Control de admisión (ver admission.py). Se pueden sobrescribir desde los
+# settings de Django con AUTOMATA_ADMISSION_LIMITS y AUTOMATA_CONCURRENCY_LIMITS.
+ADMISSION_LIMITS = {
+    'max_request_bytes': 20 * 1024 * 1024,
+    'max_states': 5000,
+    'max_edges': 200000,
+    'max_input_length': 100000,
+    'max_batch_inputs': 10000,
+    # Longitud total de las cadenas por aristas recorridas en cada paso (1 en un AFD)
+    'max_validation_cost': 50_000_000,
+    # Estados del AFND por símbolos distintos: lo mínimo que cuesta determinizar
+    'max_conversion_cost': 5_000_000,
+    # La explosión de subconjuntos no se puede prever barato: se corta al construir
+    'max_dfa_states': 50000,
+}
+# Peticiones simultáneas por clase de endpoint y espera máxima por un hueco (s)
+CONCURRENCY_LIMITS = {
+    'validate': 16,
+    'analyze': 4,
+    'convert': 2,
+    'storage': 8,
+}
+ADMISSION_QUEUE_TIMEOUT = 0.1
+
+# Análisis previo a la conversión (ver analysis.py): estados del AFD que se
+# exploran como mucho, presupuesto de trabajo (bits recorridos) de la
+# exploración y el muestreo, recorridos aleatorios y su longitud máxima, y
+# hasta cuántos estados estimados se recomienda convertir sin streaming. Se
+# sobrescribe con AUTOMATA_ANALYSIS en los settings de Django
+ANALYSIS = {
+    'max_explored_states': 2000,
+    'max_work': 2_000_000,
+    'sample_walks': 200,
+    'max_walk_length': 256,
+    'inline_max_states': 2000,
+}
+
+# Precarga al arrancar (ver warmup.py); se puede sobrescribir con AUTOMATA_WARMUP
+WARMUP = {
+    'on_startup': True,
+    'limit': 100,
+    'budget_seconds': 10.0,
+}
+
+# Perfilado bajo demanda (ver profiling.py); se puede sobrescribir con AUTOMATA_PROFILING
+PROFILING = {
+    'enabled': False,
+    # Token para la cabecera X-Profile-Token; sin él solo pueden perfilar usuarios staff
+    'token': None,
+    # Prefijos de ruta que se perfilan siempre, sin cabecera
+    'paths': [],
+    'directory': os.path.join(tempfile.gettempdir(), 'automata-profiles'),
+    'max_profiles': 20,
+    'top': 5,
+}
+
+# Tablas compiladas de los AFD guardados en ficheros proyectados en memoria y
+# compartidos por todos los procesos (ver compiled_store.py). Desactivado, cada
+# proceso guarda su copia en memoria. Sin directorio, se usa '<base de datos>-compiled'
+# junto al fichero SQLite. Se sobrescribe con AUTOMATA_COMPILED_STORE.
+COMPILED_STORE = {
+    'enabled': True,
+    'directory': None,
+}
+
+# Reconocedores generados para los AFD con más tráfico (ver codegen.py): se
+# generan para una tabla tras min_requests validaciones en el proceso si no
+# supera max_states estados, y las calibration_requests siguientes por
+# estrategia deciden cuál se usa. max_entries limita las entradas de los
+# diccionarios de saltos de cada tabla; se guardan hasta cache_size. Se
+# sobrescribe con AUTOMATA_CODEGEN en los settings de Django
+CODEGEN = {
+    'enabled': True,
+    'min_requests': 50,
+    'max_states': 512,
+    'calibration_requests': 16,
+    'max_entries': 16384,
+    'cache_size': 64,
+}
+
+# Minimización incremental de los AFD guardados al editarlos (ver
+# minimization.py): cada proceso conserva la de los cache_size autómatas
+# editados más recientemente. Se sobrescribe con AUTOMATA_INCREMENTAL_MINIMIZATION
+# en los settings de Django
+INCREMENTAL_MINIMIZATION = {
+    'enabled': True,
+    'cache_size': 32,
+}
+
+# Caché de resultados de validación por lenguaje (ver result_cache.py):
+# huellas de hasta structures datos de autómata distintos, resultados de
+# hasta languages lenguajes cuyo AFD mínimo no supere max_states estados, y
+# hasta max_entries prefijos guardados por lenguaje. Se guarda el estado
+# intermedio cada checkpoint_interval caracteres (0 lo desactiva) y hasta
+# max_dead_lengths longitudes distintas de prefijos sin transición. Se
+# sobrescribe con AUTOMATA_RESULT_CACHE en los settings de Django
+RESULT_CACHE = {
+    'enabled': True,
+    'structures': 256,
+    'languages': 64,
+    'max_states': 2000,
+    'max_entries': 10000,
+    'checkpoint_interval': 256,
+    'max_dead_lengths': 32,
+}
+
+# PRAGMA aplicados a cada conexión SQLite nueva (ver db.py); se pueden
+# sobrescribir con AUTOMATA_SQLITE_PRAGMAS en los settings de Django
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'temp_store': 'MEMORY',
+    'cache_size': -20000,
+}
+
 # Mensajes de error comunes
 ERROR_MESSAGES = {
     'invalid_structure': 'La estructura del autómata no es válida',
@@ -0,0 +1,51 @@
+"""
+Almacén persistente de resultados de conversión AFND -> AFD.
+
+Los resultados se guardan en la base de datos, así que sobreviven a los
+reinicios y los comparten todos los procesos del servidor.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .config import CONVERSION_STORE_MAX_ENTRIES, CONVERSION_STORE_PRUNE_EVERY
+from .models import ConversionResult
+
+# No se actualiza last_used_at en cada acierto, solo si es más antiguo que esto
+_TOUCH_INTERVAL = timedelta(minutes=1)
+
+
+def get_conversion(fingerprint, minimized=False):
+    """Devuelve el AFD guardado para una huella (formato de ``automata_to_data``) o None."""
+    result = ConversionResult.objects.filter(fingerprint=fingerprint, minimized=minimized).first()
+    if result is None:
+        return None
+
+    now = timezone.now()
+    if now - result.last_used_at > _TOUCH_INTERVAL:
+        ConversionResult.objects.filter(pk=result.pk).update(last_used_at=now)
+    return result.to_dict
+
+
+def save_conversion(fingerprint, data, minimized=False):
+    """Guarda un resultado de conversión; si otro proceso ya lo guardó, no hace nada."""
+    try:
+        with transaction.atomic():
+            result = ConversionResult.objects.create(
+                fingerprint=fingerprint,
+                minimized=minimized,
+                nodes=data['nodes'],
+                edges=data['edges'],
+            )
+    except IntegrityError:
+        return
+
+    if result.pk % CONVERSION_STORE_PRUNE_EVERY == 0:
+        prune_conversions()
+
+
+def prune_conversions(max_entries=CONVERSION_STORE_MAX_ENTRIES):
+    """Elimina los resultados menos usados recientemente por encima de ``max_entries``."""
+    stale = ConversionResult.objects.order_by('-last_used_at').values_list('pk', flat=True)[max_entries:]
+    return ConversionResult.objects.filter(pk__in=list(stale)).delete()[0]
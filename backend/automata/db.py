@@ -0,0 +1,30 @@
+"""
+Ajustes de las conexiones SQLite para tráfico concurrente.
+
+Con el journal por defecto un escritor bloquea a los lectores y las esperas
+acaban en "database is locked". En modo WAL los lectores no se bloquean con
+el escritor, y busy_timeout hace que los escritores esperen su turno en vez
+de fallar. Los PRAGMA se aplican una vez por conexión (las conexiones son
+persistentes, ver CONN_MAX_AGE en settings).
+"""
+from django.conf import settings
+
+from .config import SQLITE_PRAGMAS
+
+
+def _in_memory(connection):
+    name = str(connection.settings_dict.get('NAME') or '')
+    return name == ':memory:' or 'mode=memory' in name
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Receptor de ``connection_created``: aplica los PRAGMA configurados."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'AUTOMATA_SQLITE_PRAGMAS', SQLITE_PRAGMAS)
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            # El journal WAL necesita un fichero
+            if name == 'journal_mode' and _in_memory(connection):
+                continue
+            cursor.execute(f'PRAGMA {name} = {value}')
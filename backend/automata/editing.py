@@ -0,0 +1,171 @@
+"""
+Edición incremental de autómatas guardados.
+"""
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .compiled import AFDCompilado
+from .config import EPSILON
+from .symbols import es_clase, rangos_de
+
+
+def _edge_key(edge: Dict[str, Any]) -> Tuple[str, str, str]:
+    return (edge['from'], edge['to'], edge.get('label', EPSILON))
+
+
+def initial_state(nodes: List[Dict[str, Any]]) -> Optional[str]:
+    """Estado inicial tal como lo elige ``build_automata_from_data``."""
+    for node in nodes:
+        if node.get('initial', False):
+            return node['id']
+    return nodes[0]['id'] if nodes else None
+
+
+def _check_deterministic(edges: List[Dict[str, Any]]) -> None:
+    """Comprueba que ningún estado tenga dos aristas que acepten el mismo símbolo."""
+    labels_by_origin: Dict[str, List[str]] = {}
+    for edge in edges:
+        labels_by_origin.setdefault(edge['from'], []).append(edge.get('label', EPSILON))
+
+    for labels in labels_by_origin.values():
+        seen = set()
+        ranges = []
+        for label in labels:
+            if label in seen:
+                raise ValueError(f"El AFD ya tiene una transición para el símbolo {label}")
+            seen.add(label)
+            ranges.extend((start, end, label) for start, end in rangos_de(label) or [])
+
+        # Los rangos de una misma etiqueta son disjuntos: un solape es entre etiquetas
+        ranges.sort()
+        for previous, current in zip(ranges, ranges[1:]):
+            if current[0] <= previous[1]:
+                raise ValueError(f"El AFD ya tiene una transición para el símbolo {current[2]}")
+
+
+class AutomataPatch:
+    """
+    Cambios incrementales sobre un autómata guardado.
+    Se construye a partir de un JSON con:
+    - addNodes: Nodos nuevos
+    - removeNodes: Ids de nodos a eliminar (con sus aristas)
+    - updateNodes: Nodos existentes con los campos a cambiar (final, initial, label)
+    - addEdges: Aristas nuevas
+    - removeEdges: Aristas a eliminar
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.add_nodes = data.get('addNodes', [])
+        self.remove_nodes = data.get('removeNodes', [])
+        self.update_nodes = data.get('updateNodes', [])
+        self.add_edges = data.get('addEdges', [])
+        self.remove_edges = data.get('removeEdges', [])
+        # Aristas realmente eliminadas (incluye las de los nodos eliminados)
+        self.removed_edges: List[Dict[str, Any]] = []
+        self.final_changes: Dict[str, bool] = {}
+
+    def is_empty(self) -> bool:
+        return not (self.add_nodes or self.remove_nodes or self.update_nodes
+                    or self.add_edges or self.remove_edges)
+
+    def uses_symbol_classes(self) -> bool:
+        return any(es_clase(edge.get('label', EPSILON)) for edge in self.add_edges + self.remove_edges)
+
+    def apply(self, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]],
+              automata_type: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Aplica los cambios a las listas de nodos y aristas y devuelve las nuevas.
+        Lanza ValueError si el resultado no es coherente.
+        """
+        nodes = [dict(node) for node in nodes]
+        by_id = {node['id']: node for node in nodes}
+
+        # Nodos
+        removed = set(self.remove_nodes)
+        for node_id in removed:
+            if node_id not in by_id:
+                raise ValueError(f"El estado '{node_id}' no existe")
+        nodes = [node for node in nodes if node['id'] not in removed]
+
+        for node in self.add_nodes:
+            if node['id'] in by_id and node['id'] not in removed:
+                raise ValueError(f"El estado '{node['id']}' ya existe")
+            nodes.append(dict(node))
+            by_id[node['id']] = nodes[-1]
+            self.final_changes[node['id']] = bool(node.get('final', False))
+
+        for changes in self.update_nodes:
+            node = by_id.get(changes['id'])
+            if node is None or changes['id'] in removed:
+                raise ValueError(f"El estado '{changes['id']}' no existe")
+            if 'final' in changes and bool(changes['final']) != bool(node.get('final', False)):
+                self.final_changes[node['id']] = bool(changes['final'])
+            node.update(changes)
+
+        # Si hay un nuevo estado inicial, los demás dejan de serlo
+        for node in self.add_nodes + self.update_nodes:
+            if node.get('initial', False):
+                for other in nodes:
+                    if other['id'] != node['id']:
+                        other.pop('initial', None)
+
+        existing = {node['id'] for node in nodes}
+
+        # Aristas
+        to_remove = {_edge_key(edge) for edge in self.remove_edges}
+        current = {_edge_key(edge) for edge in edges}
+        missing = to_remove - current
+        if missing:
+            origen, destino, simbolo = next(iter(missing))
+            raise ValueError(f"La transición {origen} -{simbolo}-> {destino} no existe")
+
+        kept = []
+        for edge in edges:
+            key = _edge_key(edge)
+            if key in to_remove or key[0] in removed or key[1] in removed:
+                self.removed_edges.append(edge)
+            else:
+                kept.append(edge)
+
+        for edge in self.add_edges:
+            if edge['from'] not in existing or edge['to'] not in existing:
+                raise ValueError("Estado origen o destino no existe")
+            kept.append(dict(edge))
+
+        if automata_type == 'AFD':
+            _check_deterministic(kept)
+
+        return nodes, kept
+
+    def affected(self, compiled: AFDCompilado) -> Tuple[Set[Tuple[int, str]], Set[int]]:
+        """
+        Transiciones (estado, símbolo) y estados de la tabla compilada anterior
+        a la edición que cambian con ella. Debe llamarse después de ``apply``.
+        """
+        transitions = set()
+        for edge in self.removed_edges + self.add_edges:
+            if edge['from'] in compiled.indice_estado:
+                transitions.add((compiled.indice_estado[edge['from']], edge.get('label', EPSILON)))
+
+        states = {
+            compiled.indice_estado[node_id]
+            for node_id in list(self.remove_nodes) + list(self.final_changes)
+            if node_id in compiled.indice_estado
+        }
+        return transitions, states
+
+    def added_states(self, compiled: AFDCompilado) -> Set[int]:
+        """Índices de los estados nuevos en la tabla compilada. Debe llamarse después de ``apply_to_compiled``."""
+        return {compiled.indice_estado[node['id']] for node in self.add_nodes}
+
+    def apply_to_compiled(self, compiled: AFDCompilado) -> None:
+        """Aplica los cambios a la tabla compilada sin recompilar. Debe llamarse después de ``apply``."""
+        for edge in self.removed_edges:
+            compiled.eliminar_transicion(edge['from'], edge.get('label', EPSILON))
+        for node_id in self.remove_nodes:
+            compiled.eliminar_estado(node_id)
+        for node in self.add_nodes:
+            compiled.agregar_estado(node['id'], bool(node.get('final', False)))
+        for node_id, final in self.final_changes.items():
+            compiled.cambiar_final(node_id, final)
+        for edge in self.add_edges:
+            compiled.agregar_transicion(edge['from'], edge.get('label', EPSILON), edge['to'])
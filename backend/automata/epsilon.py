@@ -0,0 +1,133 @@
+"""
+Cerraduras ε de todos los estados de un autómata, calculadas de una vez.
+
+Los estados de un ciclo de transiciones ε tienen todos la misma cerradura,
+así que el grafo ε se condensa en componentes fuertemente conexas (Tarjan) y
+las cerraduras se propagan por el grafo de componentes en orden topológico
+inverso: cada componente une sus estados con las cerraduras, ya calculadas,
+de las componentes a las que llega. Cada arista ε se recorre una sola vez.
+
+Las cerraduras se guardan como máscaras de bits, un bit por estado en el
+orden de ``estados``, igual que los subconjuntos de la conversión a AFD.
+"""
+from typing import TYPE_CHECKING, Dict, Iterable, List, Sequence, Set
+
+from .config import EPSILON
+
+if TYPE_CHECKING:
+    from .automata import Estado
+
+
+def componentes_fuertes(sucesores: List[List[int]]) -> List[List[int]]:
+    """
+    Componentes fuertemente conexas del grafo dado por listas de sucesores
+    (algoritmo de Tarjan, sin recursión). Se devuelven en orden topológico
+    inverso: una componente aparece después de todas a las que llega.
+    """
+    n = len(sucesores)
+    indice = [-1] * n
+    bajo = [0] * n
+    en_pila = [False] * n
+    pila: List[int] = []
+    componentes: List[List[int]] = []
+    contador = 0
+
+    for raiz in range(n):
+        if indice[raiz] != -1:
+            continue
+        indice[raiz] = bajo[raiz] = contador
+        contador += 1
+        pila.append(raiz)
+        en_pila[raiz] = True
+        # (nodo, posición del siguiente sucesor por visitar)
+        llamadas = [(raiz, 0)]
+
+        while llamadas:
+            nodo, i = llamadas[-1]
+            if i < len(sucesores[nodo]):
+                llamadas[-1] = (nodo, i + 1)
+                siguiente = sucesores[nodo][i]
+                if indice[siguiente] == -1:
+                    indice[siguiente] = bajo[siguiente] = contador
+                    contador += 1
+                    pila.append(siguiente)
+                    en_pila[siguiente] = True
+                    llamadas.append((siguiente, 0))
+                elif en_pila[siguiente] and indice[siguiente] < bajo[nodo]:
+                    bajo[nodo] = indice[siguiente]
+                continue
+
+            llamadas.pop()
+            if llamadas:
+                padre = llamadas[-1][0]
+                if bajo[nodo] < bajo[padre]:
+                    bajo[padre] = bajo[nodo]
+            if bajo[nodo] == indice[nodo]:
+                componente = []
+                while True:
+                    estado = pila.pop()
+                    en_pila[estado] = False
+                    componente.append(estado)
+                    if estado == nodo:
+                        break
+                componentes.append(componente)
+
+    return componentes
+
+
+class CerradurasEpsilon:
+    """Cerraduras ε precalculadas, compartidas por la conversión y la simulación de un AFND."""
+
+    def __init__(self, estados: Sequence['Estado']):
+        self.estados = list(estados)
+        self.indice: Dict['Estado', int] = {estado: i for i, estado in enumerate(self.estados)}
+        self.finales = sum(1 << i for i, estado in enumerate(self.estados) if estado.es_final)
+
+        sucesores = [
+            [self.indice[destino] for destino in estado.transiciones.get(EPSILON, ())]
+            for estado in self.estados
+        ]
+        self.mascaras = [0] * len(self.estados)
+        for componente in componentes_fuertes(sucesores):
+            mascara = 0
+            for i in componente:
+                mascara |= 1 << i
+            # Las componentes alcanzables ya están calculadas; las de esta aún valen 0
+            for i in componente:
+                for j in sucesores[i]:
+                    mascara |= self.mascaras[j]
+            for i in componente:
+                self.mascaras[i] = mascara
+
+    def cerrar(self, estados: Iterable['Estado']) -> int:
+        """Máscara de la cerradura ε de un conjunto de estados."""
+        mascara = 0
+        for estado in estados:
+            mascara |= self.mascaras[self.indice[estado]]
+        return mascara
+
+    def estados_de(self, mascara: int) -> Set['Estado']:
+        estados = set()
+        while mascara:
+            bit = mascara & -mascara
+            estados.add(self.estados[bit.bit_length() - 1])
+            mascara ^= bit
+        return estados
+
+    def movimientos(self, etiquetas: Iterable[str]) -> List[int]:
+        """Para cada estado, la cerradura ε de sus destinos con alguna de las etiquetas."""
+        etiquetas = tuple(etiquetas)
+        return [
+            self.cerrar(destino for etiqueta in etiquetas for destino in estado.transiciones.get(etiqueta, ()))
+            for estado in self.estados
+        ]
+
+    @staticmethod
+    def mover(mascara: int, movimientos: List[int]) -> int:
+        """Unión de los movimientos de los estados de la máscara."""
+        destino = 0
+        while mascara:
+            bit = mascara & -mascara
+            destino |= movimientos[bit.bit_length() - 1]
+            mascara ^= bit
+        return destino
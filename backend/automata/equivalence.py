@@ -0,0 +1,76 @@
+"""
+Índice de autómatas guardados por lenguaje aceptado.
+
+Cada ``AutomataModel`` guarda la huella de su AFD mínimo en ``language_hash``
+(indexado), así que buscar los autómatas equivalentes a uno dado es una sola
+consulta por igualdad. La huella se calcula en segundo plano al guardar.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, transaction
+
+from .admission import get_limit
+from .afnd_to_afd import LimiteDeEstadosExcedido
+from .fingerprint import language_fingerprint
+from .formats import build_automata_from_data
+from .models import AutomataModel
+from .utils import logger
+
+# Un solo hilo: los cálculos se encolan y no compiten con las peticiones
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='language-hash')
+
+
+def compute_language_hash(nodes, edges, automata_type='AFND'):
+    """
+    Huella del lenguaje de un autómata en el formato de la API. Lanza
+    LimiteDeEstadosExcedido si el AFD supera el límite de ``max_dfa_states``.
+    """
+    automata = build_automata_from_data({'nodes': nodes, 'edges': edges}, automata_type)
+    return language_fingerprint(automata, get_limit('max_dfa_states'))
+
+
+def update_language_hash(automata_id):
+    """
+    Calcula y guarda la huella de un autómata guardado. Si el autómata cambia
+    mientras tanto no se guarda nada: el nuevo guardado programa su propio cálculo.
+    Devuelve la huella, o None si no se pudo calcular. Si el AFD supera el
+    límite de estados lanza LimiteDeEstadosExcedido.
+    """
+    try:
+        automata = AutomataModel.objects.filter(id=automata_id).first()
+        if automata is None:
+            return None
+        language_hash = compute_language_hash(automata.nodes, automata.edges, automata.automata_type)
+        AutomataModel.objects.filter(id=automata_id, updated_at=automata.updated_at).update(
+            language_hash=language_hash
+        )
+        return language_hash
+    except LimiteDeEstadosExcedido as e:
+        logger.warning(f"Huella del autómata {automata_id} no calculada: {str(e)}")
+        raise
+    except Exception as e:
+        logger.error(f"Error calculando la huella del autómata {automata_id}: {str(e)}")
+        return None
+
+
+def _update_in_background(automata_id):
+    # El hilo no pasa por el ciclo de petición: cierra él mismo su conexión
+    try:
+        update_language_hash(automata_id)
+    except LimiteDeEstadosExcedido:
+        pass
+    finally:
+        close_old_connections()
+
+
+def schedule_language_hash(automata_id):
+    """Programa el cálculo de la huella para cuando se confirme la transacción actual."""
+    transaction.on_commit(lambda: _executor.submit(_update_in_background, automata_id))
+
+
+def find_equivalent(language_hash, exclude_id=None):
+    """Autómatas guardados que aceptan el lenguaje de la huella dada."""
+    automatas = AutomataModel.objects.filter(language_hash=language_hash)
+    if exclude_id is not None:
+        automatas = automatas.exclude(id=exclude_id)
+    return automatas.order_by('id')
@@ -0,0 +1,148 @@
+"""
+Huellas de autómatas independientes del nombre de los estados y del orden de las aristas.
+"""
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple
+
+from .automata import Automata, Estado
+from .compiled import SIN_TRANSICION, AFDCompilado
+from .symbols import formatear_rangos, normalizar_rangos, rangos_de
+
+
+def _normalizar_etiqueta(etiqueta: str) -> str:
+    """'[cba]' y '[a-c]' aceptan lo mismo: se comparan por sus rangos."""
+    rangos = rangos_de(etiqueta)
+    return formatear_rangos(rangos) if rangos is not None and len(etiqueta) > 1 else etiqueta
+
+
+def _colores(automata: Automata) -> Dict[Estado, int]:
+    """
+    Refinamiento de colores: dos estados acaban con el mismo color si no se
+    distinguen por ser finales ni por los colores de sus sucesores por símbolo.
+    """
+    colores = {estado: int(estado.es_final) for estado in automata.estados.values()}
+    numero = len(set(colores.values()))
+    while True:
+        firmas = {
+            estado: (colores[estado], tuple(sorted(
+                (_normalizar_etiqueta(etiqueta), colores[destino])
+                for etiqueta, destinos in estado.transiciones.items()
+                for destino in destinos
+            )))
+            for estado in automata.estados.values()
+        }
+        orden = {firma: i for i, firma in enumerate(sorted(set(firmas.values())))}
+        colores = {estado: orden[firma] for estado, firma in firmas.items()}
+        if len(orden) == numero:
+            return colores
+        numero = len(orden)
+
+
+def automata_fingerprint(automata: Automata) -> str:
+    """
+    Huella SHA-256 de la parte alcanzable de un autómata.
+
+    Los estados se numeran en un recorrido BFS desde el inicial, visitando las
+    aristas por etiqueta y color. La serialización describe el grafo completo,
+    así que dos autómatas con la misma huella son isomorfos (y aceptan el mismo
+    lenguaje). En un AFND con estados indistinguibles por color, dos nombrados
+    distintos pueden dar huellas distintas: eso solo cuesta un fallo de caché.
+    """
+    if not automata.estado_inicial:
+        raise ValueError("No hay estado inicial definido")
+
+    colores = _colores(automata)
+    indices = {automata.estado_inicial: 0}
+    orden = [automata.estado_inicial]
+    descripcion: List[list] = []
+
+    for estado in orden:
+        aristas = sorted(
+            ((_normalizar_etiqueta(etiqueta), colores[destino], destino.nombre), destino)
+            for etiqueta, destinos in estado.transiciones.items()
+            for destino in destinos
+        )
+        salida = []
+        for (etiqueta, _, _), destino in aristas:
+            if destino not in indices:
+                indices[destino] = len(orden)
+                orden.append(destino)
+            salida.append([etiqueta, indices[destino]])
+        descripcion.append([int(estado.es_final), salida])
+
+    contenido = json.dumps([automata.tipo, descripcion], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def language_fingerprint(automata: Automata, max_estados: Optional[int] = None) -> str:
+    """
+    Huella SHA-256 del lenguaje que acepta un autómata: la del AFD mínimo
+    sin estados inútiles, que es único salvo el nombre de los estados.
+
+    Los estados se numeran en BFS desde el inicial y las aristas de cada uno
+    se agrupan por destino y se ordenan por sus rangos de caracteres, así que
+    no influyen ni el tipo de autómata ni cómo se reparte el alfabeto entre
+    etiquetas. Dos autómatas tienen la misma huella si y solo si aceptan el
+    mismo lenguaje (salvo colisiones de SHA-256). Con ``max_estados`` se
+    lanza LimiteDeEstadosExcedido si la determinización lo supera.
+    """
+    return minimal_fingerprint(automata._compilar_equivalente(max_estados).minimizar())
+
+
+def _orden_canonico(minimo: AFDCompilado) -> Tuple[List[int], List[list]]:
+    """Estados de un AFD mínimo en el orden de la huella, y la descripción que se resume."""
+    indices = {minimo.inicial: 0}
+    orden = [minimo.inicial]
+    descripcion: List[list] = []
+    for estado in orden:
+        rangos_por_destino: Dict[int, list] = {}
+        for columna, destino in enumerate(minimo.tabla[estado]):
+            if destino != SIN_TRANSICION:
+                rangos_por_destino.setdefault(destino, []).extend(minimo.rangos[columna])
+        aristas = sorted(
+            (normalizar_rangos(rangos), destino) for destino, rangos in rangos_por_destino.items()
+        )
+        salida = []
+        for rangos, destino in aristas:
+            if destino not in indices:
+                indices[destino] = len(orden)
+                orden.append(destino)
+            salida.append([formatear_rangos(rangos), indices[destino]])
+        descripcion.append([int(minimo.finales[estado]), salida])
+    return orden, descripcion
+
+
+def _resumir(descripcion: List[list]) -> str:
+    contenido = json.dumps(descripcion, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def minimal_fingerprint(minimo: AFDCompilado) -> str:
+    """
+    Huella de ``language_fingerprint`` a partir de un AFD ya mínimo y sin
+    estados inútiles (por ejemplo, el que mantiene MinimizacionIncremental).
+    """
+    return _resumir(_orden_canonico(minimo)[1])
+
+
+def canonical_minimal(automata: Automata, max_estados: Optional[int] = None) -> Tuple[str, AFDCompilado]:
+    """
+    Huella del lenguaje y AFD mínimo con los estados numerados en el orden de
+    la huella: en dos autómatas equivalentes, el estado i del uno y del otro
+    aceptan las mismas continuaciones. ``max_estados`` limita la determinización.
+    """
+    return canonical_minimal_table(automata._compilar_equivalente(max_estados).minimizar())
+
+
+def canonical_minimal_table(minimo: AFDCompilado) -> Tuple[str, AFDCompilado]:
+    """``canonical_minimal`` a partir del AFD mínimo (``AFDCompilado.minimizar``)."""
+    orden, descripcion = _orden_canonico(minimo)
+    numero = {estado: i for i, estado in enumerate(orden)}
+    tabla = [
+        [SIN_TRANSICION if destino == SIN_TRANSICION else numero[destino] for destino in minimo.tabla[estado]]
+        for estado in orden
+    ]
+    canonico = AFDCompilado([f'Q{i}' for i in range(len(orden))], list(minimo.simbolos), tabla,
+                            [minimo.finales[estado] for estado in orden], 0)
+    return _resumir(descripcion), canonico
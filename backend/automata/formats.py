@@ -0,0 +1,160 @@
+"""
+Conversión entre autómatas y su representación JSON en la API.
+"""
+from itertools import accumulate
+
+from .automata import Automata
+from .config import EPSILON
+
+
+def build_automata_from_data(data, automata_type='AFND'):
+    """
+    Construye un objeto Automata a partir de datos de entrada.
+    """
+    automata = Automata(tipo=automata_type)
+    
+    # Primero, crear todos los estados
+    for node in data['nodes']:
+        automata.agregar_estado(node['id'], node.get('final', False))
+    
+    # Establecer el estado inicial
+    for node in data['nodes']:
+        if node.get('initial', False):
+            automata.estado_inicial = automata.estados[node['id']]
+            break
+    
+    # Agregar transiciones
+    for edge in data['edges']:
+        automata.agregar_transicion(edge['from'], edge.get('label', 'ε'), edge['to'])
+    
+    return automata
+
+
+def automata_to_data(automata):
+    """
+    Convierte un objeto Automata a formato JSON para la API.
+    """
+    nodes = []
+    edges = []
+    
+    # Crear nodos
+    for nombre, estado in automata.estados.items():
+        nodes.append({
+            'id': nombre,
+            'label': nombre,
+            'initial': estado == automata.estado_inicial,
+            'final': estado.es_final
+        })
+    
+    # Crear aristas
+    for nombre, estado in automata.estados.items():
+        for simbolo, destinos in estado.transiciones.items():
+            for destino in destinos:
+                edges.append({
+                    'from': nombre,
+                    'to': destino.nombre,
+                    'label': simbolo
+                })
+    
+    return {
+        'nodes': nodes,
+        'edges': edges
+    }
+
+
+# Formato compacto: estados y símbolos se escriben una vez y las aristas son
+# índices en arrays paralelos, agrupadas por origen como en una matriz CSR.
+# Las aristas del estado i son las posiciones offsets[i]..offsets[i+1]-1.
+COMPACT_FORMAT = 'compact-v1'
+
+
+def is_compact(data):
+    return isinstance(data, dict) and data.get('format') == COMPACT_FORMAT
+
+
+def to_compact(data):
+    """
+    Convierte nodos y aristas (formato de ``automata_to_data``) al formato compacto.
+    De los nodos solo se conservan id, label, initial y final.
+    """
+    nodes = data['nodes']
+    edges = data['edges']
+    states = [node['id'] for node in nodes]
+    state_index = {state: i for i, state in enumerate(states)}
+    try:
+        sources = [state_index[edge['from']] for edge in edges]
+        all_targets = [state_index[edge['to']] for edge in edges]
+    except KeyError:
+        raise ValueError("Estado origen o destino no existe")
+
+    symbol_index = {}
+    all_symbols = [symbol_index.setdefault(edge.get('label', EPSILON), len(symbol_index)) for edge in edges]
+
+    # Orden estable por origen (lineal si ya vienen agrupadas, como en automata_to_data)
+    order = sorted(range(len(edges)), key=sources.__getitem__)
+    counts = [0] * (len(states) + 1)
+    for source in sources:
+        counts[source + 1] += 1
+
+    compact = {
+        'format': COMPACT_FORMAT,
+        'states': states,
+        'initial': next((i for i, node in enumerate(nodes) if node.get('initial', False)), None),
+        'final': [i for i, node in enumerate(nodes) if node.get('final', False)],
+        'symbols': list(symbol_index),
+        'offsets': list(accumulate(counts)),
+        'edgeSymbols': [all_symbols[i] for i in order],
+        'targets': [all_targets[i] for i in order],
+    }
+    # Las etiquetas solo se envían si alguna difiere del id
+    labels = [node.get('label', node['id']) for node in nodes]
+    if labels != states:
+        compact['labels'] = labels
+    return compact
+
+
+def _check_indices(indices, size, field):
+    for i in indices:
+        if not isinstance(i, int) or isinstance(i, bool) or not 0 <= i < size:
+            raise ValueError(f"Índice fuera de rango en '{field}': {i!r}")
+
+
+def from_compact(compact):
+    """Convierte el formato compacto a nodos y aristas."""
+    states = compact['states']
+    labels = compact.get('labels') or states
+    initial = compact.get('initial')
+    final = set(compact.get('final', []))
+    offsets = compact['offsets']
+    symbols = compact['symbols']
+    edge_symbols = compact['edgeSymbols']
+    targets = compact['targets']
+    if len(offsets) != len(states) + 1 or len(edge_symbols) != len(targets) or offsets[-1] != len(targets):
+        raise ValueError("Formato compacto inconsistente")
+    if len(labels) != len(states) or offsets[0] != 0 \
+            or any(offsets[i] > offsets[i + 1] for i in range(len(states))):
+        raise ValueError("Formato compacto inconsistente")
+    # Los índices negativos no se aceptan: en Python indexarían desde el final
+    _check_indices(targets, len(states), 'targets')
+    _check_indices(edge_symbols, len(symbols), 'edgeSymbols')
+    _check_indices(final, len(states), 'final')
+    if initial is not None:
+        _check_indices([initial], len(states), 'initial')
+
+    nodes = [
+        {'id': state, 'label': labels[i], 'initial': i == initial, 'final': i in final}
+        for i, state in enumerate(states)
+    ]
+    edges = [
+        {'from': state, 'to': states[targets[j]], 'label': symbols[edge_symbols[j]]}
+        for i, state in enumerate(states)
+        for j in range(offsets[i], offsets[i + 1])
+    ]
+    return {'nodes': nodes, 'edges': edges}
+
+
+def read_automata_data(data):
+    """Nodos y aristas de una petición, en formato normal o compacto."""
+    if is_compact(data):
+        return from_compact(data)
+    return {'nodes': data.get('nodes', []), 'edges': data.get('edges', [])}
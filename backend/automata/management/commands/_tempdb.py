@@ -0,0 +1,32 @@
+"""
+Base de datos SQLite temporal para los comandos de medición.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+from django.core.management import call_command
+from django.db import connection, connections
+
+
+@contextmanager
+def temporary_database(**overrides):
+    """
+    Apunta la conexión por defecto a una base de datos nueva y migrada en un
+    directorio temporal (``overrides`` reemplaza claves de su configuración,
+    como OPTIONS o CONN_MAX_AGE) y la restaura al salir. Las conexiones que
+    se abran dentro, en cualquier hilo, usan la base de datos temporal.
+    """
+    db_settings = connections.settings['default']
+    original = dict(db_settings)
+    connection.close()
+    with tempfile.TemporaryDirectory() as directory:
+        db_settings['NAME'] = os.path.join(directory, 'bench.sqlite3')
+        db_settings.update(overrides)
+        try:
+            call_command('migrate', verbosity=0)
+            yield
+        finally:
+            connection.close()
+            db_settings.clear()
+            db_settings.update(original)
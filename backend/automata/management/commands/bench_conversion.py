@@ -0,0 +1,64 @@
+"""
+Mide la conversión AFND -> AFD en serie y en paralelo con distinto número de procesos.
+
+Uso: python manage.py bench_conversion --n 16 --workers 1 2 4
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from automata.afnd_to_afd import AFND_to_AFD
+from automata.automata import Automata
+
+
+def afnd_enesimo_desde_el_final(n: int) -> Automata:
+    """AFND de n + 1 estados para "el n-ésimo símbolo desde el final es 'a'"; su AFD tiene 2^n estados."""
+    afnd = Automata(tipo='AFND')
+    for i in range(n + 1):
+        afnd.agregar_estado(f"s{i}", es_final=(i == n))
+    afnd.agregar_transicion('s0', 'a', 's0')
+    afnd.agregar_transicion('s0', 'b', 's0')
+    afnd.agregar_transicion('s0', 'a', 's1')
+    for i in range(1, n):
+        afnd.agregar_transicion(f"s{i}", 'a', f"s{i + 1}")
+        afnd.agregar_transicion(f"s{i}", 'b', f"s{i + 1}")
+    return afnd
+
+
+class Command(BaseCommand):
+    help = 'Compara la conversión AFND -> AFD en serie y en paralelo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--n', type=int, default=14, help='El AFD resultante tiene 2^n estados')
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+        parser.add_argument('--json', action='store_true', help='Salida en formato JSON')
+
+    def handle(self, *args, **options):
+        converter = AFND_to_AFD()
+        converter.afnd = afnd_enesimo_desde_el_final(options['n'])
+
+        resultados = []
+        inicio = time.perf_counter()
+        referencia = converter.convertir().obtener_transiciones()
+        resultados.append({'mode': 'serial', 'workers': 1, 'seconds': time.perf_counter() - inicio})
+
+        for procesos in options['workers']:
+            inicio = time.perf_counter()
+            afd = converter.convertir_paralelo(procesos=procesos, frontera_minima=1)
+            segundos = time.perf_counter() - inicio
+            if afd.obtener_transiciones() != referencia:
+                raise RuntimeError(f"El resultado con {procesos} procesos difiere del serie")
+            resultados.append({'mode': 'parallel', 'workers': procesos, 'seconds': segundos})
+
+        if options['json']:
+            self.stdout.write(json.dumps({'states': len(referencia), 'results': resultados}))
+            return
+
+        self.stdout.write(f"Estados del AFD: {len(referencia)}")
+        base = resultados[0]['seconds']
+        for resultado in resultados:
+            self.stdout.write(
+                f"{resultado['mode']:>8} x{resultado['workers']:<3} "
+                f"{resultado['seconds']:8.3f} s  (x{base / resultado['seconds']:.2f})"
+            )
@@ -0,0 +1,124 @@
+"""
+Mide lecturas y escrituras concurrentes sobre SQLite con la configuración por
+defecto y con la configuración para concurrencia (WAL, busy_timeout, IMMEDIATE).
+
+Cada modo usa una base de datos temporal nueva.
+Uso: python manage.py bench_storage --readers 4 --writers 2 --seconds 3
+"""
+import json
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+from django.test.utils import override_settings
+
+from automata.models import AutomataModel
+
+from ._tempdb import temporary_database
+
+NODES = [{'id': f'q{i}', 'label': f'q{i}', 'initial': i == 0, 'final': i == 9} for i in range(10)]
+EDGES = [{'from': f'q{i}', 'to': f'q{(i + 1) % 10}', 'label': 'a'} for i in range(10)]
+
+MODES = {
+    # Journal por defecto, transacciones DEFERRED, sin PRAGMA ni conexiones persistentes
+    'default': {'OPTIONS': {}, 'CONN_MAX_AGE': 0, 'pragmas': {}},
+    # La configuración de settings.py
+    'wal': None,
+}
+
+
+def _writer(ids, stop, stats):
+    i = 0
+    while not stop.is_set():
+        try:
+            if i % 2 == 0:
+                automata = AutomataModel.objects.create(
+                    name=f'bench {i}', automata_type='AFD', nodes=NODES, edges=EDGES
+                )
+                ids.append(automata.id)
+            else:
+                # Como save_automata al actualizar: leer y escribir en una transacción
+                with transaction.atomic():
+                    automata = AutomataModel.objects.get(id=ids[i % len(ids)])
+                    automata.name = f'bench {i}'
+                    automata.save()
+            stats['writes'] += 1
+        except OperationalError:
+            stats['errors'] += 1
+        i += 1
+    connection.close()
+
+
+def _reader(ids, stop, stats):
+    i = 0
+    while not stop.is_set():
+        try:
+            # Las dos consultas de load_automata
+            list(AutomataModel.objects.order_by('-updated_at')[:50])
+            AutomataModel.objects.filter(id=ids[i % len(ids)]).first()
+            stats['reads'] += 1
+        except OperationalError:
+            stats['errors'] += 1
+        i += 1
+    connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Compara el rendimiento concurrente de SQLite por defecto y en modo WAL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=3.0)
+        parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES))
+        parser.add_argument('--json', action='store_true', help='Salida en formato JSON')
+
+    def handle(self, *args, **options):
+        resultados = [self._run(mode, options) for mode in options['modes']]
+
+        if options['json']:
+            self.stdout.write(json.dumps(resultados))
+            return
+        for r in resultados:
+            self.stdout.write(
+                f"{r['mode']:>8}: {r['reads_per_second']:9.1f} lecturas/s "
+                f"{r['writes_per_second']:8.1f} escrituras/s  errores: {r['errors']}"
+            )
+
+    def _run(self, mode, options):
+        overrides = MODES[mode] or {}
+        db_overrides = {key: overrides[key] for key in ('OPTIONS', 'CONN_MAX_AGE') if key in overrides}
+        pragmas = {'AUTOMATA_SQLITE_PRAGMAS': overrides['pragmas']} if 'pragmas' in overrides else {}
+
+        with override_settings(**pragmas), temporary_database(**db_overrides):
+            ids = [
+                AutomataModel.objects.create(name=f'seed {i}', automata_type='AFD',
+                                             nodes=NODES, edges=EDGES).id
+                for i in range(200)
+            ]
+            connection.close()
+            return self._measure(mode, ids, options)
+
+    def _measure(self, mode, ids, options):
+        stop = threading.Event()
+        # Un contador por hilo: se suman al final
+        stats = [{'reads': 0, 'writes': 0, 'errors': 0} for _ in range(options['writers'] + options['readers'])]
+        trabajos = [_writer] * options['writers'] + [_reader] * options['readers']
+        hilos = [threading.Thread(target=trabajo, args=(ids, stop, stats[i])) for i, trabajo in enumerate(trabajos)]
+
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for hilo in hilos:
+            hilo.join()
+        segundos = time.perf_counter() - inicio
+
+        return {
+            'mode': mode,
+            'reads_per_second': sum(s['reads'] for s in stats) / segundos,
+            'writes_per_second': sum(s['writes'] for s in stats) / segundos,
+            'errors': sum(s['errors'] for s in stats),
+        }
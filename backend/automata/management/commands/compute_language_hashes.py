@@ -0,0 +1,29 @@
+"""
+Calcula la huella del lenguaje de los autómatas guardados que no la tienen.
+
+Uso: python manage.py compute_language_hashes [--all]
+"""
+from django.core.management.base import BaseCommand
+
+from automata.equivalence import update_language_hash
+from automata.models import AutomataModel
+
+
+class Command(BaseCommand):
+    help = 'Calcula las huellas de lenguaje pendientes de los autómatas guardados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Recalcula también las ya calculadas')
+
+    def handle(self, *args, **options):
+        automatas = AutomataModel.objects.all()
+        if not options['all']:
+            automatas = automatas.filter(language_hash__isnull=True)
+
+        calculadas = fallidas = 0
+        for automata_id in automatas.values_list('id', flat=True).iterator():
+            if update_language_hash(automata_id) is None:
+                fallidas += 1
+            else:
+                calculadas += 1
+        self.stdout.write(f"Huellas calculadas: {calculadas}, fallidas: {fallidas}")
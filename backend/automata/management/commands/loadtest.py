@@ -0,0 +1,225 @@
+"""
+Prueba de carga de la API con clientes HTTP concurrentes.
+
+Sin --url arranca la aplicación en este proceso (servidor WSGI con hilos
+sobre una base de datos temporal) y la ataca con N clientes que repiten una
+mezcla ponderada de peticiones con autómatas y cadenas generados al azar.
+El resultado (latencias p50/p90/p99, rendimiento y errores por endpoint) se
+escribe en JSON para comparar versiones.
+
+Uso: python manage.py loadtest --clients 8 --duration 10 \
+         --mix validate=6,convert=1,save=1,load=2 --output resultado.json
+"""
+import gzip
+import http.client
+import json
+import random
+import subprocess
+import threading
+import time
+from urllib.parse import urlsplit
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+
+from ._tempdb import temporary_database
+
+DEFAULT_MIX = 'validate=6,convert=1,save=1,load=2'
+
+
+def random_automata(rng, states, alphabet, automata_type):
+    """Autómata aleatorio en el formato de la API; en un AFND hay dos aristas por estado y símbolo."""
+    nodes = [
+        {'id': f'q{i}', 'label': f'q{i}', 'initial': i == 0, 'final': i == states - 1 or rng.random() < 0.3}
+        for i in range(states)
+    ]
+    edges = []
+    for i in range(states):
+        for symbol in alphabet:
+            for destination in rng.sample(range(states), 1 if automata_type == 'AFD' else min(2, states)):
+                edges.append({'from': f'q{i}', 'to': f'q{destination}', 'label': symbol})
+    return {'automataType': automata_type, 'nodes': nodes, 'edges': edges}
+
+
+def percentile(ordered, fraction):
+    """Percentil por rango más cercano de una lista ordenada."""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class Workload:
+    """Genera peticiones (método, ruta, cuerpo) según la mezcla."""
+
+    def __init__(self, mix, states, input_length, seed):
+        self.rng = random.Random(seed)
+        self.states = states
+        self.input_length = input_length
+        self.endpoints = list(mix)
+        self.weights = [mix[e] for e in self.endpoints]
+        # Un repertorio fijo de autómatas: así las cachés se comportan como con tráfico real
+        self.pool = [
+            random_automata(self.rng, states, 'ab', 'AFD' if i % 2 else 'AFND') for i in range(16)
+        ]
+        self.saved_ids = []
+        self.lock = threading.Lock()
+
+    def next_request(self, rng):
+        endpoint = rng.choices(self.endpoints, self.weights)[0]
+        automata = rng.choice(self.pool)
+        data = {'nodes': automata['nodes'], 'edges': automata['edges']}
+        if endpoint == 'validate':
+            text = ''.join(rng.choice('ab') for _ in range(rng.randint(0, self.input_length)))
+            return endpoint, 'POST', '/api/validate/', {
+                'input': text, 'automataType': automata['automataType'], 'automataData': data
+            }
+        if endpoint == 'convert':
+            return endpoint, 'POST', '/api/automata/convert/', dict(data, compact=True)
+        if endpoint == 'save':
+            return endpoint, 'POST', '/api/automata/save/', dict(
+                data, name='carga', automataType=automata['automataType']
+            )
+        if endpoint == 'load':
+            with self.lock:
+                saved = rng.choice(self.saved_ids) if self.saved_ids else None
+            return endpoint, 'GET', f'/api/automata/load/?id={saved}' if saved else '/api/automata/load/', None
+        raise CommandError(f"Endpoint desconocido en la mezcla: {endpoint}")
+
+
+class Command(BaseCommand):
+    help = 'Mide latencia y rendimiento de la API bajo carga concurrente'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Servidor ya arrancado (por defecto se arranca uno local)')
+        parser.add_argument('--clients', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=10.0, help='Segundos de carga')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help='endpoint=peso separados por comas')
+        parser.add_argument('--states', type=int, default=8, help='Estados de los autómatas generados')
+        parser.add_argument('--input-length', type=int, default=200, help='Longitud máxima de las cadenas')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Fichero donde escribir el resultado JSON')
+
+    def handle(self, *args, **options):
+        try:
+            mix = {
+                name.strip(): float(weight)
+                for name, weight in (part.split('=') for part in options['mix'].split(','))
+            }
+        except ValueError:
+            raise CommandError("--mix debe tener la forma endpoint=peso,endpoint=peso")
+        workload = Workload(mix, options['states'], options['input_length'], options['seed'])
+
+        if options['url']:
+            result = self._load(urlsplit(options['url']), workload, options)
+        else:
+            with temporary_database():
+                server = ThreadedWSGIServer(('127.0.0.1', 0), _QuietHandler)
+                server.set_app(get_wsgi_application())
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+                try:
+                    result = self._load(urlsplit(f'http://127.0.0.1:{server.server_port}'), workload, options)
+                finally:
+                    server.shutdown()
+                    server.server_close()
+
+        output = json.dumps(result, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    def _load(self, url, workload, options):
+        stop = threading.Event()
+        samples = [[] for _ in range(options['clients'])]
+        clients = [
+            threading.Thread(target=self._client, args=(url, workload, stop, samples[i], options['seed'] + i + 1))
+            for i in range(options['clients'])
+        ]
+        start = time.perf_counter()
+        for client in clients:
+            client.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - start
+
+        by_endpoint = {}
+        for client_samples in samples:
+            for endpoint, status_code, seconds in client_samples:
+                by_endpoint.setdefault(endpoint, []).append((status_code, seconds))
+        all_samples = [sample for values in by_endpoint.values() for sample in values]
+
+        return {
+            'config': {
+                key: options[key] for key in ('clients', 'duration', 'mix', 'states', 'input_length', 'seed')
+            },
+            'revision': _git_revision(),
+            'django': django.get_version(),
+            'target': 'local' if not options['url'] else options['url'],
+            'elapsedSeconds': elapsed,
+            'total': self._summary(all_samples, elapsed),
+            'endpoints': {endpoint: self._summary(values, elapsed) for endpoint, values in sorted(by_endpoint.items())},
+        }
+
+    @staticmethod
+    def _summary(values, elapsed):
+        latencies = sorted(seconds * 1000 for _, seconds in values)
+        statuses = {}
+        for status_code, _ in values:
+            statuses[str(status_code)] = statuses.get(str(status_code), 0) + 1
+        errors = sum(1 for status_code, _ in values if not 200 <= status_code < 300)
+        return {
+            'requests': len(values),
+            'throughput': len(values) / elapsed if elapsed else 0.0,
+            'errors': errors,
+            'errorRate': errors / len(values) if values else 0.0,
+            'statuses': statuses,
+            'latencyMs': {
+                'p50': percentile(latencies, 0.50),
+                'p90': percentile(latencies, 0.90),
+                'p99': percentile(latencies, 0.99),
+                'max': latencies[-1] if latencies else None,
+            },
+        }
+
+    @staticmethod
+    def _client(url, workload, stop, samples, seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            endpoint, method, path, body = workload.next_request(rng)
+            payload = json.dumps(body).encode('utf-8') if body is not None else None
+            headers = {'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'} if payload else {}
+            start = time.perf_counter()
+            status_code = 0  # 0 = error de conexión o respuesta ilegible
+            try:
+                connection = http.client.HTTPConnection(url.hostname, url.port, timeout=60)
+                connection.request(method, path, body=payload, headers=headers)
+                response = connection.getresponse()
+                content = response.read()
+                connection.close()
+                if endpoint == 'save' and response.status == 200:
+                    if response.getheader('Content-Encoding') == 'gzip':
+                        content = gzip.decompress(content)
+                    saved_id = json.loads(content)['id']
+                    with workload.lock:
+                        workload.saved_ids.append(saved_id)
+                status_code = response.status
+            except (OSError, http.client.HTTPException, ValueError, KeyError, TypeError):
+                status_code = 0
+            samples.append((endpoint, status_code, time.perf_counter() - start))
@@ -0,0 +1,33 @@
+"""
+Ejecuta la precarga de autómatas en primer plano e informa del resultado.
+
+La caché de tablas compiladas es de cada proceso, así que desde un comando
+solo tiene efecto duradero el almacén de conversiones (útil antes de un
+despliegue); los trabajadores precargan lo suyo al arrancar.
+Uso: python manage.py warm_cache --limit 100 --budget 10
+"""
+import json
+
+from django.core.management.base import BaseCommand
+
+from automata.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = 'Precarga los autómatas guardados más recientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Número máximo de autómatas')
+        parser.add_argument('--budget', type=float, default=None, help='Tiempo máximo en segundos')
+        parser.add_argument('--json', action='store_true', help='Salida en formato JSON')
+
+    def handle(self, *args, **options):
+        stats = warm_up(limit=options['limit'], budget_seconds=options['budget'])
+        if options['json']:
+            self.stdout.write(json.dumps(stats))
+            return
+        self.stdout.write(
+            f"Compilados: {stats['compiled']}, convertidos: {stats['converted']}, "
+            f"omitidos: {stats['skipped']}, fallidos: {stats['failed']} "
+            f"en {stats['seconds']:.2f} s{'' if stats['complete'] else ' (presupuesto agotado)'}"
+        )
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('automata', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversionResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('minimized', models.BooleanField(default=False)),
+                ('nodes', models.JSONField()),
+                ('edges', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('fingerprint', 'minimized'), name='unique_conversion_fingerprint')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('automata', '0002_conversionresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='automatamodel',
+            name='language_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('automata', '0003_automatamodel_language_hash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='automatamodel',
+            index=models.Index(fields=['-updated_at'], name='automata_updated_at_idx'),
+        ),
+    ]
@@ -0,0 +1,347 @@
+"""
+Minimización incremental de la tabla compilada de un AFD guardado.
+
+Se mantiene la partición de los estados útiles en bloques de estados
+equivalentes (el AFD mínimo, incluidos los bloques no alcanzables). Cada
+bloque tiene una firma: si es final y, por columna, el bloque destino (las
+transiciones a estados inútiles no cuentan). En un AFD mínimo las firmas son
+únicas, así que un registro firma -> bloque encuentra en O(1) el bloque de
+un estado cuyos sucesores ya están clasificados.
+
+Al editar, solo puede cambiar el lenguaje de los estados desde los que se
+llega a uno modificado. Sus sucesores fuera de ese conjunto no cambian, así
+que los demás bloques siguen siendo correctos. Los estados afectados se
+clasifican de nuevo por componentes fuertemente conexas, empezando por las
+que no llevan a otras afectadas:
+
+- un estado sin ciclo se clasifica por su firma en el registro;
+- una componente con ciclos se refina primero por dentro (Moore, con los
+  sucesores de fuera ya clasificados). Luego se busca un bloque existente
+  equivalente a uno de sus estados entre los que comparten una de sus
+  transiciones de salida, y se comprueba emparejando sucesores. Si uno
+  coincide, coincide toda la componente; si no, sus clases son bloques nuevos.
+
+El coste es proporcional a los estados que llegan a la edición (y sus
+transiciones), no al tamaño del AFD.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+
+from .compiled import SIN_TRANSICION, AFDCompilado
+from .config import INCREMENTAL_MINIMIZATION
+from .epsilon import componentes_fuertes
+
+# Firma de un bloque: (es final, ((columna, bloque destino), ...) ordenado por columna)
+Firma = Tuple[bool, Tuple[Tuple[int, int], ...]]
+
+
+def get_minimization_setting(name):
+    return getattr(settings, 'AUTOMATA_INCREMENTAL_MINIMIZATION', {}).get(name, INCREMENTAL_MINIMIZATION[name])
+
+
+class MinimizacionIncremental:
+    """
+    Partición en estados equivalentes de una tabla compilada, actualizable
+    tras editarla con ``actualizar``. ``minimo`` devuelve el AFD mínimo.
+    """
+
+    def __init__(self, compilado: AFDCompilado):
+        # Filas (columna -> destino) y finales tal como se clasificaron
+        self._filas: List[Dict[int, int]] = []
+        self._finales: List[bool] = []
+        # Predecesores de cada estado, con cuántas transiciones llegan desde cada uno
+        self._predecesores: List[Dict[int, int]] = []
+        # Bloque de cada estado (-1 si no lleva a ningún final)
+        self.bloque: List[int] = []
+
+        self._miembros: Dict[int, Set[int]] = {}
+        self._firmas: Dict[int, Firma] = {}
+        self._registro: Dict[Firma, int] = {}
+        # Bloques por transición (columna, bloque destino) y por finalidad y columnas usadas
+        self._por_transicion: Dict[Tuple[int, int], Set[int]] = {}
+        self._por_forma: Dict[Tuple[bool, Tuple[int, ...]], Set[int]] = {}
+        self._siguiente = 0
+        self.actualizar(compilado, range(len(compilado.tabla)))
+
+    @property
+    def num_bloques(self) -> int:
+        return len(self._miembros)
+
+    def actualizar(self, compilado: AFDCompilado, cambiados: Iterable[int]) -> int:
+        """
+        Reclasifica tras editar la tabla. ``cambiados`` son los estados cuya
+        fila o finalidad ha cambiado (incluidos los nuevos y los eliminados).
+        Devuelve cuántos estados se han reclasificado.
+        """
+        while len(self._filas) < len(compilado.tabla):
+            self._filas.append({})
+            self._finales.append(False)
+            self._predecesores.append({})
+            self.bloque.append(-1)
+
+        cambiados = set(cambiados)
+        for estado in cambiados:
+            fila = {c: d for c, d in enumerate(compilado.tabla[estado]) if d != SIN_TRANSICION}
+            for destino in self._filas[estado].values():
+                predecesores = self._predecesores[destino]
+                predecesores[estado] -= 1
+                if not predecesores[estado]:
+                    del predecesores[estado]
+            for destino in fila.values():
+                self._predecesores[destino][estado] = self._predecesores[destino].get(estado, 0) + 1
+            self._filas[estado] = fila
+            self._finales[estado] = bool(compilado.finales[estado])
+
+        # Estados cuyo lenguaje puede haber cambiado: los que llegan a uno cambiado
+        afectados = set(cambiados)
+        pendientes = list(cambiados)
+        while pendientes:
+            for origen in self._predecesores[pendientes.pop()]:
+                if origen not in afectados:
+                    afectados.add(origen)
+                    pendientes.append(origen)
+
+        for estado in afectados:
+            bloque = self.bloque[estado]
+            if bloque >= 0:
+                self.bloque[estado] = -1
+                self._miembros[bloque].discard(estado)
+                if not self._miembros[bloque]:
+                    self._eliminar_bloque(bloque)
+
+        # Útiles: llegan a un final, directamente o a través de un bloque que se conserva
+        utiles = {
+            estado for estado in afectados
+            if self._finales[estado] or any(
+                d not in afectados and self.bloque[d] >= 0 for d in self._filas[estado].values()
+            )
+        }
+        pendientes = list(utiles)
+        while pendientes:
+            for origen in self._predecesores[pendientes.pop()]:
+                if origen in afectados and origen not in utiles:
+                    utiles.add(origen)
+                    pendientes.append(origen)
+
+        # Componentes en orden topológico inverso: los sucesores ya están clasificados
+        estados = list(utiles)
+        posicion = {estado: i for i, estado in enumerate(estados)}
+        sucesores = [
+            [posicion[d] for d in self._filas[estado].values() if d in posicion]
+            for estado in estados
+        ]
+        for componente in componentes_fuertes(sucesores):
+            self._clasificar([estados[i] for i in componente])
+        return len(afectados)
+
+    def _clasificar(self, componente: List[int]) -> None:
+        dentro = set(componente)
+        externas: Dict[int, Tuple[Tuple[int, int], ...]] = {}
+        internas: Dict[int, List[Tuple[int, int]]] = {}
+        for estado in componente:
+            fila = self._filas[estado]
+            externas[estado] = tuple(
+                (c, self.bloque[d]) for c, d in sorted(fila.items()) if d not in dentro and self.bloque[d] >= 0
+            )
+            internas[estado] = [(c, d) for c, d in sorted(fila.items()) if d in dentro]
+
+        if len(componente) == 1 and not internas[componente[0]]:
+            estado = componente[0]
+            firma = (self._finales[estado], externas[estado])
+            bloque = self._registro.get(firma)
+            if bloque is None:
+                bloque = self._crear_bloque(firma)
+            self._asignar(estado, bloque)
+            return
+
+        # Refinamiento de Moore dentro de la componente
+        clase = {estado: int(self._finales[estado]) for estado in componente}
+        numero = len(set(clase.values()))
+        while True:
+            firmas = {
+                estado: (clase[estado], externas[estado], tuple((c, clase[d]) for c, d in internas[estado]))
+                for estado in componente
+            }
+            orden: Dict[tuple, int] = {}
+            for estado in componente:
+                orden.setdefault(firmas[estado], len(orden))
+            clase = {estado: orden[firmas[estado]] for estado in componente}
+            if len(orden) == numero:
+                break
+            numero = len(orden)
+        representantes: Dict[int, int] = {}
+        for estado in componente:
+            representantes.setdefault(clase[estado], estado)
+
+        correspondencia = self._buscar_equivalente(representantes, clase, externas, internas)
+        if correspondencia is None:
+            correspondencia = {c: self._reservar_bloque() for c in representantes}
+            for c, estado in representantes.items():
+                filas = sorted(externas[estado] + tuple((col, correspondencia[clase[d]]) for col, d in internas[estado]))
+                self._registrar(correspondencia[c], (self._finales[estado], tuple(filas)))
+        for estado in componente:
+            self._asignar(estado, correspondencia[clase[estado]])
+
+    def _buscar_equivalente(self, representantes: Dict[int, int], clase: Dict[int, int],
+                            externas, internas) -> Optional[Dict[int, int]]:
+        """
+        Bloques existentes equivalentes a las clases de una componente, o None.
+        Si una clase es equivalente a un bloque, todas las que alcanza también:
+        basta con probar los candidatos de una de ellas.
+        """
+        candidatos = None
+        inicio = None
+        for c, estado in representantes.items():
+            columnas = tuple(sorted(col for col, _ in externas[estado] + tuple(internas[estado])))
+            conjuntos = [self._por_forma.get((self._finales[estado], columnas), set())]
+            conjuntos += [self._por_transicion.get(transicion, set()) for transicion in externas[estado]]
+            menor = min(conjuntos, key=len)
+            if candidatos is None or len(menor) < len(candidatos):
+                candidatos, inicio = menor, c
+            if not candidatos:
+                return None
+
+        for candidato in list(candidatos):
+            correspondencia = self._emparejar(inicio, candidato, representantes, clase, externas, internas)
+            if correspondencia is not None:
+                return correspondencia
+        return None
+
+    def _emparejar(self, inicio: int, candidato: int, representantes, clase, externas,
+                   internas) -> Optional[Dict[int, int]]:
+        """Empareja la clase ``inicio`` con el bloque ``candidato`` y, a partir de ahí, sus sucesores."""
+        correspondencia = {inicio: candidato}
+        pendientes = [inicio]
+        while pendientes:
+            c = pendientes.pop()
+            estado = representantes[c]
+            final, transiciones = self._firmas[correspondencia[c]]
+            destinos = dict(transiciones)
+            if (final != self._finales[estado]
+                    or len(destinos) != len(externas[estado]) + len(internas[estado])
+                    or any(destinos.get(col) != b for col, b in externas[estado])):
+                return None
+            for col, d in internas[estado]:
+                esperado = destinos.get(col)
+                if esperado is None:
+                    return None
+                asignado = correspondencia.get(clase[d])
+                if asignado is None:
+                    correspondencia[clase[d]] = esperado
+                    pendientes.append(clase[d])
+                elif asignado != esperado:
+                    return None
+        # La componente es fuertemente conexa: desde una clase se llega a todas
+        return correspondencia if len(correspondencia) == len(representantes) else None
+
+    def _reservar_bloque(self) -> int:
+        bloque = self._siguiente
+        self._siguiente += 1
+        self._miembros[bloque] = set()
+        return bloque
+
+    def _registrar(self, bloque: int, firma: Firma) -> None:
+        self._firmas[bloque] = firma
+        self._registro[firma] = bloque
+        for transicion in firma[1]:
+            self._por_transicion.setdefault(transicion, set()).add(bloque)
+        forma = (firma[0], tuple(col for col, _ in firma[1]))
+        self._por_forma.setdefault(forma, set()).add(bloque)
+
+    def _crear_bloque(self, firma: Firma) -> int:
+        bloque = self._reservar_bloque()
+        self._registrar(bloque, firma)
+        return bloque
+
+    def _eliminar_bloque(self, bloque: int) -> None:
+        del self._miembros[bloque]
+        firma = self._firmas.pop(bloque)
+        del self._registro[firma]
+        for transicion in firma[1]:
+            self._por_transicion[transicion].discard(bloque)
+            if not self._por_transicion[transicion]:
+                del self._por_transicion[transicion]
+        forma = (firma[0], tuple(col for col, _ in firma[1]))
+        self._por_forma[forma].discard(bloque)
+        if not self._por_forma[forma]:
+            del self._por_forma[forma]
+
+    def _asignar(self, estado: int, bloque: int) -> None:
+        self.bloque[estado] = bloque
+        self._miembros[bloque].add(estado)
+
+    def minimo(self, compilado: AFDCompilado) -> AFDCompilado:
+        """
+        AFD mínimo de la tabla: los bloques alcanzables desde el del estado
+        inicial, numerados en BFS. El lenguaje vacío es un único estado no final.
+        """
+        columnas = len(compilado.simbolos)
+        inicial = self.bloque[compilado.inicial]
+        if inicial < 0:
+            return AFDCompilado(['Q0'], list(compilado.simbolos), [[SIN_TRANSICION] * columnas], [False], 0)
+
+        numero = {inicial: 0}
+        orden = [inicial]
+        tabla = []
+        for bloque in orden:
+            fila = [SIN_TRANSICION] * columnas
+            for columna, destino in self._firmas[bloque][1]:
+                if destino not in numero:
+                    numero[destino] = len(orden)
+                    orden.append(destino)
+                fila[columna] = numero[destino]
+            tabla.append(fila)
+        finales = [self._firmas[bloque][0] for bloque in orden]
+        return AFDCompilado([f'Q{i}' for i in range(len(orden))], list(compilado.simbolos), tabla, finales, 0)
+
+
+class MinimizerCache:
+    """
+    Minimizaciones incrementales de los autómatas guardados editados en este
+    proceso, por id y con expulsión LRU. Cada una recuerda la versión
+    (``updated_at``) del autómata que refleja: si otro proceso lo cambió
+    desde entonces, se descarta y se construye de nuevo.
+    """
+
+    def __init__(self):
+        self._minimizaciones: 'OrderedDict[object, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def enabled(self) -> bool:
+        return bool(get_minimization_setting('enabled'))
+
+    def update(self, automata_id, version, compilado: AFDCompilado,
+               cambiados: Iterable[int]) -> MinimizacionIncremental:
+        """
+        Minimización de ``compilado`` tras editarlo. Si la guardada refleja la
+        versión anterior a la edición solo se reclasifica lo que alcanza a
+        ``cambiados``. La devuelta queda fuera de la caché hasta ``put``.
+        """
+        with self._lock:
+            guardada = self._minimizaciones.pop(automata_id, None)
+        if guardada is not None and guardada[0] == version:
+            minimizacion = guardada[1]
+            minimizacion.actualizar(compilado, cambiados)
+            return minimizacion
+        return MinimizacionIncremental(compilado)
+
+    def put(self, automata_id, version, minimizacion: MinimizacionIncremental) -> None:
+        with self._lock:
+            self._minimizaciones[automata_id] = (version, minimizacion)
+            self._minimizaciones.move_to_end(automata_id)
+            while len(self._minimizaciones) > get_minimization_setting('cache_size'):
+                self._minimizaciones.popitem(last=False)
+
+    def discard(self, automata_id) -> None:
+        with self._lock:
+            self._minimizaciones.pop(automata_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._minimizaciones.clear()
+
+
+minimizer_cache = MinimizerCache()
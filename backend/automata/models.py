@@ -1,5 +1,10 @@
 from django.db import models
 
+
+def row_version(updated_at):
+    """Versión de una fila guardada: su ``updated_at`` en microsegundos."""
+    return int(updated_at.timestamp()) * 1_000_000 + updated_at.microsecond
+
 class AutomataModel(models.Model):
     """
     Modelo para guardar autómatas en la base de datos.
@@ -12,11 +17,24 @@ class AutomataModel(models.Model):
     ])
     nodes = models.JSONField()
     edges = models.JSONField()
+    # Huella del lenguaje (AFD mínimo); se calcula en segundo plano al guardar
+    language_hash = models.CharField(max_length=64, blank=True, null=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # load_automata lista por fecha de modificación descendente
+        indexes = [
+            models.Index(fields=['-updated_at'], name='automata_updated_at_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.automata_type})"
+
+    @property
+    def version(self):
+        """Identifica el contenido actual: lo compilado de otra versión está obsoleto."""
+        return row_version(self.updated_at)
     
     @property
     def to_dict(self):
@@ -28,6 +46,36 @@ class AutomataModel(models.Model):
             'automataType': self.automata_type,
             'nodes': self.nodes,
             'edges': self.edges,
+            'languageHash': self.language_hash,
             'createdAt': self.created_at.isoformat(),
             'updatedAt': self.updated_at.isoformat(),
-        }
\ No newline at end of file
+        }
+
+
+class ConversionResult(models.Model):
+    """
+    AFD obtenido al convertir (y opcionalmente minimizar) un AFND, guardado
+    por la huella del AFND para no repetir la construcción de subconjuntos.
+    """
+    fingerprint = models.CharField(max_length=64)
+    minimized = models.BooleanField(default=False)
+    nodes = models.JSONField()
+    edges = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['fingerprint', 'minimized'], name='unique_conversion_fingerprint'),
+        ]
+
+    def __str__(self):
+        return f"{self.fingerprint[:12]} ({'mínimo' if self.minimized else 'AFD'})"
+
+    @property
+    def to_dict(self):
+        """Convierte el resultado al formato de ``automata_to_data``."""
+        return {
+            'nodes': self.nodes,
+            'edges': self.edges,
+        }
@@ -0,0 +1,84 @@
+"""
+Validación por lotes compartiendo prefijos.
+
+Las cadenas se ordenan y se recorren en ese orden, que es el de un recorrido
+en profundidad de su trie: cada cadena parte del estado al que llegó el
+prefijo que comparte con la anterior, guardado en una pila con el estado
+tras cada carácter del camino actual. Así el autómata avanza una vez por
+arista del trie (caracteres distintos de los prefijos) y no una vez por
+carácter de la entrada, sin construir el trie. Si un prefijo ya no puede
+llevar a un final, todas las cadenas que lo comparten se rechazan sin avanzar.
+"""
+from itertools import islice
+from typing import Callable, List, Optional, Sequence, Tuple, TypeVar
+
+Estado = TypeVar('Estado')
+
+
+def prefijo_comun(a: str, b: str) -> int:
+    """Longitud del prefijo común, por búsqueda binaria comparando trozos."""
+    alto = min(len(a), len(b))
+    if a[:alto] == b[:alto]:
+        return alto
+    # a[:bajo] == b[:bajo] y a[:alto] != b[:alto]
+    bajo = 0
+    while alto - bajo > 1:
+        medio = (bajo + alto) // 2
+        if a[:medio] == b[:medio]:
+            bajo = medio
+        else:
+            alto = medio
+    return bajo
+
+
+def ordenar_por_prefijos(cadenas: Sequence[str]) -> Tuple[List[int], List[int]]:
+    """Índices de las cadenas en orden y prefijo común de cada una con la anterior."""
+    orden = sorted(range(len(cadenas)), key=cadenas.__getitem__)
+    comunes = [0] * len(orden)
+    for k in range(1, len(orden)):
+        comunes[k] = prefijo_comun(cadenas[orden[k - 1]], cadenas[orden[k]])
+    return orden, comunes
+
+
+def aristas_trie(cadenas: Sequence[str], comunes: List[int]) -> int:
+    """Aristas del trie de las cadenas: los pasos que da ``recorrer_por_prefijos``."""
+    return sum(len(cadena) for cadena in cadenas) - sum(comunes)
+
+
+def comparten_prefijos(cadenas: Sequence[str], comunes: List[int], fraccion: float) -> bool:
+    """Indica si los prefijos compartidos suman al menos ``fraccion`` de los caracteres."""
+    total = sum(len(cadena) for cadena in cadenas)
+    return total > 0 and total - aristas_trie(cadenas, comunes) >= fraccion * total
+
+
+def recorrer_por_prefijos(cadenas: Sequence[str], inicial: Estado,
+                          paso: Callable[[Estado, str], Optional[Estado]],
+                          es_final: Callable[[Estado], bool],
+                          orden: Optional[List[int]] = None,
+                          comunes: Optional[List[int]] = None) -> List[bool]:
+    """
+    Acepta o rechaza cada cadena. ``paso(estado, símbolo)`` devuelve el
+    siguiente estado o None si la cadena ya no puede aceptarse. ``orden`` y
+    ``comunes`` son los de ``ordenar_por_prefijos``, si ya se han calculado.
+    """
+    if orden is None or comunes is None:
+        orden, comunes = ordenar_por_prefijos(cadenas)
+
+    resultados = [False] * len(cadenas)
+    # pila[k]: estado tras los k primeros caracteres del camino actual. Si el
+    # camino murió, la pila acaba en el último estado vivo
+    pila = [inicial]
+    for i, comun in zip(orden, comunes):
+        if comun >= len(pila):
+            # Comparte con la anterior el prefijo que llevó a un estado muerto
+            continue
+        del pila[comun + 1:]
+        estado = pila[-1]
+        for simbolo in islice(cadenas[i], comun, None):
+            estado = paso(estado, simbolo)
+            if estado is None:
+                break
+            pila.append(estado)
+        else:
+            resultados[i] = es_final(estado)
+    return resultados
@@ -0,0 +1,149 @@
+"""
+Perfilado bajo demanda de peticiones individuales.
+
+Una petición con la cabecera ``X-Profile: 1`` y autorizada (``X-Profile-Token``
+igual al token configurado, o un usuario staff) se ejecuta bajo cProfile y
+tracemalloc. El perfil se guarda en un búfer circular de ficheros en disco
+y la respuesta lleva un resumen en cabeceras:
+- X-Profile-Id: identificador para descargar el perfil (pstats)
+- X-Profile-Top: funciones con más tiempo propio
+- X-Profile-Alloc: líneas con más memoria reservada al terminar
+- X-Profile-Peak: pico de memoria reservada durante la petición
+"""
+import cProfile
+import hmac
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+
+from django.conf import settings
+
+from .config import PROFILING
+from .utils import logger
+
+PROFILE_ID = re.compile(r'^[0-9]+-[0-9a-f]{8}$')
+
+# cProfile y tracemalloc son globales al proceso: un perfil cada vez
+_lock = threading.Lock()
+
+
+def get_profiling_setting(name):
+    return getattr(settings, 'AUTOMATA_PROFILING', {}).get(name, PROFILING[name])
+
+
+def is_authorized(request):
+    token = get_profiling_setting('token')
+    if token and hmac.compare_digest(request.META.get('HTTP_X_PROFILE_TOKEN', ''), token):
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_authenticated and user.is_staff)
+
+
+def _wants_profile(request):
+    if not get_profiling_setting('enabled'):
+        return False
+    if request.META.get('HTTP_X_PROFILE') == '1':
+        return is_authorized(request)
+    return any(request.path.startswith(prefix) for prefix in get_profiling_setting('paths'))
+
+
+def profile_path(profile_id):
+    """Ruta del fichero de un perfil, o None si el id no es válido."""
+    if not PROFILE_ID.match(profile_id):
+        return None
+    return os.path.join(get_profiling_setting('directory'), f'{profile_id}.prof')
+
+
+def list_profiles():
+    """Ids de los perfiles guardados, del más reciente al más antiguo."""
+    directory = get_profiling_setting('directory')
+    if not os.path.isdir(directory):
+        return []
+    ids = [name[:-5] for name in os.listdir(directory) if name.endswith('.prof') and PROFILE_ID.match(name[:-5])]
+    return sorted(ids, reverse=True)
+
+
+def _store(profiler):
+    """Guarda el perfil y elimina los más antiguos por encima de max_profiles."""
+    directory = get_profiling_setting('directory')
+    os.makedirs(directory, exist_ok=True)
+    profile_id = f'{time.time_ns()}-{uuid.uuid4().hex[:8]}'
+    profiler.dump_stats(profile_path(profile_id))
+    for old in list_profiles()[get_profiling_setting('max_profiles'):]:
+        try:
+            os.remove(profile_path(old))
+        except FileNotFoundError:
+            pass
+    return profile_id
+
+
+def _top_functions(profiler, top):
+    """Funciones con más tiempo propio (sin contar las llamadas que hacen)."""
+    stats = pstats.Stats(profiler).stats
+    hottest = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+    return '; '.join(
+        f'{os.path.basename(filename)}:{line}({function})={own_time:.4f}s'
+        for (filename, line, function), (_, _, own_time, _, _) in hottest
+    )
+
+
+def _top_allocations(snapshot, top):
+    partes = []
+    for stat in snapshot.statistics('lineno')[:top]:
+        frame = stat.traceback[0]
+        partes.append(f'{os.path.basename(frame.filename)}:{frame.lineno}={stat.size / 1024:.1f}KiB')
+    return '; '.join(partes)
+
+
+def _ascii(value):
+    return value.encode('ascii', 'backslashreplace').decode('ascii')
+
+
+class ProfilingMiddleware:
+    """Perfila las peticiones que lo piden (ver el docstring del módulo)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not _wants_profile(request):
+            return self.get_response(request)
+        if not _lock.acquire(blocking=False):
+            response = self.get_response(request)
+            response['X-Profile-Skipped'] = 'busy'
+            return response
+
+        try:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.disable()
+                snapshot = tracemalloc.take_snapshot().filter_traces([
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                ])
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
+
+            top = get_profiling_setting('top')
+            try:
+                response['X-Profile-Id'] = _store(profiler)
+            except OSError as e:
+                logger.error(f"No se pudo guardar el perfil: {str(e)}")
+            response['X-Profile-Top'] = _ascii(_top_functions(profiler, top))
+            response['X-Profile-Alloc'] = _ascii(_top_allocations(snapshot, top))
+            response['X-Profile-Peak'] = f'{peak / 1024:.1f}KiB'
+            return response
+        finally:
+            _lock.release()
@@ -0,0 +1,257 @@
+"""
+Caché de resultados de validación compartida entre autómatas equivalentes.
+
+Los resultados se guardan por la huella del lenguaje (la del AFD mínimo, ver
+fingerprint.language_fingerprint) y la cadena, no por id de autómata: dos
+autómatas que aceptan el mismo lenguaje, guardados o enviados sin id,
+comparten respuestas. Una huella siempre describe el mismo lenguaje, así que
+editar un autómata no invalida nada: el autómata editado tiene otra huella.
+
+Por cada lenguaje se guarda su AFD mínimo con los estados en el orden
+canónico de la huella (el mismo en todos los autómatas equivalentes) y, por
+prefijo de entrada, el estado al que se llega:
+
+- de cada cadena validada se guarda el estado final y, cada
+  ``checkpoint_interval`` caracteres, el intermedio; una cadena que extiende
+  una ya vista continúa desde el estado guardado más largo;
+- un rechazo por falta de transición se guarda una sola vez, como el
+  prefijo más corto sin transición, y rechaza todas sus extensiones.
+
+Los prefijos se identifican por su longitud y un resumen BLAKE2 calculado en
+una sola pasada por la cadena.
+
+Calcular el AFD mínimo de unos datos enviados cuesta mucho más que validar una
+cadena con ellos, y el editor envía datos nuevos tras cada cambio: el lenguaje
+solo se calcula la segunda vez que llegan los mismos datos.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from django.conf import settings
+
+from .afnd_to_afd import LimiteDeEstadosExcedido
+from .compiled import SIN_TRANSICION, AFDCompilado
+from .config import RESULT_CACHE
+from .fingerprint import canonical_minimal, canonical_minimal_table
+from .formats import build_automata_from_data
+from .utils import logger
+
+
+# Entradas con el resultado de una cadena pero sin su estado (ver ``accepts``)
+_ACEPTADA = -2
+_RECHAZADA = -3
+_RESULTADOS = (_ACEPTADA, _RECHAZADA)
+
+# Datos de autómata vistos una sola vez: aún no se calcula su lenguaje
+_VISTA = ''
+
+
+def get_result_cache_setting(name):
+    return getattr(settings, 'AUTOMATA_RESULT_CACHE', {}).get(name, RESULT_CACHE[name])
+
+
+def structure_key(automata_data, automata_type):
+    """Resumen de los datos de un autómata tal como llegan: evita recalcular su huella."""
+    contenido = json.dumps([automata_type, automata_data.get('nodes', []), automata_data.get('edges', [])],
+                           sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+class Language:
+    """Resultados guardados de un lenguaje: su AFD mínimo canónico y el estado de cada prefijo."""
+
+    def __init__(self, language_hash: str, minimo: AFDCompilado):
+        self.language_hash = language_hash
+        self.minimo = minimo
+        # (longitud, resumen) del prefijo -> estado del AFD mínimo, SIN_TRANSICION si no
+        # tiene o, para una cadena completa validada fuera del AFD mínimo, solo su resultado
+        self.prefixes: 'OrderedDict[Tuple[int, bytes], int]' = OrderedDict()
+        # Longitudes de los prefijos sin transición guardados: se consultan en cada cadena
+        self.dead_lengths: Set[int] = set()
+
+
+class ResultCache:
+    """
+    Lenguajes por datos de autómata y resultados por lenguaje, ambos con
+    expulsión LRU. Solo se comparten los lenguajes cuyo AFD mínimo tiene
+    como mucho ``max_states`` estados.
+    """
+
+    def __init__(self):
+        # Resumen de estructura -> huella (None si no se comparte, _VISTA si aún no se calculó)
+        self._structures: 'OrderedDict[str, Optional[str]]' = OrderedDict()
+        self._languages: 'OrderedDict[str, Language]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def enabled(self) -> bool:
+        return bool(get_result_cache_setting('enabled'))
+
+    def language(self, automata_data, automata_type) -> Optional[Language]:
+        """
+        Lenguaje de un autómata en el formato de la API, calculando su AFD
+        mínimo la segunda vez que se ven estos datos. None si es demasiado
+        grande o si es la primera vez: quien llama valida directamente.
+        """
+        clave = structure_key(automata_data, automata_type)
+        with self._lock:
+            if clave not in self._structures:
+                self._structures[clave] = _VISTA
+                self._prune_structures()
+                return None
+            self._structures.move_to_end(clave)
+            language_hash = self._structures[clave]
+            if language_hash is None:
+                return None
+            lenguaje = self._languages.get(language_hash)
+            # Si el lenguaje se expulsó, se calcula de nuevo
+            if lenguaje is not None:
+                self._languages.move_to_end(language_hash)
+                return lenguaje
+
+        lenguaje = None
+        max_states = get_result_cache_setting('max_states')
+        if len(automata_data.get('nodes', [])) <= max_states:
+            try:
+                automata = build_automata_from_data(automata_data, automata_type)
+                lenguaje = self._register(*canonical_minimal(automata, max_states))
+            except LimiteDeEstadosExcedido:
+                pass
+            except ValueError as e:
+                logger.warning(f"No se pudo calcular el lenguaje para la caché de resultados: {str(e)}")
+
+        with self._lock:
+            self._structures[clave] = lenguaje.language_hash if lenguaje is not None else None
+            self._prune_structures()
+        return lenguaje
+
+    def _prune_structures(self) -> None:
+        while len(self._structures) > get_result_cache_setting('structures'):
+            self._structures.popitem(last=False)
+
+    def table_language(self, compilado: AFDCompilado) -> Optional[Language]:
+        """
+        Lenguaje de una tabla compilada (la de un AFD guardado, que manda sobre
+        los datos enviados). La huella se recuerda en la tabla hasta que se edita.
+        """
+        huella = compilado._huella_lenguaje
+        if huella is False:
+            return None
+        if huella is not None:
+            with self._lock:
+                lenguaje = self._languages.get(huella)
+                if lenguaje is not None:
+                    self._languages.move_to_end(huella)
+                    return lenguaje
+
+        lenguaje = None
+        if len(compilado.tabla) <= get_result_cache_setting('max_states'):
+            lenguaje = self._register(*canonical_minimal_table(compilado.minimizar()))
+        compilado._huella_lenguaje = lenguaje.language_hash if lenguaje is not None else False
+        return lenguaje
+
+    def _register(self, language_hash: str, minimo: AFDCompilado) -> Optional[Language]:
+        if len(minimo.tabla) > get_result_cache_setting('max_states'):
+            return None
+        with self._lock:
+            # Si un equivalente ya lo guardó, se comparten sus resultados
+            lenguaje = self._languages.setdefault(language_hash, Language(language_hash, minimo))
+            self._languages.move_to_end(language_hash)
+            while len(self._languages) > get_result_cache_setting('languages'):
+                self._languages.popitem(last=False)
+        return lenguaje
+
+    def accepts(self, lenguaje: Language, cadena: str,
+                evaluar: Optional[Callable[[str], bool]] = None) -> Tuple[bool, bool, int]:
+        """
+        Valida ``cadena`` en el lenguaje. Devuelve el resultado, si salió
+        entero de la caché y desde qué posición se continuó la validación.
+        Si no hay ningún prefijo guardado y se indica ``evaluar`` (la tabla
+        compilada de un AFD guardado, por ejemplo), se valida con él y se
+        guarda solo el resultado.
+        """
+        intervalo = get_result_cache_setting('checkpoint_interval')
+        n = len(cadena)
+        puntos = set(range(intervalo, n, intervalo)) if intervalo > 0 else set()
+        puntos.add(n)
+        with self._lock:
+            muertos = {longitud for longitud in lenguaje.dead_lengths if longitud <= n}
+
+        # Resúmenes de los prefijos que se consultan, en una sola pasada
+        claves: Dict[int, Tuple[int, bytes]] = {}
+        resumen = hashlib.blake2b(digest_size=16)
+        anterior = 0
+        for posicion in sorted(puntos | muertos):
+            resumen.update(cadena[anterior:posicion].encode('utf-8', 'surrogatepass'))
+            anterior = posicion
+            claves[posicion] = (posicion, resumen.digest())
+
+        minimo = lenguaje.minimo
+        posicion, estado = 0, minimo.inicial
+        with self._lock:
+            for longitud in sorted(claves):
+                guardado = lenguaje.prefixes.get(claves[longitud])
+                if guardado is None:
+                    continue
+                lenguaje.prefixes.move_to_end(claves[longitud])
+                if guardado == SIN_TRANSICION:
+                    return False, True, longitud
+                if guardado in _RESULTADOS:
+                    # Solo el resultado de otra cadena: no se puede continuar desde él
+                    if longitud == n:
+                        return guardado == _ACEPTADA, True, longitud
+                    continue
+                posicion, estado = longitud, guardado
+                if posicion == n:
+                    return bool(minimo.finales[estado]), True, posicion
+        inicio = posicion
+
+        if evaluar is not None and inicio == 0:
+            resultado = evaluar(cadena)
+            self._guardar(lenguaje, [(claves[n], _ACEPTADA if resultado else _RECHAZADA)])
+            return resultado, False, 0
+
+        nuevos = []
+        for punto in sorted(p for p in puntos if p > posicion):
+            estado, leidos = minimo.avanzar(estado, cadena[posicion:punto])
+            if estado == SIN_TRANSICION:
+                muerto = posicion + leidos + 1
+                self._guardar_muerto(lenguaje, cadena, muerto, claves, nuevos)
+                return False, False, inicio
+            nuevos.append((claves[punto], estado))
+            posicion = punto
+        self._guardar(lenguaje, nuevos)
+        return bool(minimo.finales[estado]), False, inicio
+
+    def _guardar_muerto(self, lenguaje: Language, cadena: str, muerto: int, claves, nuevos) -> None:
+        with self._lock:
+            nuevo = muerto not in lenguaje.dead_lengths
+            if nuevo and len(lenguaje.dead_lengths) >= get_result_cache_setting('max_dead_lengths'):
+                # Sin hueco para otra longitud: se guarda en el siguiente punto consultado
+                muerto = min(p for p in claves if p >= muerto)
+            elif nuevo:
+                lenguaje.dead_lengths.add(muerto)
+        clave = claves.get(muerto)
+        if clave is None:
+            clave = (muerto, hashlib.blake2b(cadena[:muerto].encode('utf-8', 'surrogatepass'),
+                                             digest_size=16).digest())
+        self._guardar(lenguaje, nuevos + [(clave, SIN_TRANSICION)])
+
+    def _guardar(self, lenguaje: Language, entradas) -> None:
+        maximo = get_result_cache_setting('max_entries')
+        with self._lock:
+            for clave, estado in entradas:
+                lenguaje.prefixes[clave] = estado
+                lenguaje.prefixes.move_to_end(clave)
+            while len(lenguaje.prefixes) > maximo:
+                lenguaje.prefixes.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._structures.clear()
+            self._languages.clear()
+
+
+result_cache = ResultCache()
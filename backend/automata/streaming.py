@@ -0,0 +1,96 @@
+"""
+Salida NDJSON (un objeto JSON por línea) de conversiones largas.
+
+Los estados y aristas del AFD se escriben a medida que la construcción de
+subconjuntos los descubre, así que el cliente recibe datos enseguida y el
+servidor no guarda ni el AFD completo ni la respuesta. Registros:
+- {"type": "node", "id", "label", "initial", "final"}
+- {"type": "edge", "from", "to", "label"}
+- {"type": "progress", "states", "expanded", "pending", "edges", "seconds"}
+- {"type": "done", "states", "edges", "seconds"} al terminar
+- {"type": "error", "error", ...} si la conversión falla a mitad
+Un nodo siempre aparece antes que las aristas que llegan a él.
+"""
+import json
+import time
+
+from .afnd_to_afd import LimiteDeEstadosExcedido
+from .config import STREAM_CHUNK_BYTES, STREAM_PROGRESS_EVERY
+from .utils import logger
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+
+def _line(record):
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def _chunks(records):
+    """Agrupa las líneas en trozos de unos STREAM_CHUNK_BYTES; un None fuerza el envío."""
+    buffer = []
+    size = 0
+    for record in records:
+        if record is not None:
+            line = _line(record).encode('utf-8')
+            buffer.append(line)
+            size += len(line)
+        if buffer and (record is None or size >= STREAM_CHUNK_BYTES):
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def conversion_stream(converter, max_estados=None):
+    """Trozos NDJSON de la conversión de ``converter.afnd``."""
+    return _chunks(_conversion_records(converter, max_estados))
+
+
+def stored_stream(data):
+    """Trozos NDJSON de un AFD ya convertido (formato de ``automata_to_data``)."""
+    return _chunks(_stored_records(data))
+
+
+def _conversion_records(converter, max_estados):
+    start = time.perf_counter()
+    states = expanded = edges = 0
+    try:
+        for evento in converter.convertir_eventos(max_estados):
+            if evento[0] == 'estado':
+                yield {'type': 'node', 'id': evento[1], 'label': evento[1], 'initial': states == 0, 'final': evento[2]}
+                states += 1
+                continue
+
+            for etiqueta, destino in evento[2]:
+                yield {'type': 'edge', 'from': evento[1], 'to': destino, 'label': etiqueta}
+            edges += len(evento[2])
+            expanded += 1
+            if expanded % STREAM_PROGRESS_EVERY == 0:
+                yield {
+                    'type': 'progress',
+                    'states': states,
+                    'expanded': expanded,
+                    'pending': states - expanded,
+                    'edges': edges,
+                    'seconds': round(time.perf_counter() - start, 3),
+                }
+                yield None
+    except LimiteDeEstadosExcedido as e:
+        logger.warning(f"Conversión rechazada: {str(e)}")
+        yield {'type': 'error', 'error': str(e), 'limit': 'max_dfa_states', 'max': e.max_estados}
+        return
+    except Exception as e:
+        logger.error(f"Error convirtiendo autómata: {str(e)}")
+        yield {'type': 'error', 'error': str(e)}
+        return
+    yield {'type': 'done', 'states': states, 'edges': edges, 'seconds': round(time.perf_counter() - start, 3)}
+
+
+def _stored_records(data):
+    for node in data['nodes']:
+        yield dict(node, type='node')
+    for edge in data['edges']:
+        yield dict(edge, type='edge')
+    yield {'type': 'done', 'states': len(data['nodes']), 'edges': len(data['edges']), 'seconds': 0.0,
+           'fromStore': True}
@@ -0,0 +1,218 @@
+"""
+Clases de símbolos en las etiquetas y partición del alfabeto.
+
+Una etiqueta puede ser un carácter ('a'), una clase de caracteres con
+rangos ('[a-z0-9_]', negable con '[^...]') o, por compatibilidad, cualquier
+otra cadena, que se trata como un símbolo opaco.
+"""
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MAX_CODIGO = 0x10FFFF
+
+# Rango de códigos de carácter, ambos extremos incluidos
+Rango = Tuple[int, int]
+
+_ESPECIALES = '\\]-^'
+
+
+def es_clase(etiqueta: str) -> bool:
+    return len(etiqueta) > 2 and etiqueta[0] == '[' and etiqueta[-1] == ']'
+
+
+def rangos_de(etiqueta: str) -> Optional[List[Rango]]:
+    """
+    Rangos de caracteres que acepta una etiqueta, ordenados y disjuntos.
+    Devuelve None para las etiquetas opacas, que no consumen un carácter.
+    """
+    if len(etiqueta) == 1:
+        return [(ord(etiqueta), ord(etiqueta))]
+    if not es_clase(etiqueta):
+        return None
+
+    cuerpo = etiqueta[1:-1]
+    negada = cuerpo.startswith('^')
+    if negada:
+        cuerpo = cuerpo[1:]
+
+    # (carácter, escapado)
+    caracteres = []
+    i = 0
+    while i < len(cuerpo):
+        if cuerpo[i] == '\\' and i + 1 < len(cuerpo):
+            caracteres.append((cuerpo[i + 1], True))
+            i += 2
+        else:
+            caracteres.append((cuerpo[i], False))
+            i += 1
+
+    rangos = []
+    i = 0
+    while i < len(caracteres):
+        inicio = caracteres[i][0]
+        if i + 2 < len(caracteres) and caracteres[i + 1] == ('-', False):
+            fin = caracteres[i + 2][0]
+            if ord(fin) < ord(inicio):
+                raise ValueError(f"Rango inválido en la etiqueta {etiqueta}")
+            rangos.append((ord(inicio), ord(fin)))
+            i += 3
+        else:
+            rangos.append((ord(inicio), ord(inicio)))
+            i += 1
+
+    if not rangos:
+        raise ValueError(f"Clase de símbolos vacía: {etiqueta}")
+    rangos = normalizar_rangos(rangos)
+    return _complemento(rangos) if negada else rangos
+
+
+def formatear_rangos(rangos: List[Rango]) -> str:
+    """Etiqueta que acepta exactamente los rangos dados (inversa de ``rangos_de``)."""
+    if len(rangos) == 1 and rangos[0][0] == rangos[0][1]:
+        return chr(rangos[0][0])
+
+    partes = []
+    for inicio, fin in rangos:
+        partes.append(_escapar(inicio))
+        if fin == inicio + 1:
+            partes.append(_escapar(fin))
+        elif fin > inicio:
+            partes.append('-' + _escapar(fin))
+    return '[' + ''.join(partes) + ']'
+
+
+def se_solapan(a: List[Rango], b: List[Rango]) -> bool:
+    """Indica si dos listas de rangos ordenados comparten algún carácter."""
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i][1] < b[j][0]:
+            i += 1
+        elif b[j][1] < a[i][0]:
+            j += 1
+        else:
+            return True
+    return False
+
+
+def _escapar(codigo: int) -> str:
+    caracter = chr(codigo)
+    return '\\' + caracter if caracter in _ESPECIALES else caracter
+
+
+def normalizar_rangos(rangos: List[Rango]) -> List[Rango]:
+    """Ordena y une rangos solapados o contiguos."""
+    resultado = []
+    for inicio, fin in sorted(rangos):
+        if resultado and inicio <= resultado[-1][1] + 1:
+            resultado[-1] = (resultado[-1][0], max(resultado[-1][1], fin))
+        else:
+            resultado.append((inicio, fin))
+    return resultado
+
+
+def _complemento(rangos: List[Rango]) -> List[Rango]:
+    resultado = []
+    siguiente = 0
+    for inicio, fin in rangos:
+        if inicio > siguiente:
+            resultado.append((siguiente, inicio - 1))
+        siguiente = fin + 1
+    if siguiente <= MAX_CODIGO:
+        resultado.append((siguiente, MAX_CODIGO))
+    return resultado
+
+
+class ParticionAlfabeto:
+    """
+    Partición de los caracteres en clases de equivalencia: dos caracteres
+    están en la misma clase si los aceptan exactamente las mismas etiquetas.
+
+    Las clases de caracteres se numeran por su primer carácter; detrás van
+    las etiquetas opacas, una clase cada una.
+    """
+
+    def __init__(self, etiquetas: Iterable[str]):
+        self.etiquetas_por_clase: List[Tuple[str, ...]] = []
+        self.rangos_por_clase: List[List[Rango]] = []
+        # Intervalos elementales: inicio de cada uno y su clase (-1 = ninguna etiqueta)
+        self.limites: List[int] = []
+        self.clase_por_intervalo: List[int] = []
+        self.tiene_clases = False
+        self._memo: Dict[str, Tuple[str, ...]] = {}
+
+        opacas = []
+        eventos = []
+        for etiqueta in sorted(set(etiquetas)):
+            rangos = rangos_de(etiqueta)
+            if rangos is None:
+                opacas.append(etiqueta)
+                continue
+            if len(etiqueta) > 1:
+                self.tiene_clases = True
+            for inicio, fin in rangos:
+                eventos.append((inicio, 1, etiqueta))
+                eventos.append((fin + 1, -1, etiqueta))
+
+        # Barrido: entre dos eventos consecutivos el conjunto de etiquetas no cambia
+        eventos.sort()
+        activas: Dict[str, int] = {}
+        clase_por_firma: Dict[Tuple[str, ...], int] = {}
+        i = 0
+        while i < len(eventos):
+            posicion = eventos[i][0]
+            while i < len(eventos) and eventos[i][0] == posicion:
+                _, delta, etiqueta = eventos[i]
+                activas[etiqueta] = activas.get(etiqueta, 0) + delta
+                if not activas[etiqueta]:
+                    del activas[etiqueta]
+                i += 1
+
+            firma = tuple(sorted(activas))
+            if not firma:
+                clase = -1
+            else:
+                clase = clase_por_firma.get(firma)
+                if clase is None:
+                    clase = clase_por_firma[firma] = len(self.etiquetas_por_clase)
+                    self.etiquetas_por_clase.append(firma)
+                    self.rangos_por_clase.append([])
+            if self.clase_por_intervalo and self.clase_por_intervalo[-1] == clase:
+                continue
+            self.limites.append(posicion)
+            self.clase_por_intervalo.append(clase)
+
+        for indice, inicio in enumerate(self.limites):
+            clase = self.clase_por_intervalo[indice]
+            if clase >= 0:
+                self.rangos_por_clase[clase].append((inicio, self.limites[indice + 1] - 1))
+
+        self.num_clases_caracter = len(self.etiquetas_por_clase)
+        for etiqueta in opacas:
+            self.etiquetas_por_clase.append((etiqueta,))
+
+    def __len__(self):
+        return len(self.etiquetas_por_clase)
+
+    def clase(self, caracter: str) -> int:
+        """Clase del carácter, o -1 si ninguna etiqueta lo acepta."""
+        indice = bisect_right(self.limites, ord(caracter)) - 1
+        return self.clase_por_intervalo[indice] if indice >= 0 else -1
+
+    def etiquetas_de(self, caracter: str) -> Tuple[str, ...]:
+        """Etiquetas que aceptan el carácter."""
+        etiquetas = self._memo.get(caracter)
+        if etiquetas is None:
+            clase = self.clase(caracter)
+            etiquetas = self.etiquetas_por_clase[clase] if clase >= 0 else ()
+            self._memo[caracter] = etiquetas
+        return etiquetas
+
+    def etiqueta(self, clases: Iterable[int]) -> str:
+        """Etiqueta que representa la unión de varias clases."""
+        clases = list(clases)
+        if len(clases) == 1 and clases[0] >= self.num_clases_caracter:
+            return self.etiquetas_por_clase[clases[0]][0]
+        rangos = []
+        for clase in clases:
+            rangos.extend(self.rangos_por_clase[clase])
+        return formatear_rangos(normalizar_rangos(rangos))
@@ -1,11 +1,29 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 from rest_framework import status
+import gzip
+import itertools
 import json
+import random
+import tempfile
+from unittest import mock
 
 from .automata import Automata, Estado
-from .afnd_to_afd import AFND_to_AFD
-from .models import AutomataModel
+from .afnd_to_afd import AFND_to_AFD, LimiteDeEstadosExcedido
+from .cache import cache_manager
+from .codegen import ESTRATEGIAS, generar_reconocedor, matcher_cache
+from .compiled import SIN_TRANSICION, AFDCompilado
+from .compiled_store import AFDMapeado, compiled_store
+from .equivalence import compute_language_hash, update_language_hash
+from .fingerprint import automata_fingerprint, language_fingerprint, minimal_fingerprint
+from .formats import automata_to_data, build_automata_from_data, from_compact, to_compact
+from .minimization import MinimizacionIncremental
+from .models import AutomataModel, ConversionResult
+from .prefixes import aristas_trie, ordenar_por_prefijos
+from .symbols import ParticionAlfabeto, formatear_rangos, rangos_de
+from .tracing import Traza
+from .warmup import warm_up
 
 class AutomataTest(TestCase):
     def setUp(self):
@@ -48,6 +66,45 @@ class AutomataTest(TestCase):
         self.assertTrue(self.afd.validar_cadena('b'))  # 0 'a's
         self.assertTrue(self.afd.validar_cadena('baba'))  # 2 'a's
     
+    def test_validar_cadena_con_traza(self):
+        """Prueba el registro de trazas y su límite de pasos."""
+        traza = Traza()
+        self.assertTrue(self.afnd.validar_cadena('ab', traza))
+        self.assertEqual(traza.to_dict(), {
+            'steps': [
+                {'symbol': None, 'states': ['q0']},
+                {'symbol': 'a', 'states': ['q0', 'q1']},
+                {'symbol': 'b', 'states': ['q0', 'q2']},
+            ],
+            'truncated': False,
+        })
+
+        traza = Traza(max_pasos=2)
+        self.assertTrue(self.afd.validar_cadena('aab', traza))
+        self.assertEqual([p['states'] for p in traza.pasos], [['p0'], ['p1']])
+        self.assertTrue(traza.truncada)
+
+    def test_edicion_incremental_compilado(self):
+        """Prueba que editar la tabla compilada equivale a recompilar."""
+        compilado = self.afd.compilar()
+        compilado.agregar_estado('p2', es_final=True)
+        compilado.agregar_transicion('p1', 'c', 'p2')
+        compilado.eliminar_transicion('p0', 'b')
+        compilado.cambiar_final('p0', False)
+
+        esperado = Automata(tipo='AFD')
+        esperado.agregar_estado('p0')
+        esperado.agregar_estado('p1')
+        esperado.agregar_estado('p2', es_final=True)
+        esperado.agregar_transicion('p0', 'a', 'p1')
+        esperado.agregar_transicion('p1', 'a', 'p0')
+        esperado.agregar_transicion('p1', 'b', 'p1')
+        esperado.agregar_transicion('p1', 'c', 'p2')
+
+        cadenas = [''.join(p) for n in range(5) for p in itertools.product('abc', repeat=n)]
+        self.assertEqual(compilado.aceptar_lote(cadenas), [esperado.validar_cadena(c) for c in cadenas])
+        self.assertEqual(list(compilado.enumerar_aceptadas(4)), list(esperado.enumerar_cadenas(4)))
+
     def test_conversion_afnd_to_afd(self):
         """Prueba conversión de AFND a AFD."""
         converter = AFND_to_AFD()
@@ -59,6 +116,193 @@ class AutomataTest(TestCase):
         self.assertTrue(afd.validar_cadena('aab'))
         self.assertFalse(afd.validar_cadena('a'))
     
+    def test_conversion_paralela(self):
+        """Prueba que la conversión paralela da exactamente el mismo AFD que la serie."""
+        afnd = Automata(tipo='AFND')
+        for i in range(6):
+            afnd.agregar_estado(f"s{i}", es_final=(i == 5))
+        afnd.agregar_transicion('s0', 'a', 's0')
+        afnd.agregar_transicion('s0', 'b', 's0')
+        afnd.agregar_transicion('s0', 'a', 's1')
+        for i in range(1, 5):
+            afnd.agregar_transicion(f"s{i}", '[ab]', f"s{i + 1}")
+        afnd.agregar_transicion('s2', 'ε', 's4')
+
+        converter = AFND_to_AFD()
+        converter.afnd = afnd
+        serie = converter.convertir()
+        paralelo = converter.convertir_paralelo(procesos=2, frontera_minima=1)
+
+        self.assertEqual(list(paralelo.estados), list(serie.estados))
+        self.assertEqual(paralelo.obtener_transiciones(), serie.obtener_transiciones())
+        self.assertEqual(
+            [e.es_final for e in paralelo.estados.values()],
+            [e.es_final for e in serie.estados.values()]
+        )
+
+    def test_limite_estados_conversion(self):
+        """Prueba que la construcción de subconjuntos se corta al superar el máximo de estados."""
+        converter = AFND_to_AFD()
+        converter.afnd = self.afnd
+        self.assertEqual(len(converter.convertir(max_estados=3).estados), 3)
+        with self.assertRaises(LimiteDeEstadosExcedido):
+            converter.convertir(max_estados=2)
+        with self.assertRaises(LimiteDeEstadosExcedido):
+            converter.convertir_paralelo(procesos=1, max_estados=2)
+
+    def test_cerraduras_epsilon(self):
+        """Prueba las cerraduras ε con ciclos y que simulación y conversión las respetan."""
+        afnd = Automata(tipo='AFND')
+        for i in range(6):
+            afnd.agregar_estado(f"e{i}", es_final=(i == 5))
+        # e1 -> e2 -> e3 -> e1 es un ciclo ε; e3 -> e4 sale de él
+        for origen, destino in [('e0', 'e1'), ('e1', 'e2'), ('e2', 'e3'), ('e3', 'e1'), ('e3', 'e4')]:
+            afnd.agregar_transicion(origen, 'ε', destino)
+        afnd.agregar_transicion('e4', 'a', 'e5')
+        afnd.agregar_transicion('e5', 'ε', 'e0')
+
+        cerraduras = afnd.cerraduras_epsilon()
+        nombres = lambda mascara: sorted(e.nombre for e in cerraduras.estados_de(mascara))
+        self.assertEqual(nombres(cerraduras.cerrar([afnd.estados['e0']])), ['e0', 'e1', 'e2', 'e3', 'e4'])
+        self.assertEqual(nombres(cerraduras.cerrar([afnd.estados['e2']])), ['e1', 'e2', 'e3', 'e4'])
+        self.assertEqual(nombres(cerraduras.cerrar([afnd.estados['e5']])), ['e0', 'e1', 'e2', 'e3', 'e4', 'e5'])
+
+        self.assertTrue(afnd.validar_cadena('a'))
+        self.assertTrue(afnd.validar_cadena('aaa'))
+        self.assertFalse(afnd.validar_cadena(''))
+        self.assertFalse(afnd.validar_cadena('b'))
+
+        # Añadir una transición ε invalida las cerraduras calculadas
+        afnd.agregar_transicion('e0', 'ε', 'e5')
+        self.assertTrue(afnd.validar_cadena(''))
+
+        converter = AFND_to_AFD()
+        converter.afnd = afnd
+        afd = converter.convertir()
+        for longitud in range(4):
+            for cadena in map(''.join, itertools.product('ab', repeat=longitud)):
+                self.assertEqual(afd.validar_cadena(cadena), afnd.validar_cadena(cadena), cadena)
+
+    def test_conversion_minima(self):
+        """Prueba que las estrategias de convertir_minimo dan el mismo AFD mínimo."""
+        # Σ* a Σ^k ∪ Σ* b Σ^k: cadenas de longitud > k. Su AFD directo tiene 2^(k+1)
+        # estados; el mínimo, k + 2
+        k = 10
+        afnd = Automata(tipo='AFND')
+        afnd.agregar_estado('i')
+        for rama in 'ab':
+            for j in range(k + 1):
+                afnd.agregar_estado(f"{rama}{j}", es_final=(j == k))
+            afnd.agregar_transicion('i', rama, f"{rama}0")
+            for j in range(k):
+                afnd.agregar_transicion(f"{rama}{j}", '[ab]', f"{rama}{j + 1}")
+        afnd.agregar_transicion('i', '[ab]', 'i')
+
+        converter = AFND_to_AFD()
+        converter.afnd = afnd
+        resultados = {}
+        for estrategia in ('hopcroft', 'brzozowski', 'auto'):
+            resultados[estrategia] = converter.convertir_minimo(estrategia=estrategia)
+        # El AFD directo supera el presupuesto: se elige Brzozowski
+        self.assertEqual(converter.estrategia_usada, 'brzozowski')
+
+        minimo = resultados['hopcroft']
+        self.assertEqual(len(minimo.estados), k + 2)
+        for resultado in resultados.values():
+            self.assertEqual(resultado.obtener_transiciones(), minimo.obtener_transiciones())
+        self.assertTrue(minimo.validar_cadena('a' * (k + 1)))
+        self.assertFalse(minimo.validar_cadena('b' * k))
+
+        # Mismo lenguaje que convertir + minimizar, con clases de símbolos y ε
+        converter.afnd = self.afnd
+        self.afnd.agregar_transicion('q2', 'ε', 'q0')
+        esperado = converter.convertir().minimizar()
+        obtenido = converter.convertir_minimo()
+        self.assertEqual(len(obtenido.estados), len(esperado.estados))
+        for longitud in range(5):
+            for cadena in map(''.join, itertools.product('ab', repeat=longitud)):
+                self.assertEqual(obtenido.validar_cadena(cadena), esperado.validar_cadena(cadena), cadena)
+        with self.assertRaises(LimiteDeEstadosExcedido):
+            converter.convertir_minimo(max_estados=1)
+
+    def test_pragmas_sqlite(self):
+        """Prueba que las conexiones SQLite se abren con los PRAGMA configurados."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 20000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+    def test_huella(self):
+        """Prueba que la huella no depende de los nombres ni del orden de las aristas."""
+        renombrado = Automata(tipo='AFND')
+        renombrado.agregar_estado('inicio')
+        renombrado.agregar_estado('z', es_final=True)
+        renombrado.agregar_estado('medio')
+        renombrado.agregar_transicion('inicio', 'a', 'medio')
+        renombrado.agregar_transicion('medio', 'b', 'z')
+        renombrado.agregar_transicion('inicio', 'b', 'inicio')
+        renombrado.agregar_transicion('inicio', 'a', 'inicio')
+        renombrado.estado_inicial = renombrado.estados['inicio']
+
+        self.assertEqual(automata_fingerprint(renombrado), automata_fingerprint(self.afnd))
+
+        renombrado.estados['medio'].es_final = True
+        self.assertNotEqual(automata_fingerprint(renombrado), automata_fingerprint(self.afnd))
+
+    def test_huella_lenguaje(self):
+        """Prueba que autómatas distintos con el mismo lenguaje tienen la misma huella."""
+        # AFD de "termina en ab" con un estado redundante, un estado muerto
+        # explícito y una clase en lugar de dos símbolos sueltos
+        afd = Automata(tipo='AFD')
+        for nombre, final in [('p', False), ('p2', False), ('x', False), ('y', True), ('muerto', False)]:
+            afd.agregar_estado(nombre, es_final=final)
+        afd.agregar_transicion('p', 'a', 'x')
+        afd.agregar_transicion('p', 'b', 'p2')
+        afd.agregar_transicion('p2', 'a', 'x')
+        afd.agregar_transicion('p2', 'b', 'p')
+        afd.agregar_transicion('x', 'a', 'x')
+        afd.agregar_transicion('x', 'b', 'y')
+        afd.agregar_transicion('y', 'a', 'x')
+        afd.agregar_transicion('y', 'b', 'p')
+        afd.agregar_transicion('p', 'c', 'muerto')
+        afd.agregar_transicion('muerto', '[a-c]', 'muerto')
+        afd.estado_inicial = afd.estados['p']
+
+        self.assertEqual(language_fingerprint(afd), language_fingerprint(self.afnd))
+        self.assertEqual(language_fingerprint(afd.minimizar()), language_fingerprint(afd))
+
+        afd.estados['x'].es_final = True
+        self.assertNotEqual(language_fingerprint(afd), language_fingerprint(self.afnd))
+
+        # Todos los autómatas sin cadenas aceptadas comparten huella
+        vacio = Automata(tipo='AFD')
+        vacio.agregar_estado('e')
+        vacio.estado_inicial = vacio.estados['e']
+        afd.estados['x'].es_final = False
+        afd.estados['y'].es_final = False
+        self.assertEqual(language_fingerprint(afd), language_fingerprint(vacio))
+
+    def test_formato_compacto(self):
+        """Prueba que el formato compacto conserva nodos y aristas."""
+        data = automata_to_data(self.afnd)
+        compact = to_compact(data)
+        self.assertEqual(compact['states'], ['q0', 'q1', 'q2'])
+        self.assertEqual(compact['offsets'], [0, 3, 4, 4])
+        self.assertNotIn('labels', compact)
+        self.assertEqual(from_compact(compact), data)
+
+        compact['offsets'][-1] = 3
+        with self.assertRaises(ValueError):
+            from_compact(compact)
+
+        # Índices negativos o fuera de rango
+        for field, value in (('targets', [-1, 0, 1, 2]), ('edgeSymbols', [0, 0, 0, 5]),
+                             ('final', [3]), ('initial', -1)):
+            invalid = dict(to_compact(data), **{field: value})
+            with self.assertRaises(ValueError):
+                from_compact(invalid)
+
     def test_minimizacion_afd(self):
         """Prueba minimización de un AFD."""
         # Creamos un AFD que puede ser minimizado
@@ -89,10 +333,238 @@ class AutomataTest(TestCase):
         # Y tiene menos estados
         self.assertLess(len(afd_min.estados), len(afd.estados))
 
+    def test_minimizacion_incremental(self):
+        """La minimización incremental coincide con la completa tras cada edición."""
+        aleatorio = random.Random(7)
+        for _ in range(40):
+            n = aleatorio.randint(1, 10)
+            tabla = [[aleatorio.choice([SIN_TRANSICION] + list(range(n))) for _ in range(2)] for _ in range(n)]
+            finales = [aleatorio.random() < 0.3 for _ in range(n)]
+            compilado = AFDCompilado([f'q{i}' for i in range(n)], ['a', 'b'], tabla, finales, 0)
+            minimizacion = MinimizacionIncremental(compilado)
+            for paso in range(20):
+                estado = aleatorio.randrange(len(compilado.tabla))
+                if aleatorio.random() < 0.1:
+                    estado = compilado.agregar_estado(f'n{paso}', aleatorio.random() < 0.3)
+                elif aleatorio.random() < 0.2:
+                    compilado.cambiar_final(compilado.nombres[estado], not compilado.finales[estado])
+                else:
+                    destino = aleatorio.randrange(len(compilado.tabla))
+                    compilado.tabla[estado][aleatorio.randrange(2)] = aleatorio.choice([SIN_TRANSICION, destino])
+                minimizacion.actualizar(compilado, [estado])
+                minimo = minimizacion.minimo(compilado)
+                esperado = compilado.minimizar()
+                self.assertEqual(len(minimo.tabla), len(esperado.tabla))
+                self.assertEqual(minimal_fingerprint(minimo), minimal_fingerprint(esperado))
+                self.assertEqual(minimizacion.num_bloques, MinimizacionIncremental(compilado).num_bloques)
+
+    def test_validar_lote_afd(self):
+        """Prueba que la validación en lote coincide con la validación individual."""
+        rng = random.Random(0)
+        cadenas = [''.join(rng.choice('abc') for _ in range(rng.randint(0, 12))) for _ in range(200)]
+        cadenas += ['', 'ñ', 'aa']
+
+        esperado = [self.afd.validar_cadena(c) for c in cadenas]
+        self.assertEqual(self.afd.validar_lote(cadenas), esperado)
+        self.assertEqual([self.afd.compilar().aceptar(c) for c in cadenas], esperado)
+
+    def test_validar_lote_afd_incompleto(self):
+        """Prueba el lote con un AFD sin todas sus transiciones definidas."""
+        afd = Automata(tipo='AFD')
+        afd.agregar_estado('q0')
+        afd.agregar_estado('q1', es_final=True)
+        afd.agregar_transicion('q0', 'a', 'q1')
+        afd.agregar_transicion('q1', 'b', 'q0')
+
+        cadenas = ['a', 'ab', 'aba', 'b', 'aa', '', 'abab', 'ababa']
+        self.assertEqual(afd.validar_lote(cadenas), [True, False, True, False, False, False, False, True])
+
+    def test_validar_lote_prefijos(self):
+        """Prueba el lote compartiendo prefijos con AFD y AFND (con ε y clases)."""
+        rng = random.Random(1)
+        cabecera = 'ab' * 20
+        cadenas = [cabecera[:rng.randint(0, 40)] + ''.join(rng.choice('abc') for _ in range(rng.randint(0, 4)))
+                   for _ in range(300)]
+        cadenas += ['', '', 'c', 'ca', 'cab']
+        self.assertEqual(aristas_trie(cadenas, ordenar_por_prefijos(cadenas)[1]),
+                         len({c[:i] for c in cadenas for i in range(1, len(c) + 1)}))
+
+        afnd = Automata(tipo='AFND')
+        for nombre in ('q0', 'q1', 'q2'):
+            afnd.agregar_estado(nombre, es_final=(nombre == 'q2'))
+        afnd.agregar_transicion('q0', '[ab]', 'q0')
+        afnd.agregar_transicion('q0', 'a', 'q1')
+        afnd.agregar_transicion('q1', 'b', 'q2')
+        afnd.agregar_transicion('q2', 'ε', 'q0')
+
+        for automata in (self.afd, self.afnd, afnd):
+            esperado = [automata.validar_cadena(c) for c in cadenas]
+            for prefijos in (None, True, False):
+                self.assertEqual(automata.validar_lote(cadenas, prefijos=prefijos), esperado)
+
+    def test_contar_cadenas(self):
+        """Prueba el conteo de cadenas aceptadas contra la fuerza bruta."""
+        for automata in (self.afd, self.afnd):
+            conteos = automata.contar_cadenas(6)
+            for longitud, conteo in enumerate(conteos):
+                todas = [''.join(p) for p in itertools.product('ab', repeat=longitud)]
+                esperado = sum(automata._compilar_equivalente().aceptar(c) for c in todas)
+                self.assertEqual(conteo, esperado)
+                self.assertEqual(automata.contar_cadenas_de_longitud(longitud), esperado)
+
+        # Cadenas con un número par de 'a's: 2^(n-1) para n > 0
+        self.assertEqual(self.afd.contar_cadenas_de_longitud(100), 2 ** 99)
+
+    def test_enumerar_cadenas(self):
+        """Prueba la enumeración en orden shortlex."""
+        primeras = list(itertools.islice(self.afnd.enumerar_cadenas(), 6))
+        self.assertEqual(primeras, ['ab', 'aab', 'bab', 'aaab', 'abab', 'baab'])
+        self.assertEqual(len(list(self.afd.enumerar_cadenas(4))), sum(self.afd.contar_cadenas(4)))
+
+        # Un lenguaje finito termina sin longitud máxima
+        finito = Automata(tipo='AFD')
+        finito.agregar_estado('q0')
+        finito.agregar_estado('q1', es_final=True)
+        finito.agregar_estado('q2', es_final=True)
+        finito.agregar_transicion('q0', 'b', 'q1')
+        finito.agregar_transicion('q0', 'a', 'q2')
+        finito.agregar_transicion('q1', 'a', 'q2')
+        self.assertEqual(list(finito.enumerar_cadenas()), ['a', 'b', 'ba'])
+
+
+class ClasesSimbolosTest(TestCase):
+    def setUp(self):
+        """Identificadores: una letra o '_' seguida de letras, dígitos o '_'."""
+        self.afnd = Automata(tipo='AFND')
+        self.afnd.agregar_estado('q0')
+        self.afnd.agregar_estado('q1', es_final=True)
+        self.afnd.agregar_transicion('q0', '[a-z_]', 'q1')
+        self.afnd.agregar_transicion('q1', '[a-z0-9_]', 'q1')
+        self.afnd.agregar_transicion('q1', 'x', 'q0')
+
+    def test_rangos(self):
+        """Prueba el análisis y el formato de las etiquetas con clases."""
+        self.assertEqual(rangos_de('[a-z0-9]'), [(48, 57), (97, 122)])
+        self.assertEqual(rangos_de('[^a]')[0], (0, 96))
+        self.assertIsNone(rangos_de('ab'))
+        self.assertEqual(rangos_de(formatear_rangos(rangos_de('[\\-\\]a-c]'))), rangos_de('[\\-\\]a-c]'))
+        with self.assertRaises(ValueError):
+            rangos_de('[z-a]')
+
+    def test_particion(self):
+        """Prueba que la partición agrupa los caracteres aceptados por las mismas etiquetas."""
+        particion = ParticionAlfabeto(['[a-z]', '[0-9]', 'x'])
+        self.assertEqual(len(particion), 3)
+        self.assertEqual(particion.etiquetas_de('x'), ('[a-z]', 'x'))
+        self.assertEqual(particion.etiquetas_de('b'), ('[a-z]',))
+        self.assertEqual(particion.etiquetas_de('-'), ())
+
+    def test_conversion_y_compilacion(self):
+        """Prueba que conversión, minimización y tabla compilada usan clases, no símbolos."""
+        self.assertEqual(len(self.afnd.estados['q1'].transiciones), 2)
+
+        converter = AFND_to_AFD()
+        converter.afnd = self.afnd
+        afd = converter.convertir()
+        afd_min = afd.minimizar()
+        compilado = afd.compilar()
+        self.assertEqual(len(compilado.simbolos), 3)
+
+        cadenas = [''.join(p) for n in range(4) for p in itertools.product('ax1_-', repeat=n)]
+        esperado = [self.afnd.validar_cadena(c) for c in cadenas]
+        self.assertEqual([afd.validar_cadena(c) for c in cadenas], esperado)
+        self.assertEqual([afd_min.validar_cadena(c) for c in cadenas], esperado)
+        self.assertEqual(compilado.aceptar_lote(cadenas), esperado)
+
+        # 27 identificadores de un carácter y 27 * 37 de dos
+        self.assertEqual(self.afnd.contar_cadenas(2), [0, 27, 27 * 37])
+        self.assertEqual(list(itertools.islice(self.afnd.enumerar_cadenas(), 3)), ['_', 'a', 'b'])
+
+    def test_tabla_proyectada(self):
+        """Prueba que la tabla leída del fichero proyectado equivale a la original."""
+        converter = AFND_to_AFD()
+        converter.afnd = self.afnd
+        compilado = converter.convertir().compilar()
+        cadenas = [''.join(p) for n in range(5) for p in itertools.product('ax1_-', repeat=n)]
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with override_settings(AUTOMATA_COMPILED_STORE={'directory': directory.name}):
+            mapeado = compiled_store.put(7, compilado)
+            self.assertIsInstance(mapeado, AFDMapeado)
+            self.assertEqual([mapeado.aceptar(c) for c in cadenas], compilado.aceptar_lote(cadenas))
+            self.assertEqual(mapeado.aceptar_lote(cadenas), compilado.aceptar_lote(cadenas))
+            self.assertEqual(mapeado.nombres, compilado.nombres)
+            self.assertIs(compiled_store.get(7), mapeado)
+            with self.assertRaises(ValueError):
+                mapeado.cambiar_final(mapeado.nombres[0], True)
+
+            # Sustituir el fichero no afecta a quien ya lo tenía proyectado
+            copia = mapeado.copia()
+            copia.cambiar_final(copia.nombres[copia.inicial], True)
+            nuevo = compiled_store.put(7, copia)
+            self.assertIsNot(nuevo, mapeado)
+            self.assertTrue(nuevo.aceptar(''))
+            self.assertFalse(mapeado.aceptar(''))
+
+            compiled_store.discard(7)
+            self.assertIsNone(compiled_store.get(7))
+            self.assertIsNone(compiled_store.get('../7'))
+
+    def test_reconocedores_generados(self):
+        """Prueba diferencial de los reconocedores generados contra validar_cadena."""
+        aleatorio = random.Random(7)
+        etiquetas = ['a', 'b', 'c', '[a-c]', '[^a]', '[0-9]', '[^ab0-9]']
+        for caso in range(60):
+            afd = Automata(tipo='AFD')
+            num_estados = aleatorio.randint(1, 7)
+            for i in range(num_estados):
+                afd.agregar_estado(f'q{i}', es_final=i == num_estados - 1 or aleatorio.random() < 0.4)
+            # Etiquetas disjuntas: caracteres sueltos o clases, no ambas cosas
+            alfabeto = etiquetas[:3] if caso % 2 else aleatorio.choice([['[a-c]', '[0-9]'], ['a', '[^a]']])
+            for i in range(num_estados):
+                for etiqueta in alfabeto:
+                    if aleatorio.random() < 0.8:
+                        afd.agregar_transicion(f'q{i}', etiqueta, f'q{aleatorio.randrange(num_estados)}')
+            compilado = afd.compilar()
+            cadenas = [''.join(aleatorio.choice('abc09xé') for _ in range(aleatorio.randrange(12)))
+                       for _ in range(100)]
+            esperado = [afd.validar_cadena(c) for c in cadenas]
+            for estrategia in ESTRATEGIAS:
+                for max_entradas in (1, 64, None):
+                    reconocedor = generar_reconocedor(compilado, estrategia, max_entradas)
+                    self.assertEqual([reconocedor(c) for c in cadenas], esperado, (caso, estrategia, max_entradas))
+
+        # Se generan con tráfico suficiente y se descartan al editar la tabla
+        afd = Automata(tipo='AFD')
+        afd.agregar_estado('p0')
+        afd.agregar_estado('p1', es_final=True)
+        afd.agregar_transicion('p0', 'a', 'p1')
+        afd.agregar_transicion('p1', 'b', 'p1')
+        compilado = afd.compilar()
+        with override_settings(AUTOMATA_CODEGEN={'min_requests': 2, 'calibration_requests': 2}):
+            matcher_cache.clear()
+            self.assertEqual([matcher_cache.aceptar(compilado, 'abb') for _ in range(8)], [True] * 8)
+            self.assertTrue(callable(compilado._reconocedor))
+            compilado.agregar_transicion('p1', 'c', 'p1')
+            self.assertIsNone(compilado._reconocedor)
+            self.assertEqual([matcher_cache.aceptar(compilado, 'abc') for _ in range(8)], [True] * 8)
+
+    def test_afd_sin_solapes(self):
+        """Prueba que un AFD no admite etiquetas que se solapan en un mismo estado."""
+        afd = Automata(tipo='AFD')
+        afd.agregar_estado('q0', es_final=True)
+        afd.agregar_transicion('q0', '[a-m]', 'q0')
+        with self.assertRaises(ValueError):
+            afd.agregar_transicion('q0', 'c', 'q0')
+        afd.agregar_transicion('q0', '[n-z]', 'q0')
+        self.assertTrue(afd.validar_cadena('hola'))
+        self.assertFalse(afd.validar_cadena('hola!'))
+
 
 class APITests(TestCase):
     def setUp(self):
         self.client = APIClient()
+        cache_manager.clear()
         self.test_automata = {
             'name': 'Test Automaton',
             'description': 'Test description',
@@ -130,7 +602,104 @@ class APITests(TestCase):
         response = self.client.post('/automata/validate/', data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertFalse(response.data['isValid'])
+        self.assertNotIn('trace', response.data)
+
+        # Con traza
+        data.update({'input': 'ab', 'trace': True, 'traceLimit': 2})
+        response = self.client.post('/automata/validate/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['trace']['steps']), 2)
+        self.assertTrue(response.data['trace']['truncated'])
+
+        # traceLimit no puede superar TRACE_MAX_STEPS
+        data['traceLimit'] = 1000000
+        with mock.patch('automata.views.TRACE_MAX_STEPS', 2):
+            response = self.client.post('/automata/validate/', data, format='json')
+        self.assertEqual(len(response.data['trace']['steps']), 2)
+
+        # Un id que no es de un autómata guardado solo identifica los datos enviados
+        response = self.client.post('/automata/validate/', dict(
+            data, input='ab', trace=False, automataId='draft-1'
+        ), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['isValid'])
+
+        # Sin datos, el id basta: se valida con la fila guardada y su tipo
+        automata_id = self.client.post('/api/automata/save/', self.test_automata, format='json').data['id']
+        response = self.client.post('/automata/validate/', {
+            'input': 'ab', 'automataId': automata_id, 'trace': True
+        }, format='json')
+        self.assertTrue(response.data['isValid'])
+        self.assertEqual(len(response.data['trace']['steps']), 3)
     
+    @override_settings(AUTOMATA_RESULT_CACHE={'checkpoint_interval': 4})
+    def test_result_cache_api(self):
+        """Los autómatas equivalentes comparten resultados, con o sin id."""
+        equivalente = {
+            'nodes': [{'id': 'p', 'initial': True}, {'id': 'x'}, {'id': 'y', 'final': True}],
+            'edges': [
+                {'from': 'p', 'to': 'p', 'label': 'b'},
+                {'from': 'p', 'to': 'x', 'label': 'a'},
+                {'from': 'x', 'to': 'x', 'label': 'a'},
+                {'from': 'x', 'to': 'y', 'label': 'b'},
+                {'from': 'y', 'to': 'x', 'label': 'a'},
+                {'from': 'y', 'to': 'p', 'label': 'b'}
+            ]
+        }
+        afnd = {'nodes': self.test_automata['nodes'], 'edges': self.test_automata['edges']}
+
+        def validate(cadena, automata_data, automata_type):
+            return self.client.post('/automata/validate/', {
+                'input': cadena, 'automataType': automata_type, 'automataData': automata_data
+            }, format='json').data
+
+        # La primera vez que llegan unos datos se validan directamente, sin calcular su lenguaje
+        with mock.patch('automata.result_cache.canonical_minimal') as canonical_minimal:
+            self.assertTrue(validate('aab', afnd, 'AFND')['isValid'])
+            self.assertNotIn('fromCache', validate('aab', equivalente, 'AFD'))
+        canonical_minimal.assert_not_called()
+
+        self.assertNotIn('fromCache', validate('aab', afnd, 'AFND'))
+        response = validate('aab', equivalente, 'AFD')
+        self.assertTrue(response['isValid'])
+        self.assertTrue(response['fromCache'])
+
+        # Una cadena más larga continúa desde el último estado intermedio guardado
+        self.assertFalse(validate('abbaabba', afnd, 'AFND')['isValid'])
+        response = validate('abbaabbaab', equivalente, 'AFD')
+        self.assertTrue(response['isValid'])
+        self.assertEqual(response['resumedFrom'], 8)
+
+        # Un prefijo sin transición rechaza todas sus extensiones
+        self.assertFalse(validate('acab', afnd, 'AFND')['isValid'])
+        response = validate('acbbab', equivalente, 'AFD')
+        self.assertFalse(response['isValid'])
+        self.assertTrue(response['fromCache'])
+
+        # Un AFD guardado usa el lenguaje de su tabla compilada y aporta sus resultados
+        saved = self.client.post('/api/automata/save/', dict(equivalente, name='AFD', automataType='AFD'),
+                                 format='json')
+        response = self.client.post('/automata/validate/', {
+            'input': 'bbab', 'automataId': saved.data['id']
+        }, format='json')
+        self.assertNotIn('fromCache', response.data)
+        self.assertTrue(validate('bbab', afnd, 'AFND')['fromCache'])
+
+    def test_validate_batch_api(self):
+        """Prueba el endpoint de validación en lote."""
+        data = {
+            'inputs': ['ab', 'a', 'bab', ''],
+            'automataType': 'AFND',
+            'automataData': {
+                'nodes': self.test_automata['nodes'],
+                'edges': self.test_automata['edges']
+            }
+        }
+
+        response = self.client.post('/api/validate/batch/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [True, False, True, False])
+
     def test_convert_api(self):
         """Prueba el endpoint de conversión AFND a AFD."""
         data = {
@@ -143,6 +712,75 @@ class APITests(TestCase):
         self.assertIn('nodes', response.data)
         self.assertIn('edges', response.data)
     
+    def test_analyze_api(self):
+        """Prueba el análisis previo a la conversión y su modo recomendado."""
+        data = dict(self.test_automata, edges=self.test_automata['edges'] + [
+            {'from': 'q1', 'to': 'q2', 'label': 'ε'},
+            {'from': 'q2', 'to': 'q1', 'label': 'ε'},
+        ])
+        response = self.client.post('/api/automata/analyze/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['states'], response.data['edges']), (3, 6))
+        self.assertEqual(response.data['nondeterminism']['maxTargets'], 2)
+        self.assertEqual(response.data['epsilonCycles'], 1)
+        converted = self.client.post('/api/automata/convert/', data, format='json').data
+        self.assertEqual(response.data['dfaStates']['estimate'], len(converted['nodes']))
+        self.assertTrue(response.data['dfaStates']['exact'])
+        self.assertEqual(response.data['recommendedMode'], 'inline')
+        self.assertTrue(self.client.post('/api/automata/analyze/', data, format='json').data['cached'])
+
+        # El k-ésimo símbolo desde el final es 'a': el AFD tiene 2^k estados
+        k = 12
+        nodes = [{'id': f'q{i}', 'initial': i == 0, 'final': i == k} for i in range(k + 1)]
+        edges = [{'from': 'q0', 'to': 'q0', 'label': c} for c in 'ab'] + [{'from': 'q0', 'to': 'q1', 'label': 'a'}]
+        edges += [{'from': f'q{i}', 'to': f'q{i + 1}', 'label': c} for i in range(1, k) for c in 'ab']
+        with override_settings(AUTOMATA_ANALYSIS={'max_explored_states': 100, 'inline_max_states': 200}):
+            report = self.client.post('/api/automata/analyze/', {'nodes': nodes, 'edges': edges}, format='json').data
+            self.assertFalse(report['dfaStates']['exact'])
+            self.assertLessEqual(report['dfaStates']['explored'], 100)
+            self.assertGreaterEqual(report['dfaStates']['upperBound'], 2 ** k)
+            self.assertEqual(report['recommendedMode'], 'stream')
+            with override_settings(AUTOMATA_ADMISSION_LIMITS={'max_dfa_states': 500}):
+                report = self.client.post('/api/automata/analyze/', {'nodes': nodes, 'edges': edges}, format='json').data
+                self.assertEqual(report['recommendedMode'], 'lazy')
+
+    def test_convert_api_store(self):
+        """Prueba que las conversiones repetidas se sirven desde el almacén."""
+        data = {
+            'nodes': self.test_automata['nodes'],
+            'edges': self.test_automata['edges']
+        }
+        first = self.client.post('/api/automata/convert/', data, format='json')
+        self.assertEqual(ConversionResult.objects.count(), 1)
+
+        # El mismo AFND con otros nombres y otro orden de aristas
+        renamed = {
+            'nodes': [
+                {'id': 'x', 'label': 'x', 'final': True},
+                {'id': 'y', 'label': 'y'},
+                {'id': 's', 'label': 's', 'initial': True}
+            ],
+            'edges': [
+                {'from': 'y', 'to': 'x', 'label': 'b'},
+                {'from': 's', 'to': 's', 'label': 'b'},
+                {'from': 's', 'to': 'y', 'label': 'a'},
+                {'from': 's', 'to': 's', 'label': 'a'}
+            ]
+        }
+        second = self.client.post('/api/automata/convert/', renamed, format='json')
+        self.assertEqual(ConversionResult.objects.count(), 1)
+        self.assertEqual(second.data, first.data)
+
+        minimal = self.client.post('/api/automata/convert/', dict(data, minimize=True), format='json')
+        self.assertEqual(minimal.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(minimal.data['nodes']), 3)
+        self.assertEqual(ConversionResult.objects.count(), 2)
+
+        # "false" como cadena no activa la minimización
+        unminimized = self.client.post('/api/automata/convert/', dict(data, minimize='false'), format='json')
+        self.assertEqual(unminimized.data, first.data)
+        self.assertEqual(ConversionResult.objects.count(), 2)
+
     def test_save_load_api(self):
         """Prueba los endpoints de guardar y cargar autómatas."""
         # Guardar autómata
@@ -160,4 +798,361 @@ class APITests(TestCase):
         # Listar autómatas
         response = self.client.get('/automata/load/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIsInstance(response.data, list)
\ No newline at end of file
+        self.assertIsInstance(response.data, list)
+
+    def test_edit_api(self):
+        """Prueba la edición incremental de la tabla compilada y de la huella del lenguaje."""
+        afd = {
+            'name': 'AFD editable',
+            'automataType': 'AFD',
+            'nodes': [
+                {'id': 'p0', 'initial': True},
+                {'id': 'p1', 'final': True}
+            ],
+            'edges': [
+                {'from': 'p0', 'to': 'p1', 'label': 'a'},
+                {'from': 'p1', 'to': 'p1', 'label': 'a'}
+            ]
+        }
+        response = self.client.post('/api/automata/save/', afd, format='json')
+        automata_id = response.data['id']
+
+        def validate(cadena):
+            response = self.client.post('/api/validate/', {
+                'input': cadena,
+                'automataType': 'AFD',
+                'automataId': automata_id
+            }, format='json')
+            return response.data['isValid']
+
+        self.assertTrue(validate('aa'))
+        self.assertFalse(validate('b'))
+        self.assertFalse(validate('ab'))
+
+        # Con datos enviados se validan esos datos (un borrador), y no dejan resultados para el autómata
+        response = self.client.post('/api/validate/', {
+            'input': 'aa',
+            'automataType': 'AFND',
+            'automataId': automata_id,
+            'automataData': {'nodes': afd['nodes'], 'edges': [{'from': 'p0', 'to': 'p1', 'label': 'b'}]}
+        }, format='json')
+        self.assertFalse(response.data['isValid'])
+        self.assertTrue(validate('aa'))
+
+        # Añadir p1 -b-> p2 (final) edita la tabla compilada sin recompilarla
+        response = self.client.patch('/api/automata/edit/', {
+            'id': automata_id,
+            'addNodes': [{'id': 'p2', 'final': True}],
+            'addEdges': [{'from': 'p1', 'to': 'p2', 'label': 'b'}]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(validate('aa'))
+        self.assertTrue(validate('ab'))
+
+        stored = AutomataModel.objects.get(id=automata_id)
+        self.assertEqual(len(stored.nodes), 3)
+        self.assertEqual(len(stored.edges), 3)
+        # La huella del lenguaje sale de la minimización incremental, sin recálculo aparte
+        self.assertEqual(stored.language_hash, compute_language_hash(stored.nodes, stored.edges, 'AFD'))
+
+        # Solo se publica la tabla editada al confirmar; la huella no se recalcula aparte
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.patch('/api/automata/edit/', {
+                'id': automata_id,
+                'updateNodes': [{'id': 'p1', 'final': False}]
+            }, format='json')
+        self.assertEqual(len(callbacks), 1)
+        self.assertIsNone(cache_manager.get_compiled(automata_id))
+        callbacks[0]()
+        self.assertEqual(cache_manager.get_compiled(automata_id).version_bd,
+                         AutomataModel.objects.get(id=automata_id).version)
+        stored = AutomataModel.objects.get(id=automata_id)
+        self.assertEqual(stored.language_hash, compute_language_hash(stored.nodes, stored.edges, 'AFD'))
+
+        # Un AFD no admite dos transiciones con el mismo símbolo
+        response = self.client.patch('/api/automata/edit/', {
+            'id': automata_id,
+            'addEdges': [{'from': 'p0', 'to': 'p0', 'label': 'a'}]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # El id puede llegar como texto: la tabla compilada es la misma que con el entero
+        self.assertTrue(validate('ab'))
+        self.assertIs(cache_manager.get_compiled(str(automata_id)), cache_manager.get_compiled(automata_id))
+        cache_manager.invalidate_automata(str(automata_id))
+        self.assertIsNone(cache_manager.get_compiled(automata_id))
+
+        # Una tabla que no se compiló desde la fila guardada no da la huella: se recalcula aparte
+        stored = AutomataModel.objects.get(id=automata_id)
+        cache_manager.set_compiled(automata_id, build_automata_from_data(
+            {'nodes': stored.nodes, 'edges': stored.edges}, 'AFD').compilar())
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.patch('/api/automata/edit/', {
+                'id': automata_id,
+                'updateNodes': [{'id': 'p1', 'final': True}]
+            }, format='json')
+        self.assertEqual(len(callbacks), 1)
+        self.assertIsNone(AutomataModel.objects.get(id=automata_id).language_hash)
+
+    def test_compiled_store_api(self):
+        """Prueba las tablas compiladas compartidas en ficheros a través de la API."""
+        afd = {
+            'name': 'AFD',
+            'automataType': 'AFD',
+            'nodes': [{'id': 'p0', 'initial': True}, {'id': 'p1', 'final': True}],
+            'edges': [{'from': 'p0', 'to': 'p1', 'label': 'a'}]
+        }
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with override_settings(AUTOMATA_COMPILED_STORE={'enabled': True, 'directory': directory.name}):
+            automata_id = self.client.post('/api/automata/save/', afd, format='json').data['id']
+
+            def validate(cadena):
+                return self.client.post('/api/validate/', {
+                    'input': cadena,
+                    'automataType': 'AFD',
+                    'automataId': automata_id
+                }, format='json').data['isValid']
+
+            self.assertTrue(validate('a'))
+            self.assertIsInstance(cache_manager.get_compiled(automata_id), AFDMapeado)
+
+            # La edición escribe un fichero nuevo al confirmarse; otro proceso lo ve al proyectarlo
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch('/api/automata/edit/', {
+                    'id': automata_id,
+                    'addEdges': [{'from': 'p1', 'to': 'p1', 'label': 'b'}]
+                }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            compiled_store.forget()
+            self.assertTrue(cache_manager.get_compiled(automata_id).aceptar('abb'))
+            self.assertTrue(validate('ab'))
+
+            # Un proceso que compiló la fila anterior puede escribir su tabla
+            # después de que se guarde la nueva: se ignora por su versión
+            stale = cache_manager.get_compiled(automata_id).copia()
+            self.client.post('/api/automata/save/', dict(afd, id=automata_id), format='json')
+            self.assertIsNone(cache_manager.get_compiled(automata_id))
+            compiled_store.put(automata_id, stale)
+            version = AutomataModel.objects.get(id=automata_id).version
+            self.assertIsNone(cache_manager.get_compiled(automata_id, version))
+            self.assertFalse(validate('ab'))
+            self.assertEqual(cache_manager.get_compiled(automata_id, version).version_bd, version)
+
+            # Los datos enviados con el id se validan como un borrador, sin tocar
+            # la tabla guardada, y un id inexistente no deja fichero que pueda
+            # heredar un autómata nuevo
+            response = self.client.post('/api/validate/', {
+                'input': 'b', 'automataType': 'AFD', 'automataId': automata_id,
+                'automataData': {'nodes': afd['nodes'], 'edges': [{'from': 'p0', 'to': 'p1', 'label': 'b'}]}
+            }, format='json')
+            self.assertTrue(response.data['isValid'])
+            self.assertFalse(validate('b'))
+            response = self.client.post('/api/validate/', {
+                'input': 'a', 'automataId': automata_id + 1
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+            self.assertIsNone(compiled_store.get(automata_id + 1))
+
+    def test_equivalent_api(self):
+        """Prueba la búsqueda de autómatas guardados que aceptan el mismo lenguaje."""
+        equivalente = {
+            'name': 'Termina en ab (AFD)',
+            'automataType': 'AFD',
+            'nodes': [
+                {'id': 'p', 'initial': True},
+                {'id': 'x'},
+                {'id': 'y', 'final': True}
+            ],
+            'edges': [
+                {'from': 'p', 'to': 'p', 'label': 'b'},
+                {'from': 'p', 'to': 'x', 'label': 'a'},
+                {'from': 'x', 'to': 'x', 'label': 'a'},
+                {'from': 'x', 'to': 'y', 'label': 'b'},
+                {'from': 'y', 'to': 'x', 'label': 'a'},
+                {'from': 'y', 'to': 'p', 'label': 'b'}
+            ]
+        }
+        distinto = dict(self.test_automata, name='Otro', nodes=[
+            {'id': 'q0', 'label': 'q0', 'initial': True},
+            {'id': 'q1', 'label': 'q1', 'final': True},
+            {'id': 'q2', 'label': 'q2', 'final': True}
+        ])
+
+        ids = []
+        for data in (self.test_automata, equivalente, distinto):
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.post('/api/automata/save/', data, format='json')
+            self.assertEqual(len(callbacks), 1)
+            ids.append(response.data['id'])
+        update_language_hash(ids[1])
+
+        # El primero aún no tiene huella: se calcula al consultarlo
+        response = self.client.get(f'/api/automata/equivalent/?id={ids[0]}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([a['id'] for a in response.data['equivalent']], [ids[1]])
+        self.assertIsNotNone(AutomataModel.objects.get(id=ids[0]).language_hash)
+
+        response = self.client.post('/api/automata/equivalent/', equivalente, format='json')
+        self.assertEqual([a['id'] for a in response.data['equivalent']], ids[:2])
+
+        # Editar un autómata descarta su huella hasta que se recalcula
+        self.client.patch('/api/automata/edit/', {
+            'id': ids[1],
+            'updateNodes': [{'id': 'x', 'final': True}]
+        }, format='json')
+        self.assertIsNone(AutomataModel.objects.get(id=ids[1]).language_hash)
+        response = self.client.get(f'/api/automata/equivalent/?id={ids[0]}')
+        self.assertEqual(response.data['equivalent'], [])
+
+        # La determinización respeta el límite de estados del AFD
+        with override_settings(AUTOMATA_ADMISSION_LIMITS={'max_dfa_states': 2}):
+            response = self.client.post('/api/automata/equivalent/', self.test_automata, format='json')
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(response.data['limit'], 'max_dfa_states')
+
+    def test_compact_api(self):
+        """Prueba el formato compacto en peticiones y respuestas, con gzip."""
+        compact = to_compact(self.test_automata)
+        response = self.client.post('/api/automata/convert/?compact=true', compact, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['format'], 'compact-v1')
+        normal = self.client.post('/api/automata/convert/', self.test_automata, format='json')
+        self.assertEqual(from_compact(response.json()), normal.json())
+
+        response = self.client.post('/api/validate/', {
+            'input': 'aab',
+            'automataType': 'AFND',
+            'automataData': compact
+        }, format='json')
+        self.assertTrue(response.data['isValid'])
+
+        response = self.client.post('/api/automata/convert/?compact=true',
+                                    dict(compact, targets=[-1] + compact['targets'][1:]), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        automata_id = self.client.post('/api/automata/save/', self.test_automata, format='json').data['id']
+        response = self.client.get(f'/api/automata/load/?id={automata_id}&compact=true',
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(data['name'], 'Test Automaton')
+        self.assertEqual(data['offsets'], [0, 3, 4, 4])
+
+    def test_admission_control(self):
+        """Prueba los rechazos 413 por tamaño o coste y 429 por concurrencia."""
+        with override_settings(AUTOMATA_ADMISSION_LIMITS={'max_states': 2}):
+            response = self.client.post('/api/automata/convert/', self.test_automata, format='json')
+            self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            self.assertEqual(response.data['limit'], 'max_states')
+
+        data = {'nodes': self.test_automata['nodes'], 'edges': self.test_automata['edges']}
+        with override_settings(AUTOMATA_ADMISSION_LIMITS={'max_validation_cost': 20}):
+            response = self.client.post('/api/validate/', {
+                'input': 'abab', 'automataType': 'AFND', 'automataData': data
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = self.client.post('/api/validate/batch/', {
+                'inputs': ['abab', 'ab'], 'automataType': 'AFND', 'automataData': data
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        with override_settings(AUTOMATA_ADMISSION_LIMITS={'max_dfa_states': 2}):
+            response = self.client.post('/api/automata/convert/', self.test_automata, format='json')
+            self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            self.assertEqual(response.data['limit'], 'max_dfa_states')
+
+        with override_settings(AUTOMATA_CONCURRENCY_LIMITS={'convert': 0}):
+            response = self.client.post('/api/automata/convert/', self.test_automata, format='json')
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(response['Retry-After'], '1')
+
+    def test_warm_up(self):
+        """Prueba la precarga de tablas compiladas y conversiones guardadas."""
+        afd = {
+            'name': 'AFD',
+            'automataType': 'AFD',
+            'nodes': [{'id': 'p0', 'initial': True}, {'id': 'p1', 'final': True}],
+            'edges': [{'from': 'p0', 'to': 'p1', 'label': 'a'}]
+        }
+        afd_id = self.client.post('/api/automata/save/', afd, format='json').data['id']
+        self.client.post('/api/automata/save/', self.test_automata, format='json')
+
+        stats = warm_up(limit=10, budget_seconds=10)
+        self.assertEqual((stats['compiled'], stats['converted'], stats['failed']), (1, 1, 0))
+        self.assertTrue(cache_manager.get_compiled(afd_id).aceptar('a'))
+        self.assertEqual(ConversionResult.objects.count(), 1)
+
+        # Lo ya precargado no se repite; sin presupuesto no se hace nada
+        self.assertEqual(warm_up(limit=10, budget_seconds=10)['skipped'], 2)
+        self.assertFalse(warm_up(limit=10, budget_seconds=-1)['complete'])
+
+        # Una tabla compilada antes de una invalidación no se guarda
+        generation = cache_manager.get_generation(afd_id)
+        compiled = cache_manager.get_compiled(afd_id)
+        cache_manager.invalidate_automata(afd_id)
+        cache_manager.set_compiled(afd_id, compiled, generation)
+        self.assertIsNone(cache_manager.get_compiled(afd_id))
+
+    def test_profiling(self):
+        """Prueba el perfilado bajo demanda y el búfer circular de perfiles."""
+        with tempfile.TemporaryDirectory() as directory, override_settings(AUTOMATA_PROFILING={
+            'enabled': True, 'token': 'secreto', 'directory': directory, 'max_profiles': 2
+        }):
+            # Sin token válido no se perfila
+            response = self.client.post('/api/automata/convert/', self.test_automata, format='json',
+                                        HTTP_X_PROFILE='1', HTTP_X_PROFILE_TOKEN='otro')
+            self.assertNotIn('X-Profile-Id', response)
+
+            ids = []
+            for _ in range(3):
+                response = self.client.post('/api/automata/convert/', self.test_automata, format='json',
+                                            HTTP_X_PROFILE='1', HTTP_X_PROFILE_TOKEN='secreto')
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertIn('(', response['X-Profile-Top'])
+                self.assertIn('KiB', response['X-Profile-Peak'])
+                ids.append(response['X-Profile-Id'])
+
+            response = self.client.get('/api/automata/profiles/', HTTP_X_PROFILE_TOKEN='secreto')
+            self.assertEqual(response.data['profiles'], ids[:0:-1])
+
+            response = self.client.get(f'/api/automata/profiles/?id={ids[-1]}', HTTP_X_PROFILE_TOKEN='secreto')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertGreater(len(b''.join(response.streaming_content)), 0)
+            response = self.client.get(f'/api/automata/profiles/?id={ids[0]}', HTTP_X_PROFILE_TOKEN='secreto')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+            response = self.client.get('/api/automata/profiles/')
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_convert_stream_api(self):
+        """Prueba la conversión en streaming NDJSON y que libera su hueco de concurrencia."""
+        def stream(data):
+            response = self.client.post('/api/automata/convert/?stream=true', data, format='json')
+            self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+            return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+        with mock.patch('automata.streaming.STREAM_PROGRESS_EVERY', 1), \
+                override_settings(AUTOMATA_CONCURRENCY_LIMITS={'convert': 1}):
+            records = stream(self.test_automata)
+            # El hueco se liberó: una segunda petición no recibe 429
+            self.assertEqual(len(stream(self.test_automata)), len(records))
+
+        normal = self.client.post('/api/automata/convert/', self.test_automata, format='json').json()
+        by_type = {}
+        for record in records:
+            by_type.setdefault(record.pop('type'), []).append(record)
+        self.assertEqual(by_type['node'], normal['nodes'])
+        self.assertEqual(by_type['edge'], normal['edges'])
+        self.assertEqual(len(by_type['progress']), 3)
+        self.assertEqual(by_type['done'][0]['states'], 3)
+        self.assertEqual(records[-1], by_type['done'][0])
+
+        # Guardado por la conversión normal: ahora sale del almacén
+        self.assertTrue(stream(self.test_automata)[-1]['fromStore'])
+
+        with override_settings(AUTOMATA_ADMISSION_LIMITS={'max_dfa_states': 2}):
+            records = stream(dict(self.test_automata, edges=self.test_automata['edges'] + [
+                {'from': 'q2', 'to': 'q2', 'label': 'a'}
+            ]))
+        self.assertEqual(records[-1]['type'], 'error')
+        self.assertEqual(records[-1]['limit'], 'max_dfa_states')
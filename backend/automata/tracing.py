@@ -0,0 +1,40 @@
+"""
+Registro opcional de ejecuciones de autómatas.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from .config import TRACE_MAX_STEPS
+
+
+class Traza:
+    """
+    Guarda los estados activos tras cada símbolo procesado.
+
+    Solo se crea cuando se pide una traza; la validación normal no la usa.
+    Se registran como mucho ``max_pasos`` pasos (incluido el inicial) y el
+    resto de la ejecución continúa sin registrar, marcando la traza como truncada.
+    """
+
+    def __init__(self, max_pasos: int = TRACE_MAX_STEPS):
+        if max_pasos < 1:
+            raise ValueError("max_pasos debe ser positivo")
+        self.max_pasos = max_pasos
+        self.pasos: List[Dict[str, Any]] = []
+        self.truncada = False
+
+    def registrar(self, simbolo: Optional[str], estados: Iterable) -> None:
+        """Registra el conjunto de estados activos tras leer ``simbolo``."""
+        if len(self.pasos) >= self.max_pasos:
+            self.truncada = True
+            return
+        self.pasos.append({
+            'symbol': simbolo,
+            'states': sorted(estado.nombre for estado in estados),
+        })
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convierte la traza a un diccionario para la API."""
+        return {
+            'steps': self.pasos,
+            'truncated': self.truncada,
+        }
@@ -3,8 +3,14 @@ from . import views
 
 urlpatterns = [
     path('validate/', views.validate, name='validate'),
+    path('validate/batch/', views.validate_batch, name='validate_batch'),
+    path('automata/validate/', views.validate, name='validate_alt'),
     path('automata/', views.save_automata, name='save_automata'),  # Para POST
     path('automata/convert/', views.convert_automata, name='convert_automata'),
+    path('automata/analyze/', views.analyze_automata, name='analyze_automata'),
     path('automata/save/', views.save_automata, name='save_automata_alt'),
     path('automata/load/', views.load_automata, name='load_automata'),
+    path('automata/edit/', views.edit_automata, name='edit_automata'),
+    path('automata/equivalent/', views.equivalent_automata, name='equivalent_automata'),
+    path('automata/profiles/', views.profiles, name='profiles'),
 ]
\ No newline at end of file
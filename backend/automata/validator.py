@@ -1,8 +1,8 @@
 """
 Validación de autómatas y cadenas.
 """
-from typing import Set, Dict, List, Any
-from .automata import Estado, Automata
+from typing import Dict, Any
+from .automata import Automata
 from .utils import logger
 
 class Validator:
@@ -13,28 +13,6 @@ class Validator:
         """Valida una cadena con un autómata."""
         return automata.validar_cadena(cadena)
     
-    @staticmethod
-    def _cerradura_epsilon(estados: Set[Estado]) -> Set[Estado]:
-        """Calcula la cerradura epsilon de un conjunto de estados."""
-        resultado = set(estados)
-        procesados = set()
-        por_procesar = list(estados)
-        
-        while por_procesar:
-            actual = por_procesar.pop()
-            if actual in procesados:
-                continue
-                
-            procesados.add(actual)
-            
-            if 'ε' in actual.transiciones:
-                for estado in actual.transiciones['ε']:
-                    if estado not in procesados:
-                        resultado.add(estado)
-                        por_procesar.append(estado)
-        
-        return resultado
-    
     @staticmethod
     def validate_automata_structure(automata_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -1,106 +1,281 @@
 """
 Vistas para la API de autómatas.
 """
+import os
+
+from django.db import transaction
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 
-from .automata import Automata
-from .afnd_to_afd import AFND_to_AFD
-from .models import AutomataModel
+from .formats import automata_to_data, build_automata_from_data, read_automata_data, to_compact
+from .admission import (
+    admission_control, check_analysis_request, check_conversion_request, check_storage_request,
+    check_validation_request, get_limit,
+)
+from .afnd_to_afd import AFND_to_AFD, LimiteDeEstadosExcedido
+from .analysis import analyze_conversion
+from .models import AutomataModel, row_version
+from .profiling import is_authorized, list_profiles, profile_path
+from .result_cache import result_cache
 from .utils import logger, log_execution_time
 from .validator import Validator
 from .cache import cache_manager
+from .codegen import matcher_cache
+from .compiled_store import AFDMapeado
+from .config import TRACE_MAX_STEPS
+from .conversion_store import get_conversion, save_conversion
+from .editing import AutomataPatch, initial_state
+from .equivalence import (
+    compute_language_hash, find_equivalent, schedule_language_hash, update_language_hash,
+)
+from .fingerprint import automata_fingerprint, minimal_fingerprint
+from .minimization import minimizer_cache
+from .streaming import NDJSON_CONTENT_TYPE, conversion_stream, stored_stream
+from .tracing import Traza
+
+
+def _flag(request, name):
+    """Opción booleana por parámetro (?name=true) o en el cuerpo (name: true)."""
+    value = request.query_params.get(name) or request.data.get(name)
+    return value in (True, 'true', '1')
+
+
+def _stored_automata_data(automata, compact):
+    data = automata.to_dict
+    if compact:
+        data.update(to_compact(data))
+        del data['nodes'], data['edges']
+    return data
 
 
 @api_view(['POST'])
 @log_execution_time
+@admission_control('validate', check_validation_request)
 def validate(request):
     """
     Valida una cadena de entrada con un autómata.
     Espera un JSON con:
     - input: Cadena a validar
     - automataType: Tipo de autómata (AFND o AFD)
-    - automataData: Datos del autómata (nodos y aristas)
+    - automataData: Datos del autómata (nodos y aristas, o formato compacto)
+    - automataId: (opcional) Id de un autómata guardado. Sin automataData se
+      valida con la fila guardada (y su tipo), 404 si no existe; con
+      automataData se validan siempre los datos enviados, como un borrador
+    - trace: (opcional) Devolver los estados activos tras cada símbolo
+    - traceLimit: (opcional) Número máximo de pasos de la traza (como mucho TRACE_MAX_STEPS)
+    Los resultados se comparten entre autómatas equivalentes (ver
+    ``result_cache``): fromCache indica una respuesta sacada de la caché y
+    resumedFrom, la posición desde la que se continuó una cadena ya vista.
     """
     try:
         input_string = request.data.get('input', '')
         automata_type = request.data.get('automataType', 'AFND')
-        automata_data = request.data.get('automataData', {})
         automata_id = request.data.get('automataId')
+        traza = None
+        if request.data.get('trace'):
+            traza = Traza(min(int(request.data.get('traceLimit', TRACE_MAX_STEPS)), TRACE_MAX_STEPS))
         
-        # Intentar obtener resultado desde caché si es posible
-        if automata_id:
-            cached_result = cache_manager.get_validation_result(automata_id, input_string)
-            if cached_result is not None:
-                logger.info(f"Resultado obtenido desde caché para automata_id={automata_id}, input={input_string}")
+        compiled = accepts = None
+        warnings = []
+        # Solo un id numérico puede ser de un autómata guardado
+        if not request.data.get('automataData') and automata_id and str(automata_id).isdigit():
+            # Los AFD guardados se validan sobre su tabla compilada en caché. Solo
+            # vale si es de la versión actual de la fila: otro proceso pudo
+            # escribirla justo antes de que la fila cambiara
+            # La generación se lee antes de cargar la fila (ver set_compiled)
+            generation = cache_manager.get_generation(automata_id)
+            row = AutomataModel.objects.filter(id=automata_id).values_list('automata_type', 'updated_at').first()
+            if row is not None and row[0] == 'AFD' and traza is None:
+                compiled = cache_manager.get_compiled(automata_id, row_version(row[1]))
+            stored = None
+            if row is not None and compiled is None:
+                stored = AutomataModel.objects.filter(id=automata_id).first()
+            if compiled is None and stored is None:
+                return Response({
+                    'isValid': False,
+                    'error': 'El autómata no existe'
+                }, status=status.HTTP_404_NOT_FOUND)
+            if stored is not None:
+                automata_type = stored.automata_type
+                automata_data = {'nodes': stored.nodes, 'edges': stored.edges}
+                if automata_type == 'AFD' and traza is None:
+                    compiled = build_automata_from_data(automata_data, automata_type).compilar()
+                    compiled.version_bd = stored.version
+                    cache_manager.set_compiled(automata_id, compiled, generation)
+            if compiled is not None:
+                # Con tráfico suficiente, con el reconocedor generado para la tabla
+                accepts = lambda cadena: matcher_cache.aceptar(compiled, cadena)
+        else:
+            automata_data = read_automata_data(request.data.get('automataData', {}))
+
+            # Validar estructura del autómata
+            validation_result = Validator.validate_automata_structure(automata_data)
+            if not validation_result['is_valid']:
+                return Response({
+                    'isValid': False,
+                    'errors': validation_result['errors']
+                }, status=status.HTTP_400_BAD_REQUEST)
+            warnings = validation_result.get('warnings', [])
+
+        # Resultados compartidos por todos los autómatas que aceptan el mismo lenguaje
+        language = None
+        if traza is None and result_cache.enabled():
+            if compiled is not None:
+                language = result_cache.table_language(compiled)
+            else:
+                language = result_cache.language(automata_data, automata_type)
+
+        resumed_from = 0
+        if language is not None:
+            is_valid, from_cache, resumed_from = result_cache.accepts(language, input_string, accepts)
+            if from_cache:
                 return Response({
-                    'isValid': cached_result,
+                    'isValid': is_valid,
                     'fromCache': True
                 })
+        elif accepts is not None:
+            is_valid = accepts(input_string)
+        else:
+            # Construir autómata
+            automata = build_automata_from_data(automata_data, automata_type)
+            
+            # Validar cadena
+            is_valid = automata.validar_cadena(input_string, traza)
+        
+        response = {
+            'isValid': is_valid,
+            'warnings': warnings
+        }
+        if resumed_from:
+            response['resumedFrom'] = resumed_from
+        if traza is not None:
+            response['trace'] = traza.to_dict()
+        return Response(response)
         
-        # Validar estructura del autómata
+    except Exception as e:
+        logger.error(f"Error validando cadena: {str(e)}")
+        return Response({
+            'isValid': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@log_execution_time
+@admission_control('validate', check_validation_request)
+def validate_batch(request):
+    """
+    Valida varias cadenas de entrada con un mismo autómata.
+    Espera un JSON con:
+    - inputs: Lista de cadenas a validar
+    - automataType: Tipo de autómata (AFND o AFD)
+    - automataData: Datos del autómata (nodos y aristas, o formato compacto)
+    """
+    try:
+        inputs = request.data.get('inputs', [])
+        automata_type = request.data.get('automataType', 'AFND')
+        automata_data = read_automata_data(request.data.get('automataData', {}))
+
+        if not isinstance(inputs, list) or not all(isinstance(i, str) for i in inputs):
+            return Response({
+                'error': 'inputs debe ser una lista de cadenas'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
         validation_result = Validator.validate_automata_structure(automata_data)
         if not validation_result['is_valid']:
             return Response({
-                'isValid': False,
+                'results': [],
                 'errors': validation_result['errors']
             }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Construir autómata
+
         automata = build_automata_from_data(automata_data, automata_type)
-        
-        # Validar cadena
-        is_valid = automata.validar_cadena(input_string)
-        
-        # Guardar en caché
-        if automata_id:
-            cache_manager.set_validation_result(automata_id, input_string, is_valid)
-        
+
         return Response({
-            'isValid': is_valid,
+            'results': automata.validar_lote(inputs),
             'warnings': validation_result.get('warnings', [])
         })
-        
+
     except Exception as e:
-        logger.error(f"Error validando cadena: {str(e)}")
+        logger.error(f"Error validando lote de cadenas: {str(e)}")
         return Response({
-            'isValid': False,
             'error': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(['POST'])
 @log_execution_time
+@admission_control('convert', check_conversion_request)
 def convert_automata(request):
     """
     Convierte un AFND a AFD.
-    Espera un JSON con nodos y aristas del AFND.
+    Espera un JSON con nodos y aristas del AFND y, opcionalmente,
+    minimize: true para devolver el AFD mínimo.
+    Los resultados se guardan por la huella del AFND y se reutilizan.
+    El AFND puede enviarse en formato compacto (ver ``formats``), y con
+    compact: true (o ?compact=true) la respuesta usa ese mismo formato.
+    Con stream: true (o ?stream=true) el AFD se envía como NDJSON a medida
+    que se construye (ver ``streaming``); no se combina con minimize.
     """
     try:
-        nodes = request.data.get('nodes', [])
-        edges = request.data.get('edges', [])
+        data = read_automata_data(request.data)
+        nodes = data['nodes']
+        edges = data['edges']
+        minimize = _flag(request, 'minimize')
+        stream = _flag(request, 'stream')
         
         # Validar datos de entrada
         if not nodes or not edges:
             return Response({
                 'error': 'Se requieren nodos y aristas para la conversión'
             }, status=status.HTTP_400_BAD_REQUEST)
+        if stream and minimize:
+            return Response({
+                'error': 'La minimización necesita el AFD completo: no se puede combinar con stream'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
         # Construir AFND
         afnd = build_automata_from_data({'nodes': nodes, 'edges': edges}, 'AFND')
         
+        # Buscar una conversión previa del mismo AFND
+        fingerprint = automata_fingerprint(afnd)
+        stored = get_conversion(fingerprint, minimize)
+        if stored is not None:
+            if stream:
+                return StreamingHttpResponse(stored_stream(stored), content_type=NDJSON_CONTENT_TYPE)
+            return Response(to_compact(stored) if _flag(request, 'compact') else stored)
+        
         # Convertir a AFD
         converter = AFND_to_AFD()
         converter.afnd = afnd
-        afd = converter.convertir()
+        if stream:
+            # El resultado no se guarda: habría que retenerlo entero en memoria
+            return StreamingHttpResponse(
+                conversion_stream(converter, get_limit('max_dfa_states')),
+                content_type=NDJSON_CONTENT_TYPE,
+            )
+        if minimize:
+            # Directamente al AFD mínimo, sin crear el AFD intermedio completo
+            afd = converter.convertir_minimo(max_estados=get_limit('max_dfa_states'))
+            logger.debug(f"Minimización con la estrategia {converter.estrategia_usada}")
+        else:
+            afd = converter.convertir(max_estados=get_limit('max_dfa_states'))
         
         # Convertir autómata a formato de respuesta
         result = automata_to_data(afd)
+        save_conversion(fingerprint, result, minimize)
         
-        return Response(result)
+        return Response(to_compact(result) if _flag(request, 'compact') else result)
         
+    except LimiteDeEstadosExcedido as e:
+        logger.warning(f"Conversión rechazada: {str(e)}")
+        return Response({
+            'error': str(e),
+            'limit': 'max_dfa_states',
+            'max': e.max_estados
+        }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
     except Exception as e:
         logger.error(f"Error convirtiendo autómata: {str(e)}")
         return Response({
@@ -109,6 +284,40 @@ def convert_automata(request):
 
 
 @api_view(['POST'])
+@log_execution_time
+@admission_control('analyze', check_analysis_request)
+def analyze_automata(request):
+    """
+    Analiza un AFND antes de convertirlo, sin hacer la conversión.
+    Espera el mismo JSON que ``convert_automata`` y devuelve métricas
+    estructurales, una estimación de los estados del AFD (dfaStates) y el modo
+    recomendado (recommendedMode): inline, stream o lazy (ver ``analysis``).
+    Si la conversión ya está guardada (cached), siempre es inline.
+    """
+    try:
+        data = read_automata_data(request.data)
+        if not data['nodes'] or not data['edges']:
+            return Response({
+                'error': 'Se requieren nodos y aristas para el análisis'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        afnd = build_automata_from_data(data, 'AFND')
+        report = analyze_conversion(afnd)
+        minimize = _flag(request, 'minimize')
+        report['cached'] = get_conversion(automata_fingerprint(afnd), minimize) is not None
+        if report['cached']:
+            report['recommendedMode'] = 'inline'
+        return Response(report)
+
+    except Exception as e:
+        logger.error(f"Error analizando autómata: {str(e)}")
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@admission_control('storage', check_storage_request)
 def save_automata(request):
     """
     Guarda un autómata en la base de datos.
@@ -117,8 +326,9 @@ def save_automata(request):
         name = request.data.get('name', 'Sin nombre')
         description = request.data.get('description', '')
         automata_type = request.data.get('automataType', 'AFND')
-        nodes = request.data.get('nodes', [])
-        edges = request.data.get('edges', [])
+        data = read_automata_data(request.data)
+        nodes = data['nodes']
+        edges = data['edges']
         
         # Validar datos
         if not nodes or not edges:
@@ -135,7 +345,9 @@ def save_automata(request):
             automata.automata_type = automata_type
             automata.nodes = nodes
             automata.edges = edges
+            automata.language_hash = None
             automata.save()
+            cache_manager.invalidate_automata(automata.id)
             msg = "Autómata actualizado correctamente"
         else:
             # Crear nuevo autómata
@@ -146,7 +358,10 @@ def save_automata(request):
                 nodes=nodes,
                 edges=edges
             )
+            # Un fichero compilado o resultados anteriores con este id no son de este autómata
+            cache_manager.invalidate_automata(automata.id)
             msg = "Autómata guardado correctamente"
+        schedule_language_hash(automata.id)
         
         return Response({
             'success': True,
@@ -162,12 +377,144 @@ def save_automata(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['PATCH'])
+@log_execution_time
+@admission_control('storage')
+def edit_automata(request):
+    """
+    Aplica cambios incrementales a un autómata guardado.
+    Espera un JSON con el id del autómata y cualquiera de:
+    - addNodes, removeNodes, updateNodes
+    - addEdges, removeEdges
+    La tabla compilada de un AFD se edita en lugar de recompilarla.
+    """
+    try:
+        automata_id = request.data.get('id')
+        if not automata_id:
+            return Response({
+                'error': 'Se requiere el id del autómata'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        patch = AutomataPatch(request.data)
+        with transaction.atomic():
+            automata = get_object_or_404(AutomataModel.objects.select_for_update(), id=automata_id)
+            if patch.is_empty():
+                return Response({'success': True, 'id': automata.id})
+
+            old_initial = initial_state(automata.nodes)
+            old_version = automata.updated_at
+            nodes, edges = patch.apply(automata.nodes, automata.edges, automata.automata_type)
+            automata.nodes = nodes
+            automata.edges = edges
+            automata.language_hash = None
+
+            # Actualizar la tabla compilada en lugar de reconstruirla
+            compiled = cache_manager.get_compiled(automata.id, automata.version)
+            edited = minimization = None
+            if (compiled is None or automata.automata_type != 'AFD'
+                    or initial_state(nodes) != old_initial
+                    or compiled.tiene_clases or patch.uses_symbol_classes()):
+                cache_manager.invalidate_automata(automata.id)
+            else:
+                transitions, states = patch.affected(compiled)
+                # La tabla proyectada es de solo lectura: se edita una copia. Hasta
+                # que se confirme la edición, nadie debe ver ni la vieja ni la nueva
+                edited = compiled.copia() if isinstance(compiled, AFDMapeado) else compiled
+                cache_manager.discard_compiled(automata.id)
+                patch.apply_to_compiled(edited)
+                # El AFD mínimo se actualiza solo en lo que alcanza a los estados editados.
+                # Su huella se guarda, así que la tabla tiene que venir de la fila guardada
+                if minimizer_cache.enabled() and edited.version_bd is not None:
+                    changed = {state for state, _ in transitions} | states | patch.added_states(edited)
+                    minimization = minimizer_cache.update(automata.id, old_version, edited, changed)
+                    automata.language_hash = minimal_fingerprint(minimization.minimo(edited))
+
+            automata.save(update_fields=['nodes', 'edges', 'language_hash', 'updated_at'])
+            if minimization is not None:
+                minimizer_cache.put(automata.id, automata.updated_at, minimization)
+            else:
+                schedule_language_hash(automata.id)
+            if edited is not None:
+                # La tabla editada se publica solo si la edición se confirma
+                if edited.version_bd is not None:
+                    edited.version_bd = automata.version
+                transaction.on_commit(lambda: cache_manager.set_compiled(automata.id, edited))
+
+        return Response({
+            'success': True,
+            'message': "Autómata actualizado correctamente",
+            'id': automata.id
+        })
+
+    except Exception as e:
+        logger.error(f"Error editando autómata: {str(e)}")
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET', 'POST'])
+@log_execution_time
+@admission_control('convert', check_conversion_request)
+def equivalent_automata(request):
+    """
+    Busca los autómatas guardados que aceptan el mismo lenguaje.
+    GET con ?id= para un autómata guardado (se excluye a sí mismo), o POST
+    con nodes, edges y automataType para un autómata sin guardar.
+    """
+    try:
+        if request.method == 'GET':
+            automata_id = request.query_params.get('id')
+            if not automata_id:
+                return Response({
+                    'error': 'Se requiere el id del autómata'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            automata = get_object_or_404(AutomataModel, id=automata_id)
+            language_hash = automata.language_hash
+            # Aún no calculada (o recién editado): se calcula ahora
+            if language_hash is None:
+                language_hash = update_language_hash(automata.id)
+                if language_hash is None:
+                    raise ValueError("No se pudo calcular la huella del autómata")
+            exclude_id = automata.id
+        else:
+            data = read_automata_data(request.data)
+            language_hash = compute_language_hash(
+                data['nodes'], data['edges'], request.data.get('automataType', 'AFND')
+            )
+            exclude_id = None
+
+        return Response({
+            'languageHash': language_hash,
+            'equivalent': [
+                {'id': a.id, 'name': a.name, 'automataType': a.automata_type}
+                for a in find_equivalent(language_hash, exclude_id)
+            ],
+        })
+
+    except LimiteDeEstadosExcedido as e:
+        logger.warning(f"Búsqueda de equivalentes rechazada: {str(e)}")
+        return Response({
+            'error': str(e),
+            'limit': 'max_dfa_states',
+            'max': e.max_estados
+        }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    except Exception as e:
+        logger.error(f"Error buscando autómatas equivalentes: {str(e)}")
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
 @api_view(['GET'])
+@admission_control('storage')
 def load_automata(request):
     """
     Carga autómatas de la base de datos.
     Si se proporciona un ID, carga un autómata específico.
     De lo contrario, devuelve una lista de todos los autómatas.
+    Con ?compact=true los nodos y aristas van en formato compacto.
     """
     try:
         automata_id = request.query_params.get('id')
@@ -175,11 +522,12 @@ def load_automata(request):
         if automata_id:
             # Cargar un autómata específico
             automata = get_object_or_404(AutomataModel, id=automata_id)
-            return Response(automata.to_dict)
+            return Response(_stored_automata_data(automata, _flag(request, 'compact')))
         else:
             # Listar todos los autómatas
             automatas = AutomataModel.objects.all().order_by('-updated_at')
-            return Response([a.to_dict for a in automatas])
+            compact = _flag(request, 'compact')
+            return Response([_stored_automata_data(a, compact) for a in automatas])
         
     except Exception as e:
         logger.error(f"Error cargando autómata(s): {str(e)}")
@@ -188,56 +536,22 @@ def load_automata(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
-def build_automata_from_data(data, automata_type='AFND'):
-    """
-    Construye un objeto Automata a partir de datos de entrada.
-    """
-    automata = Automata(tipo=automata_type)
-    
-    # Primero, crear todos los estados
-    for node in data['nodes']:
-        automata.agregar_estado(node['id'], node.get('final', False))
-    
-    # Establecer el estado inicial
-    for node in data['nodes']:
-        if node.get('initial', False):
-            automata.estado_inicial = automata.estados[node['id']]
-            break
-    
-    # Agregar transiciones
-    for edge in data['edges']:
-        automata.agregar_transicion(edge['from'], edge.get('label', 'ε'), edge['to'])
-    
-    return automata
-
-
-def automata_to_data(automata):
-    """
-    Convierte un objeto Automata a formato JSON para la API.
-    """
-    nodes = []
-    edges = []
-    
-    # Crear nodos
-    for nombre, estado in automata.estados.items():
-        nodes.append({
-            'id': nombre,
-            'label': nombre,
-            'initial': estado == automata.estado_inicial,
-            'final': estado.es_final
-        })
-    
-    # Crear aristas
-    for nombre, estado in automata.estados.items():
-        for simbolo, destinos in estado.transiciones.items():
-            for destino in destinos:
-                edges.append({
-                    'from': nombre,
-                    'to': destino.nombre,
-                    'label': simbolo
-                })
-    
-    return {
-        'nodes': nodes,
-        'edges': edges
-    }
\ No newline at end of file
+@api_view(['GET'])
+def profiles(request):
+    """
+    Lista los perfiles guardados (con ?id= descarga uno en formato pstats).
+    Requiere la misma autorización que el perfilado.
+    """
+    if not is_authorized(request):
+        return Response({
+            'error': 'No autorizado'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    profile_id = request.query_params.get('id')
+    if not profile_id:
+        return Response({'profiles': list_profiles()})
+
+    path = profile_path(profile_id)
+    if path is None or not os.path.exists(path):
+        raise Http404("El perfil no existe")
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'{profile_id}.prof')
@@ -0,0 +1,104 @@
+"""
+Precarga de los autómatas guardados más recientes al arrancar un trabajador.
+
+Los AFD se compilan en la caché del proceso (la que usa ``validate``) y de
+los AFND se guarda la conversión en el almacén persistente, si aún no está.
+Así las primeras peticiones tras un despliegue no pagan la construcción.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .admission import automata_size, get_limit
+from .afnd_to_afd import AFND_to_AFD
+from .cache import cache_manager
+from .config import WARMUP
+from .conversion_store import get_conversion, save_conversion
+from .fingerprint import automata_fingerprint
+from .formats import automata_to_data, build_automata_from_data
+from .models import AutomataModel
+from .utils import logger
+
+_started = threading.Lock()
+
+
+def get_warmup_setting(name):
+    return getattr(settings, 'AUTOMATA_WARMUP', {}).get(name, WARMUP[name])
+
+
+def warm_up(limit=None, budget_seconds=None):
+    """
+    Precarga hasta ``limit`` autómatas, del modificado más recientemente al
+    más antiguo, y se detiene al agotar ``budget_seconds`` (se comprueba entre
+    autómatas). Devuelve un resumen con lo hecho.
+    """
+    limit = get_warmup_setting('limit') if limit is None else limit
+    budget_seconds = get_warmup_setting('budget_seconds') if budget_seconds is None else budget_seconds
+    start = time.perf_counter()
+    stats = {'compiled': 0, 'converted': 0, 'skipped': 0, 'failed': 0, 'complete': True}
+
+    for automata_id in AutomataModel.objects.order_by('-updated_at').values_list('id', flat=True)[:limit]:
+        if time.perf_counter() - start > budget_seconds:
+            stats['complete'] = False
+            break
+        try:
+            stats[_warm_one(automata_id)] += 1
+        except Exception as e:
+            logger.warning(f"Precarga del autómata {automata_id} fallida: {str(e)}")
+            stats['failed'] += 1
+
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+
+def _warm_one(automata_id):
+    # La generación se lee antes de cargar la fila: si se edita mientras
+    # tanto, la tabla compilada (ya obsoleta) no se guarda
+    generation = cache_manager.get_generation(automata_id)
+    row = AutomataModel.objects.filter(id=automata_id).first()
+    if row is None:
+        return 'skipped'
+    states, edges = automata_size({'nodes': row.nodes, 'edges': row.edges})
+    if states > get_limit('max_states') or edges > get_limit('max_edges'):
+        return 'skipped'
+
+    automata = build_automata_from_data({'nodes': row.nodes, 'edges': row.edges}, row.automata_type)
+    if row.automata_type == 'AFD':
+        if cache_manager.get_compiled(automata_id, row.version) is not None:
+            return 'skipped'
+        compiled = automata.compilar()
+        compiled.version_bd = row.version
+        cache_manager.set_compiled(automata_id, compiled, generation)
+        return 'compiled'
+
+    fingerprint = automata_fingerprint(automata)
+    if get_conversion(fingerprint) is not None:
+        return 'skipped'
+    converter = AFND_to_AFD()
+    converter.afnd = automata
+    afd = converter.convertir(max_estados=get_limit('max_dfa_states'))
+    save_conversion(fingerprint, automata_to_data(afd))
+    return 'converted'
+
+
+def _run_in_background():
+    try:
+        stats = warm_up()
+        logger.info(f"Precarga terminada: {stats}")
+    except Exception as e:
+        logger.error(f"Error en la precarga: {str(e)}")
+    finally:
+        close_old_connections()
+
+
+def start_warmup(**kwargs):
+    """
+    Lanza la precarga en un hilo, una sola vez por proceso. Se conecta a
+    ``request_started`` (ver apps.py), así que solo corre en procesos que
+    sirven peticiones, no en migraciones ni otros comandos.
+    """
+    if not _started.acquire(blocking=False):
+        return
+    threading.Thread(target=_run_in_background, name='automata-warmup', daemon=True).start()
@@ -1,4 +1,5 @@
 import os
+import sys
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -16,6 +17,7 @@ INSTALLED_APPS = [
 SECRET_KEY = "Base2022@"
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Debe ser primero
+    'django.middleware.gzip.GZipMiddleware',  # Comprime si el cliente envía Accept-Encoding: gzip
     'django.middleware.common.CommonMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -23,6 +25,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'automata.profiling.ProfilingMiddleware',  # Después de autenticación: usa request.user
 ]
 
 ROOT_URLCONF = 'src.urls'
@@ -50,6 +53,15 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),  # Use os.path.join here
+        # Las transacciones toman el bloqueo de escritura al empezar: sin esto,
+        # dos transacciones que leen y luego escriben se bloquean mutuamente
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # Conexiones persistentes; WAL y demás PRAGMA se aplican al abrirlas (automata/db.py)
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -89,7 +101,11 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
-    ]
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'automata.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 # Configuración de CORS
@@ -125,5 +141,16 @@ CORS_ALLOW_HEADERS = [
     'x-requested-with',
 ]
 
+# Sin precarga al ejecutar las pruebas
+AUTOMATA_WARMUP = {
+    'on_startup': 'test' not in sys.argv[1:2],
+}
+
+# Perfilado con la cabecera X-Profile: 1 y X-Profile-Token
+AUTOMATA_PROFILING = {
+    'enabled': True,
+    'token': os.environ.get('AUTOMATA_PROFILING_TOKEN'),
+}
+
 DEBUG = True
 ALLOWED_HOSTS = ['localhost', '127.0.0.1']
\ No newline at end of file
@@ -1,7 +1,6 @@
 from django.contrib import admin
-from django.urls import path
+from django.urls import include, path
 from django.http import HttpResponse
-from automata import views
 
 def home(request):
     return HttpResponse("Bienvenido a la API.")
@@ -9,6 +8,6 @@ def home(request):
 urlpatterns = [
     path('', home, name='home'),  # Ruta raíz
     path('admin/', admin.site.urls),
-    path('api/validate/', views.validate, name='validate'),
-    path('api/automata/convert/', views.convert_automata, name='convert_automata'),
+    path('api/', include('automata.urls')),
+    path('', include('automata.urls')),  # Rutas sin prefijo
 ]
\ No newline at end of file
@@ -1,6 +1,7 @@
 // frontend/src/hooks/useAutomataLogic.js
 import { useState, useCallback } from 'react';
 import { useHistory } from './useHistory';
+import { fromCompact, isCompact, toCompact } from '../utils/compactFormat';
 
 export const useAutomataLogic = (onAutomataChange) => {
     const [nodes, setNodes] = useState([{
@@ -194,17 +195,19 @@ export const useAutomataLogic = (onAutomataChange) => {
 
      const convertAutomata = useCallback(async () => {
         try {
-            const response = await fetch('http://localhost:8000/api/automata/convert/', { // Backend endpoint for conversion
+            // Formato compacto en ambos sentidos: mucho más pequeño para autómatas grandes
+            const response = await fetch('http://localhost:8000/api/automata/convert/?compact=true', { // Backend endpoint for conversion
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({ nodes, edges }), // Send current nodes and edges
+                body: JSON.stringify(toCompact(nodes, edges)), // Send current nodes and edges
             });
             if (!response.ok) {
                 throw new Error('Error al convertir el autómata');
             }
-            const data = await response.json();
+            const payload = await response.json();
+            const data = isCompact(payload) ? fromCompact(payload) : payload;
             console.log("AFD Data received:", data); // Log the response
             setNodes(data.nodes); // Update nodes with AFD nodes
             setEdges(data.edges); // Update edges with AFD edges
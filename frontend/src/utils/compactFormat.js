@@ -0,0 +1,74 @@
+// frontend/src/utils/compactFormat.js
+// Formato compacto de autómatas (ver backend/automata/formats.py): estados y
+// símbolos se envían una vez y las aristas son índices agrupados por origen.
+export const COMPACT_FORMAT = 'compact-v1';
+
+export const isCompact = (data) => Boolean(data) && data.format === COMPACT_FORMAT;
+
+export const toCompact = (nodes, edges) => {
+    const states = nodes.map(n => n.id);
+    const stateIndex = new Map(states.map((id, i) => [id, i]));
+    const symbols = [];
+    const symbolIndex = new Map();
+    const bySource = states.map(() => []);
+
+    edges.forEach(edge => {
+        const label = edge.label ?? 'ε';
+        if (!symbolIndex.has(label)) {
+            symbolIndex.set(label, symbols.length);
+            symbols.push(label);
+        }
+        if (!stateIndex.has(edge.from) || !stateIndex.has(edge.to)) {
+            throw new Error('Estado origen o destino no existe');
+        }
+        bySource[stateIndex.get(edge.from)].push([symbolIndex.get(label), stateIndex.get(edge.to)]);
+    });
+
+    const offsets = [0];
+    const edgeSymbols = [];
+    const targets = [];
+    bySource.forEach(list => {
+        list.forEach(([symbol, target]) => {
+            edgeSymbols.push(symbol);
+            targets.push(target);
+        });
+        offsets.push(targets.length);
+    });
+
+    const initial = nodes.findIndex(n => n.initial);
+    const compact = {
+        format: COMPACT_FORMAT,
+        states,
+        initial: initial >= 0 ? initial : null,
+        final: nodes.flatMap((n, i) => (n.final ? [i] : [])),
+        symbols,
+        offsets,
+        edgeSymbols,
+        targets,
+    };
+    const labels = nodes.map(n => n.label ?? n.id);
+    if (labels.some((label, i) => label !== states[i])) {
+        compact.labels = labels;
+    }
+    return compact;
+};
+
+export const fromCompact = (compact) => {
+    const { states, offsets, symbols, edgeSymbols, targets } = compact;
+    const labels = compact.labels || states;
+    const final = new Set(compact.final || []);
+
+    const nodes = states.map((id, i) => ({
+        id,
+        label: labels[i],
+        initial: i === compact.initial,
+        final: final.has(i),
+    }));
+    const edges = [];
+    states.forEach((from, i) => {
+        for (let j = offsets[i]; j < offsets[i + 1]; j++) {
+            edges.push({ from, to: states[targets[j]], label: symbols[edgeSymbols[j]] });
+        }
+    });
+    return { nodes, edges };
+};